@@ -23,7 +23,11 @@ def create_app(config_class=None):
     # Configurações
 
     app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
-    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+    # DATABASE_URL (ex.: postgresql://...) só vale como padrão; um config_class com URI própria prevalece
+    app.config['SQLALCHEMY_DATABASE_URI'] = (
+        os.environ.get('DATABASE_URL')
+        or f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+    )
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
     app.config['MAIL_SERVER'] = 'smtp.gmail.com'  # Exemplo para Gmail
@@ -33,15 +37,42 @@ def create_app(config_class=None):
     app.config['MAIL_PASSWORD'] = 'chiq xqyc fmfg jbes'
     app.config['MAIL_DEFAULT_SENDER'] = 'jimjrivan@gmail.com'
 
+    # Configurações específicas (ex.: produção/testes) sobrescrevem os padrões acima
+    if config_class:
+        app.config.from_object(config_class)
+
+    # Atrás de proxies reversos (nginx, balanceador), PROXY_SALTOS = quantos existem na frente do app:
+    # o request.remote_addr (usado no limite de logins por IP) passa a ser o IP do cliente informado
+    # pelo último proxy em X-Forwarded-For. Com 0 (padrão) os cabeçalhos X-Forwarded-* são ignorados,
+    # já que sem proxy qualquer cliente poderia forjá-los
+    saltos = app.config.get('PROXY_SALTOS', int(os.environ.get('PROXY_SALTOS', 0)))
+    if saltos:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=saltos, x_proto=saltos, x_host=saltos)
+
+    # Perfil do banco: URI, pool e PRAGMAs do SQLite
+    from app.utils.banco import configurar_banco, aplicar_pragmas, eh_sqlite
+    configurar_banco(app)
+
     # Inicializa as extensões com o app
     db.init_app(app)
+    if eh_sqlite(app.config['SQLALCHEMY_DATABASE_URI']):
+        with app.app_context():
+            aplicar_pragmas(db.engine, app.config['SQLITE_PRAGMAS'])
     bcrypt.init_app(app)
     login_manager.init_app(app)
     mail.init_app(app)
 
+    # Esquema do banco (tabelas, índices e migrações pendentes) antes de qualquer uso, inclusive pelo agendador
+    from app.utils.migracoes import preparar_banco
+    preparar_banco(app)
+
     if not scheduler.running:
+        # Tarefas persistidas no banco; só um processo (o líder) as executa
+        from app.utils.agendador import configurar_jobstore, iniciar_agendador
+        configurar_jobstore(app)
         scheduler.init_app(app)
-        scheduler.start()
+        iniciar_agendador(app)
 
     # Configurações do Flask-Login
     login_manager.login_view = 'auth.login'
@@ -53,8 +84,9 @@ def create_app(config_class=None):
     # -----------------------------------------------
     @login_manager.user_loader
     def load_user(user_id):
-        from app.models import User
-        return User.query.get(int(user_id))
+        # Cache em memória: evita um SELECT no usuário a cada requisição autenticada
+        from app.utils.usuarios import cache_usuarios
+        return cache_usuarios.obter(int(user_id))
 
     # -----------------------------------------------
     # Registro de Blueprints
@@ -62,7 +94,7 @@ def create_app(config_class=None):
     from app.routes.main import auth_bp
     from app.routes.equipamento import equipamento_bp
     from app.routes.user_api import user_api_bp
-    from app.api.equipamento_ns import api_bp
+    from app.api.equipamento_ns import api_bp  # O Api já traz os namespaces de equipamentos, e-mails e reservas
 
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(equipamento_bp)
@@ -73,6 +105,19 @@ def create_app(config_class=None):
     # Agendar a tarefa diária de verificação de lembretes
     agendar_tarefas_diarias(app)
 
+    # Comando `flask migrar`: aplica as migrações pendentes (para deploys com MIGRAR_AO_INICIAR = False)
+    @app.cli.command('migrar')
+    def migrar():
+        from app.utils.migracoes import aplicar_migracoes
+        aplicar_migracoes()
+
+    # Comando `flask recalcular-resumos`: reconstrói a tabela resumo_diario a partir das reservas
+    @app.cli.command('recalcular-resumos')
+    def recalcular_resumos():
+        from app.utils.resumos import recalcular_tudo
+        with db.engine.begin() as conexao:
+            print(f"Resumos diários recalculados: {recalcular_tudo(conexao)} linhas")
+
     # Rota raiz (index) - Redireciona para o dashboard ou login
     @app.route('/')
     def index():
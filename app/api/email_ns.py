@@ -0,0 +1,31 @@
+# Arquivo: app/api/email_ns.py
+
+from flask_restx import Namespace, Resource, fields
+from app.models import EmailFila
+from app.utils.usuarios import login_api
+
+email_ns = Namespace('emails', description='Status de entrega dos e-mails enviados em segundo plano')
+
+email_model = email_ns.model('EmailFila', {
+    'id': fields.Integer(readonly=True, description='O identificador do e-mail na fila'),
+    'assunto': fields.String(description='Assunto do e-mail'),
+    'status': fields.String(description='pendente, enviando, enviado ou falhou'),
+    'tentativas': fields.Integer(description='Tentativas de envio que falharam'),
+    'ultimo_erro': fields.String(description='Erro da última tentativa'),
+    'data_criacao': fields.DateTime(description='Quando o e-mail entrou na fila'),
+    'data_envio': fields.DateTime(description='Quando o e-mail foi entregue ao servidor SMTP'),
+})
+
+
+@email_ns.route('/<int:id>')
+@email_ns.param('id', 'O identificador do e-mail na fila')
+class EmailStatus(Resource):
+    method_decorators = [login_api]
+
+    @email_ns.doc('get_email_status')
+    @email_ns.marshal_with(email_model)
+    def get(self, id):
+        """
+        Consulta o status de entrega de um e-mail.
+        """
+        return EmailFila.query.get_or_404(id)
@@ -1,16 +1,33 @@
 from flask import Blueprint
-from flask_restx import Namespace, Resource, fields
+from flask_restx import Namespace, Resource, fields, inputs
 from app.models import Equipamento  # Importe seu modelo de Equipamento
+from app.utils.usuarios import login_api
+from app.utils.disponibilidade import indice_disponibilidade
+from app.utils.paginacao import paginar, ler_limite, CursorInvalido
+from app.utils import relatorios, ocupacao, resumos, busca
+from app.utils.cache_http import get_condicional
+from app.utils.serializacao import resposta_json, linhas_para_dicts
+from app import db
+from app.api.email_ns import email_ns
+from app.api.reserva_ns import reserva_ns
 from flask_restx import Api
+from datetime import datetime
+from functools import lru_cache
 import os
 
 
+@lru_cache(maxsize=1)
 def load_readme():
-    """Tenta carregar o conteúdo do README.md na raiz do projeto."""
+    """
+    Tenta carregar o conteúdo do guide.md na raiz do projeto.
+
+    É chamada pelo Flask-RESTX só quando a especificação (/api/swagger.json) é gerada,
+    e não na importação do módulo: o arquivo não é lido na inicialização dos workers.
+    """
     try:
-        # Define o caminho absoluto para o README.md
+        # Define o caminho absoluto para o guide.md
         basedir = os.path.abspath(os.path.dirname(__file__))
-        readme_path = os.path.join(basedir, '..\\..', 'guide.md')
+        readme_path = os.path.join(basedir, '..', '..', 'guide.md')
 
         with open(readme_path, 'r', encoding='utf-8') as f:
             return f.read()
@@ -18,8 +35,6 @@ def load_readme():
         return 'Falha ao carregar o README.md. Verifique se o arquivo existe na raiz do projeto.'
 
 
-api_description_content = load_readme()
-
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
 # Inicializa o Flask-RESTX com o Blueprint
@@ -27,7 +42,7 @@ api = Api(
     api_bp,
     version='1.0',
     title='API de Gerenciamento de Brinquedos/Reservas',
-    description=api_description_content,
+    description=load_readme,  # callable: lido sob demanda (ver load_readme)
     doc='/docs',  # A documentação interativa estará em /api/docs
     license='MIT'
 )
@@ -41,27 +56,204 @@ equipamento_ns = Namespace('equipamentos', description='Operações relacionadas
 equipamento_model = api.model('Equipamento', {
     'id': fields.Integer(readonly=True, description='O identificador único do equipamento'),
     'nome': fields.String(required=True, description='Nome do equipamento'),
-    'categoria': fields.String(description='Categoria do brinquedo'),
-    'valor_diaria': fields.Float(description='Valor da diária de locação'),
-    'status': fields.String(description='Status atual (Disponível, Em Uso, Manutenção)'),
+    'descricao': fields.String(description='Descrição do brinquedo'),
+    'status': fields.String(description='Status atual (disponivel, manutencao)'),
+    'data_cadastro': fields.DateTime(description='Data de cadastro'),
+})
+
+# Colunas que podem ser pedidas em ?fields= (mesmos nomes do equipamento_model)
+CAMPOS_EQUIPAMENTO = {
+    'id': Equipamento.id,
+    'nome': Equipamento.nome,
+    'descricao': Equipamento.descricao,
+    'status': Equipamento.status,
+    'data_cadastro': Equipamento.data_cadastro,
+}
+
+disponibilidade_model = api.model('Disponibilidade', {
+    'inicio': fields.Date(description='Data de início do período'),
+    'fim': fields.Date(description='Data de término do período'),
+    'equipamentos': fields.List(fields.Nested(equipamento_model), description='Equipamentos livres no período'),
 })
 
+# Parâmetros da busca de disponibilidade (o parâmetro pode ser repetido para consultar vários períodos)
+MAX_PERIODOS = 100
+disponibilidade_parser = api.parser()
+disponibilidade_parser.add_argument(
+    'periodo', action='append', required=True, location='args',
+    help='Período no formato AAAA-MM-DD,AAAA-MM-DD (repita o parâmetro para vários períodos)'
+)
+
+# Parâmetros de paginação por cursor (os cursores seguintes vêm nos cabeçalhos X-Proximo-Cursor/X-Cursor-Anterior)
+paginacao_parser = api.parser()
+paginacao_parser.add_argument('cursor', location='args', help='Cursor recebido na resposta anterior')
+paginacao_parser.add_argument('limite', type=int, location='args', help='Itens por página')
+paginacao_parser.add_argument('fields', location='args', help='Campos retornados, separados por vírgula (ex.: id,nome)')
+
+campos_parser = api.parser()
+campos_parser.add_argument('fields', location='args', help='Campos retornados, separados por vírgula (ex.: id,nome)')
+
+ranking_cliente_model = api.model('RankingCliente', {
+    'cliente_nome': fields.String(description='Nome do cliente'),
+    'total': fields.Integer(description='Quantidade de reservas'),
+})
+
+ranking_equipamento_model = api.model('RankingEquipamento', {
+    'id': fields.Integer(description='O identificador do equipamento'),
+    'nome': fields.String(description='Nome do equipamento'),
+    'total': fields.Integer(description='Quantidade de reservas'),
+})
+
+rankings_model = api.model('Rankings', {
+    'periodo': fields.Integer(description='Janela em dias (nulo = todo o histórico)'),
+    'resumo': fields.Raw(description='Totais de reservas, dias, clientes e equipamentos'),
+    'top_clientes': fields.List(fields.Nested(ranking_cliente_model)),
+    'top_equipamentos': fields.List(fields.Nested(ranking_equipamento_model)),
+})
+
+rankings_parser = api.parser()
+rankings_parser.add_argument('periodo', type=int, location='args', choices=relatorios.PERIODOS_VALIDOS,
+                             help='Últimos 30, 90 ou 365 dias (omita para todo o histórico)')
+rankings_parser.add_argument('limite', type=int, default=5, location='args', help='Tamanho de cada ranking')
+
+# Grade de ocupação (calendário): período de até OCUPACAO_MAX_DIAS dias
+OCUPACAO_MAX_DIAS = 366
+ocupacao_parser = api.parser()
+ocupacao_parser.add_argument('inicio', required=True, location='args', help='Primeiro dia (AAAA-MM-DD)')
+ocupacao_parser.add_argument('fim', required=True, location='args', help='Último dia (AAAA-MM-DD)')
+ocupacao_parser.add_argument('formato', default='rle', choices=ocupacao.FORMATOS, location='args',
+                             help='rle: [dia, dias, reservas] por trecho ocupado; bitset: 1 bit por dia em base64')
+ocupacao_parser.add_argument('finalizadas', type=inputs.boolean, default=False, location='args',
+                             help='Incluir reservas finalizadas (histórico)')
+
+# Busca textual (FTS5 com ranking; LIKE quando o índice não existe)
+busca_parser = api.parser()
+busca_parser.add_argument('q', required=True, location='args', help='Texto buscado (cada palavra vale como prefixo)')
+busca_parser.add_argument('pagina', type=int, default=1, location='args', help='Página (a partir de 1)')
+busca_parser.add_argument('limite', type=int, location='args', help='Itens por página')
+
+# Análises de utilização (lidas da tabela resumo_diario): mesmo limite de período da grade
+analise_parser = api.parser()
+analise_parser.add_argument('inicio', required=True, location='args', help='Primeiro dia (AAAA-MM-DD)')
+analise_parser.add_argument('fim', required=True, location='args', help='Último dia (AAAA-MM-DD)')
+
 api.add_namespace(equipamento_ns)
+# Os demais namespaces são registrados aqui, uma única vez, junto da definição do Api
+api.add_namespace(email_ns)
+api.add_namespace(reserva_ns)
 # 3. Definição do Resource (A Rota)
 # Esta classe herda de Resource e define os métodos HTTP (GET, POST, etc.)
+def _ler_campos(valor):
+    """Lê o ?fields= e retorna os nomes pedidos (todos, se ausente), na ordem do equipamento_model."""
+    if not valor:
+        return list(CAMPOS_EQUIPAMENTO)
+    pedidos = {campo.strip() for campo in valor.split(',') if campo.strip()}
+    invalidos = pedidos - CAMPOS_EQUIPAMENTO.keys()
+    if invalidos or not pedidos:
+        api.abort(400, f'Campos inválidos: {", ".join(sorted(invalidos)) or "(vazio)"}. '
+                       f'Disponíveis: {", ".join(CAMPOS_EQUIPAMENTO)}.')
+    return [campo for campo in CAMPOS_EQUIPAMENTO if campo in pedidos]
+
+
+def _consulta_campos(campos):
+    """SELECT só das colunas pedidas; o id entra no fim quando não foi pedido (chave da paginação)."""
+    colunas = [CAMPOS_EQUIPAMENTO[campo] for campo in campos]
+    if 'id' not in campos:
+        colunas.append(Equipamento.id)
+    return db.session.query(*colunas)
+
+
 @api.route('/equipamentos')
 class EquipamentoList(Resource):
     @api.doc('list_equipamentos')
-    @api.marshal_list_with(equipamento_model)
+    @api.expect(paginacao_parser)
+    @api.response(200, 'Sucesso', [equipamento_model])
+    @api.response(304, 'Não modificado desde o ETag/Last-Modified informado')
+    @get_condicional('equipamento')
+    def get(self):
+        """
+        Lista os equipamentos, uma página por vez.
+
+        Use ?fields=id,nome para receber (e consultar no banco) apenas essas colunas.
+        """
+        args = paginacao_parser.parse_args()
+        campos = _ler_campos(args['fields'])
+        try:
+            # Consulta só as colunas pedidas: as linhas vêm como tuplas, sem montar objetos do ORM
+            pagina = paginar(_consulta_campos(campos), [Equipamento.id], args['cursor'], ler_limite(args['limite']))
+        except CursorInvalido as e:
+            api.abort(400, str(e))
+
+        # Serialização direta das tuplas (orjson), sem o marshal campo a campo do Flask-RESTX
+        return resposta_json(linhas_para_dicts(pagina.itens, campos), 200, pagina.cabecalhos())
+
+
+def _ler_periodo(valor):
+    """Converte 'AAAA-MM-DD,AAAA-MM-DD' em um par de datas."""
+    try:
+        inicio_str, fim_str = valor.split(',')
+        inicio = datetime.strptime(inicio_str.strip(), '%Y-%m-%d').date()
+        fim = datetime.strptime(fim_str.strip(), '%Y-%m-%d').date()
+    except ValueError:
+        api.abort(400, f'Período inválido: "{valor}". Use o formato AAAA-MM-DD,AAAA-MM-DD.')
+    if inicio > fim:
+        api.abort(400, f'Período inválido: "{valor}". A data de início é posterior à de término.')
+    return inicio, fim
+
+
+@api.route('/equipamentos/busca')
+class EquipamentoBusca(Resource):
+    @api.doc('buscar_equipamentos')
+    @api.expect(busca_parser)
+    @api.response(304, 'Não modificado desde o ETag/Last-Modified informado')
+    @get_condicional('equipamento')
     def get(self):
         """
-        Lista todos os equipamentos disponíveis.
+        Busca equipamentos por nome e descrição, dos mais relevantes para os menos.
+
+        Retorna só a página pedida (`pagina`/`limite`); `proxima` é nula na última página.
         """
-        # Consulta ao banco de dados usando o modelo
-        equipamentos = Equipamento.query.all()
+        args = busca_parser.parse_args()
+        termos = busca.termos_busca(args['q'])
+        if not termos:
+            api.abort(400, 'Informe ao menos uma palavra para buscar.')
+        pagina, limite = max(1, args['pagina']), ler_limite(args['limite'])
+        linhas, ha_mais = busca.buscar_equipamentos(termos, pagina, limite)
+        return resposta_json({
+            'pagina': pagina,
+            'proxima': pagina + 1 if ha_mais else None,
+            'itens': linhas_para_dicts(linhas, ['id', 'nome', 'descricao', 'status']),
+        })
 
-        # O marshal_list_with converte a lista de objetos SQLAlchemy em JSON
-        return equipamentos
+
+@api.route('/equipamentos/disponiveis')
+class EquipamentoDisponibilidade(Resource):
+    @api.doc('buscar_disponiveis')
+    @api.expect(disponibilidade_parser)
+    @api.marshal_list_with(disponibilidade_model)
+    def get(self):
+        """
+        Lista os equipamentos livres em um ou mais períodos.
+
+        Usa uma única consulta de equipamentos; os conflitos são verificados no índice em memória.
+        """
+        args = disponibilidade_parser.parse_args()
+        if len(args['periodo']) > MAX_PERIODOS:
+            api.abort(400, f'No máximo {MAX_PERIODOS} períodos por requisição.')
+        periodos = [_ler_periodo(valor) for valor in args['periodo']]
+
+        equipamentos = Equipamento.query.filter(Equipamento.status != 'manutencao').order_by(Equipamento.nome).all()
+        por_id = {equipamento.id: equipamento for equipamento in equipamentos}
+
+        resultado = []
+        for inicio, fim in periodos:
+            livres = indice_disponibilidade.filtrar_disponiveis(por_id.keys(), inicio, fim)
+            resultado.append({
+                'inicio': inicio,
+                'fim': fim,
+                'equipamentos': [por_id[equipamento_id] for equipamento_id in livres]
+            })
+        return resultado
 
 
 # Opcional: Endpoint para um único equipamento (Busca por ID)
@@ -69,10 +261,128 @@ class EquipamentoList(Resource):
 @api.param('id', 'O identificador do equipamento')
 class EquipamentoDetail(Resource):
     @api.doc('get_equipamento')
-    @api.marshal_with(equipamento_model)
+    @api.expect(campos_parser)
+    @api.response(200, 'Sucesso', equipamento_model)
+    @api.response(304, 'Não modificado desde o ETag/Last-Modified informado')
+    @get_condicional('equipamento')
     def get(self, id):
         """
-        Obtém os detalhes de um equipamento específico.
+        Obtém os detalhes de um equipamento específico (aceita ?fields=).
+        """
+        campos = _ler_campos(campos_parser.parse_args()['fields'])
+        linha = _consulta_campos(campos).filter(Equipamento.id == id).first()
+        if linha is None:
+            api.abort(404, f'Equipamento {id} não encontrado.')
+        return resposta_json(linhas_para_dicts([linha], campos)[0])
+
+@api.route('/relatorios/rankings')
+class Rankings(Resource):
+    method_decorators = [login_api]  # Dados de clientes e de uso: só para usuários logados
+
+    @api.doc('get_rankings')
+    @api.expect(rankings_parser)
+    @api.marshal_with(rankings_model)
+    def get(self):
+        """
+        Clientes mais ativos e equipamentos mais reservados (calculados com GROUP BY).
+        """
+        args = rankings_parser.parse_args()
+        periodo = args['periodo']
+        limite = max(1, min(args['limite'], 50))
+        return {
+            'periodo': periodo,
+            'resumo': relatorios.resumo_reservas(periodo),
+            'top_clientes': [
+                {'cliente_nome': nome, 'total': total}
+                for nome, total in relatorios.top_clientes(limite, periodo)
+            ],
+            'top_equipamentos': [
+                {'id': equipamento_id, 'nome': nome, 'total': total}
+                for equipamento_id, nome, total in relatorios.top_equipamentos(limite, periodo)
+            ],
+        }
+
+
+@api.route('/relatorios/ocupacao')
+class Ocupacao(Resource):
+    method_decorators = [login_api]
+
+    @api.doc('get_ocupacao')
+    @api.expect(ocupacao_parser)
+    @api.response(304, 'Não modificado desde o ETag/Last-Modified informado')
+    @api.response(501, 'NumPy não instalado no servidor')
+    @get_condicional('equipamento', 'reserva')
+    def get(self):
+        """
+        Grade de ocupação equipamento × dia, para a visão de calendário.
+
+        Uma consulta de equipamentos e uma de reservas; a grade é montada com NumPy.
+        """
+        if not ocupacao.numpy_disponivel():
+            api.abort(501, 'A grade de ocupação requer o pacote numpy.')
+        args = ocupacao_parser.parse_args()
+        inicio, fim = _ler_periodo(f"{args['inicio']},{args['fim']}")
+        if (fim - inicio).days + 1 > OCUPACAO_MAX_DIAS:
+            api.abort(400, f'O período pode ter no máximo {OCUPACAO_MAX_DIAS} dias.')
+        return resposta_json(ocupacao.ocupacao(inicio, fim, args['formato'], args['finalizadas']))
+
+
+def _periodo_analise():
+    args = analise_parser.parse_args()
+    inicio, fim = _ler_periodo(f"{args['inicio']},{args['fim']}")
+    if (fim - inicio).days + 1 > OCUPACAO_MAX_DIAS:
+        api.abort(400, f'O período pode ter no máximo {OCUPACAO_MAX_DIAS} dias.')
+    return inicio, fim
+
+
+@api.route('/relatorios/utilizacao')
+class Utilizacao(Resource):
+    method_decorators = [login_api]
+
+    @api.doc('get_utilizacao')
+    @api.expect(analise_parser)
+    @api.response(304, 'Não modificado desde o ETag/Last-Modified informado')
+    @get_condicional('equipamento', 'reserva')
+    def get(self):
+        """
+        Dias ocupados, reservas iniciadas e % de utilização de cada equipamento no período.
+        """
+        inicio, fim = _periodo_analise()
+        return resposta_json({
+            'inicio': inicio.isoformat(),
+            'fim': fim.isoformat(),
+            'dias': (fim - inicio).days + 1,
+            'equipamentos': resumos.utilizacao(inicio, fim),
+        })
+
+
+@api.route('/relatorios/dias-semana')
+class DiasSemana(Resource):
+    method_decorators = [login_api]
+
+    @api.doc('get_dias_semana')
+    @api.expect(analise_parser)
+    @api.response(304, 'Não modificado desde o ETag/Last-Modified informado')
+    @get_condicional('equipamento', 'reserva')
+    def get(self):
+        """
+        Dias da semana mais movimentados (equipamentos-dia ocupados, reservas iniciadas e clientes).
+        """
+        inicio, fim = _periodo_analise()
+        return resposta_json(resumos.dias_semana(inicio, fim))
+
+
+@api.route('/relatorios/ociosos')
+class Ociosos(Resource):
+    method_decorators = [login_api]
+
+    @api.doc('get_ociosos')
+    @api.expect(analise_parser)
+    @api.response(304, 'Não modificado desde o ETag/Last-Modified informado')
+    @get_condicional('equipamento', 'reserva')
+    def get(self):
+        """
+        Equipamentos sem nenhuma reserva no período.
         """
-        equipamento = Equipamento.query.get_or_404(id)
-        return equipamento
\ No newline at end of file
+        inicio, fim = _periodo_analise()
+        return resposta_json(resumos.ociosos(inicio, fim))
@@ -0,0 +1,174 @@
+# Arquivo: app/api/reserva_ns.py
+
+from flask import current_app
+from flask_login import current_user
+from flask_restx import Namespace, Resource, fields
+from app.models import Reserva
+from app.utils.usuarios import login_api
+from app.utils.paginacao import paginar, ler_limite, CursorInvalido
+from app.utils import reservas_lote, busca
+
+reserva_ns = Namespace('reservas', description='Reservas: consulta, criação em lote, finalização e exclusão em lote')
+
+reserva_model = reserva_ns.model('Reserva', {
+    'id': fields.Integer(readonly=True, description='O identificador da reserva'),
+    'equipamento_id': fields.Integer(description='O identificador do equipamento'),
+    'cliente_nome': fields.String(description='Nome do cliente'),
+    'cliente_contato': fields.String(description='E-mail do cliente'),
+    'data_inicio': fields.Date(description='Primeiro dia da reserva'),
+    'data_fim': fields.Date(description='Último dia da reserva'),
+    'finalizada': fields.Boolean(description='Se a reserva já foi finalizada'),
+    'data_criacao': fields.DateTime(description='Quando a reserva foi registrada'),
+})
+
+nova_reserva_model = reserva_ns.model('NovaReserva', {
+    'equipamento_id': fields.Integer(required=True, description='O identificador do equipamento'),
+    'cliente_nome': fields.String(required=True, description='Nome do cliente'),
+    'cliente_contato': fields.String(description='E-mail do cliente (opcional)'),
+    'data_inicio': fields.String(required=True, description='AAAA-MM-DD'),
+    'data_fim': fields.String(required=True, description='AAAA-MM-DD'),
+})
+
+ids_model = reserva_ns.model('IdsReservas', {
+    'ids': fields.List(fields.Integer, required=True, description='Ids das reservas'),
+})
+
+resultado_lote_model = reserva_ns.model('ResultadoLote', {
+    'ids': fields.List(fields.Integer, description='Ids das reservas processadas'),
+    'ignorados': fields.List(fields.Integer, description='Ids inexistentes ou que não precisavam de alteração'),
+})
+
+busca_model = reserva_ns.model('BuscaReservas', {
+    'pagina': fields.Integer(description='Página retornada'),
+    'proxima': fields.Integer(description='Próxima página (nula na última)'),
+    'itens': fields.List(fields.Nested(reserva_model)),
+})
+
+busca_parser = reserva_ns.parser()
+busca_parser.add_argument('q', required=True, location='args', help='Nome ou contato do cliente (prefixos)')
+busca_parser.add_argument('pagina', type=int, default=1, location='args', help='Página (a partir de 1)')
+busca_parser.add_argument('limite', type=int, location='args', help='Itens por página')
+
+paginacao_parser = reserva_ns.parser()
+paginacao_parser.add_argument('cursor', location='args', help='Cursor recebido na resposta anterior')
+paginacao_parser.add_argument('limite', type=int, location='args', help='Itens por página')
+
+
+def _limite_lote(quantidade):
+    maximo = current_app.config.get('RESERVAS_LOTE_MAXIMO', 1000)
+    if quantidade == 0:
+        reserva_ns.abort(400, 'O lote está vazio.')
+    if quantidade > maximo:
+        reserva_ns.abort(400, f'No máximo {maximo} reservas por requisição.')
+
+
+def _ids_do_corpo():
+    ids = sorted(set(reserva_ns.payload['ids']))
+    _limite_lote(len(ids))
+    return ids
+
+
+@reserva_ns.route('')
+class ReservaList(Resource):
+    method_decorators = [login_api]
+
+    @reserva_ns.doc('list_reservas')
+    @reserva_ns.expect(paginacao_parser)
+    @reserva_ns.marshal_list_with(reserva_model)
+    def get(self):
+        """
+        Lista as reservas por data de início, uma página por vez.
+        """
+        args = paginacao_parser.parse_args()
+        try:
+            pagina = paginar(Reserva.query, [Reserva.data_inicio, Reserva.id], args['cursor'], ler_limite(args['limite']))
+        except CursorInvalido as e:
+            reserva_ns.abort(400, str(e))
+        return pagina.itens, 200, pagina.cabecalhos()
+
+    @reserva_ns.doc('create_reservas')
+    @reserva_ns.expect([nova_reserva_model], validate=True)
+    @reserva_ns.response(201, 'Reservas criadas (ids na ordem do lote)')
+    @reserva_ns.response(409, 'Lote rejeitado: nenhuma reserva foi criada')
+    def post(self):
+        """
+        Cria um lote de reservas (tudo ou nada).
+
+        Todos os conflitos (com reservas existentes e entre itens do lote) são
+        verificados antes de gravar; as reservas são inseridas em uma única transação.
+        """
+        itens = reserva_ns.payload
+        _limite_lote(len(itens))
+        try:
+            ids = reservas_lote.inserir_lote(itens)
+        except reservas_lote.ErroLote as e:
+            return {'message': str(e), 'erros': e.erros}, 409
+        return {'ids': ids}, 201
+
+
+@reserva_ns.route('/busca')
+class ReservaBusca(Resource):
+    method_decorators = [login_api]
+
+    @reserva_ns.doc('buscar_reservas')
+    @reserva_ns.expect(busca_parser)
+    @reserva_ns.marshal_with(busca_model)
+    def get(self):
+        """
+        Busca reservas pelo nome ou contato do cliente, das mais relevantes para as menos.
+        """
+        args = busca_parser.parse_args()
+        termos = busca.termos_busca(args['q'])
+        if not termos:
+            reserva_ns.abort(400, 'Informe ao menos uma palavra para buscar.')
+        pagina, limite = max(1, args['pagina']), ler_limite(args['limite'])
+        linhas, ha_mais = busca.buscar_reservas(termos, pagina, limite)
+        return {'pagina': pagina, 'proxima': pagina + 1 if ha_mais else None, 'itens': linhas}
+
+
+@reserva_ns.route('/<int:id>')
+@reserva_ns.param('id', 'O identificador da reserva')
+class ReservaDetail(Resource):
+    method_decorators = [login_api]
+
+    @reserva_ns.doc('get_reserva')
+    @reserva_ns.marshal_with(reserva_model)
+    def get(self, id):
+        """
+        Obtém uma reserva.
+        """
+        return Reserva.query.get_or_404(id)
+
+
+@reserva_ns.route('/finalizar')
+class ReservaFinalizarLote(Resource):
+    method_decorators = [login_api]
+
+    @reserva_ns.doc('finalizar_reservas')
+    @reserva_ns.expect(ids_model, validate=True)
+    @reserva_ns.marshal_with(resultado_lote_model)
+    def post(self):
+        """
+        Finaliza várias reservas de uma vez (as já finalizadas são ignoradas).
+        """
+        ids = _ids_do_corpo()
+        finalizadas = reservas_lote.finalizar_lote(ids)
+        return {'ids': finalizadas, 'ignorados': sorted(set(ids) - set(finalizadas))}
+
+
+@reserva_ns.route('/excluir')
+class ReservaExcluirLote(Resource):
+    method_decorators = [login_api]
+
+    @reserva_ns.doc('excluir_reservas')
+    @reserva_ns.expect(ids_model, validate=True)
+    @reserva_ns.marshal_with(resultado_lote_model)
+    def post(self):
+        """
+        Exclui várias reservas de uma vez (somente administradores).
+        """
+        if not current_user.is_admin:
+            reserva_ns.abort(403, 'Acesso negado: Somente administradores podem excluir reservas.')
+        ids = _ids_do_corpo()
+        excluidas = reservas_lote.excluir_lote(ids)
+        return {'ids': excluidas, 'ignorados': sorted(set(ids) - set(excluidas))}
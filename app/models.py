@@ -1,9 +1,12 @@
 # Arquivo: app/models.py
 
-from app import db, bcrypt
+from app import db
 from flask_login import UserMixin
-from datetime import datetime, timedelta
+from datetime import datetime
 from sqlalchemy.ext.hybrid import hybrid_property
+from app.utils.disponibilidade import indice_disponibilidade
+from app.utils import versoes  # noqa: F401 - registra o contador de versão das tabelas
+from app.utils import senhas
 
 
 # -----------------------------------------------
@@ -18,10 +21,15 @@ class User(db.Model, UserMixin):
     is_admin = db.Column(db.Boolean, default=False)
 
     def set_password(self, password):
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        # O bcrypt roda no pool limitado de app.utils.senhas (custo em BCRYPT_LOG_ROUNDS)
+        self.password_hash = senhas.gerar_hash(password)
 
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return senhas.verificar(self.password_hash, password)
+
+    def senha_precisa_rehash(self):
+        """O hash foi gerado com outro custo (BCRYPT_LOG_ROUNDS mudou desde o último login)?"""
+        return senhas.precisa_rehash(self.password_hash)
 
     def to_dict(self):
         return {
@@ -42,18 +50,18 @@ class Equipamento(db.Model):
     descricao = db.Column(db.Text)
     status = db.Column(db.String(20), default='disponivel')  # disponivel, manutencao
     data_cadastro = db.Column(db.DateTime, default=datetime.utcnow)
+    # Incrementada a cada nova reserva (compare-and-swap em app/utils/concorrencia.py)
+    versao = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     reservas = db.relationship('Reserva', backref='equipamento', lazy=True)
 
     def esta_disponivel(self, data_inicio, data_fim):
-        """Verifica se há conflito de reservas para o período."""
-        conflitos = Reserva.query.filter_by(equipamento_id=self.id).filter(
-            db.or_(
-                Reserva.data_inicio.between(data_inicio, data_fim - timedelta(seconds=1)),
-                Reserva.data_fim.between(data_inicio + timedelta(seconds=1), data_fim)
-            )
-        ).first()
-        return conflitos is None
+        """Verifica se há conflito de reservas para o período (consulta o índice em memória)."""
+        return indice_disponibilidade.esta_disponivel(self.id, data_inicio, data_fim)
+
+    def reservas_conflitantes(self, data_inicio, data_fim):
+        """Ids das reservas ativas que cruzam o período."""
+        return indice_disponibilidade.reservas_sobrepostas(self.id, data_inicio, data_fim)
 
     def to_dict(self):
         return {
@@ -70,6 +78,15 @@ class Equipamento(db.Model):
 # -----------------------------------------------
 class Reserva(db.Model):
     __tablename__ = 'reserva'
+    __table_args__ = (
+        # Checagem de conflitos e relatórios por equipamento/período
+        db.Index('ix_reserva_equipamento_periodo', 'equipamento_id', 'data_inicio', 'data_fim'),
+        # Dashboard (finalizada=False ordenado por data_inicio)
+        db.Index('ix_reserva_finalizada_inicio', 'finalizada', 'data_inicio'),
+        # Lembretes (data_inicio == amanhã), filtro do relatório PDF e paginação por data_inicio/id
+        db.Index('ix_reserva_data_inicio', 'data_inicio'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     equipamento_id = db.Column(db.Integer, db.ForeignKey('equipamento.id'), nullable=False)
     cliente_nome = db.Column(db.String(100), nullable=False)
@@ -100,4 +117,76 @@ class Reserva(db.Model):
             'data_inicio': self.data_inicio.isoformat(),
             'data_fim': self.data_fim.isoformat(),
             'finalizada': self.finalizada
-        }
\ No newline at end of file
+        }
+
+# -----------------------------------------------
+# MODELO DA FILA DE E-MAILS
+# -----------------------------------------------
+class EmailFila(db.Model):
+    __tablename__ = 'email_fila'
+    __table_args__ = (
+        db.Index('ix_email_fila_status_proxima', 'status', 'proxima_tentativa'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    assunto = db.Column(db.String(255), nullable=False)
+    destinatarios = db.Column(db.Text, nullable=False)  # separados por vírgula
+    corpo_html = db.Column(db.Text, nullable=False)
+    corpo_texto = db.Column(db.Text)  # alternativa em texto puro (multipart)
+    status = db.Column(db.String(20), nullable=False, default='pendente')  # pendente, enviando, enviado, falhou
+    tentativas = db.Column(db.Integer, nullable=False, default=0)
+    ultimo_erro = db.Column(db.Text)
+    proxima_tentativa = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    reservado_em = db.Column(db.DateTime)  # quando um worker pegou a mensagem para envio
+    data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
+    data_envio = db.Column(db.DateTime)
+
+    @property
+    def lista_destinatarios(self):
+        return [d.strip() for d in self.destinatarios.split(',') if d.strip()]
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'assunto': self.assunto,
+            'status': self.status,
+            'tentativas': self.tentativas,
+            'ultimo_erro': self.ultimo_erro,
+            'data_criacao': self.data_criacao.isoformat() if self.data_criacao else None,
+            'data_envio': self.data_envio.isoformat() if self.data_envio else None
+        }
+
+
+# -----------------------------------------------
+# VERSÃO DOS DADOS (contador por tabela, usado em caches e ETags)
+# -----------------------------------------------
+class VersaoTabela(db.Model):
+    __tablename__ = 'versao_tabela'
+    tabela = db.Column(db.String(50), primary_key=True)
+    versao = db.Column(db.Integer, nullable=False, default=0)
+    atualizado_em = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+# -----------------------------------------------
+# RESUMO DIÁRIO (ocupação por equipamento e dia, mantido a cada commit de reservas)
+# -----------------------------------------------
+class ResumoDiario(db.Model):
+    __tablename__ = 'resumo_diario'
+    __table_args__ = (
+        # Consultas por período sobre todos os equipamentos
+        db.Index('ix_resumo_diario_dia', 'dia'),
+    )
+    equipamento_id = db.Column(db.Integer, db.ForeignKey('equipamento.id'), primary_key=True)
+    dia = db.Column(db.Date, primary_key=True)
+    reservas = db.Column(db.Integer, nullable=False)  # reservas que ocupam o dia (> 0: dia ocupado)
+    inicios = db.Column(db.Integer, nullable=False)   # reservas que começam no dia
+    clientes = db.Column(db.Integer, nullable=False)  # clientes distintos no dia
+
+
+# -----------------------------------------------
+# LIDERANÇA DO AGENDADOR (um único processo executa as tarefas agendadas)
+# -----------------------------------------------
+class LiderAgendador(db.Model):
+    __tablename__ = 'lider_agendador'
+    nome = db.Column(db.String(50), primary_key=True)
+    dono = db.Column(db.String(200), nullable=False)  # host:pid:token do processo líder
+    expira_em = db.Column(db.DateTime, nullable=False)
@@ -1,13 +1,19 @@
 # Arquivo: app/routes/equipamento.py
 
-from flask import Blueprint, render_template, flash, redirect, url_for, request, abort, make_response
+from flask import Blueprint, render_template, flash, redirect, url_for, request, abort, jsonify, send_file, current_app, \
+    Response, stream_with_context
 from flask_login import login_required, current_user
 from app.models import Equipamento, Reserva, db, User
 from datetime import datetime, timedelta
-from xhtml2pdf import pisa
-import io # Para manipular o arquivo PDF em memória
+from sqlalchemy.orm import joinedload, selectinload
 from ..models import Reserva, Equipamento
 from app.utils.email_tasks import send_confirmation_email
+from app.utils.paginacao import paginar, ler_limite, CursorInvalido
+from app.utils import relatorios
+from app.utils.cache_dashboard import cache_dashboard
+from app.utils import relatorios_pdf
+from app.utils import exportacao
+from app.utils.concorrencia import criar_reserva, ReservaConflitante
 
 equipamento_bp = Blueprint('equipamento', __name__, template_folder='../templates')
 
@@ -35,24 +41,48 @@ def requires_admin(f):
 @equipamento_bp.route('/dashboard')
 @login_required
 def dashboard():
-    total_equipamentos = Equipamento.query.count()
-    equipamentos_disponiveis = Equipamento.query.filter_by(status='disponivel').all()
-    reservas_ativas = Reserva.query.filter_by(finalizada=False).all()
+    # Página mais acessada: as estatísticas vêm do cache (invalidado a cada commit de equipamentos/reservas)
+    estatisticas = cache_dashboard.obter()
+    return render_template('index.html', **estatisticas)
 
-    ultimas_reservas = Reserva.query.filter_by(finalizada=False).order_by(Reserva.data_inicio).limit(5).all()
 
-    return render_template('index.html',
-                           total_equipamentos=total_equipamentos,
-                           equipamentos_disponiveis=equipamentos_disponiveis,
-                           reservas_ativas=reservas_ativas,
-                           ultimas_reservas=ultimas_reservas)
+def _padrao_like(texto):
+    """'%texto%' com os curingas do LIKE escapados (usar com escape='\\')."""
+    return '%' + texto.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def _filtros_equipamentos():
+    """Filtros da listagem vindos da query string (mantidos nos links de paginação)."""
+    filtros = {}
+    if request.args.get('status') in ('disponivel', 'reservado', 'manutencao'):
+        filtros['status'] = request.args['status']
+    if request.args.get('nome', '').strip():
+        filtros['nome'] = request.args['nome'].strip()
+    return filtros
 
 
 @equipamento_bp.route('/equipamentos')
 @login_required
 def listar_equipamentos():
-    equipamentos = Equipamento.query.all()
-    return render_template('equipamentos.html', equipamentos=equipamentos)
+    # Os filtros são aplicados no banco, antes da paginação (a página só tem parte dos equipamentos)
+    filtros = _filtros_equipamentos()
+    query = Equipamento.query.options(selectinload(Equipamento.reservas))
+    if 'status' in filtros:
+        query = query.filter(Equipamento.status == filtros['status'])
+    if 'nome' in filtros:
+        query = query.filter(Equipamento.nome.ilike(_padrao_like(filtros['nome']), escape='\\'))
+    try:
+        equipamentos = paginar(query, [Equipamento.id], request.args.get('cursor'), ler_limite(request.args.get('limite')))
+    except CursorInvalido:
+        flash('Link de paginação inválido. Exibindo a primeira página.', 'warning')
+        return redirect(url_for('equipamento.listar_equipamentos', **filtros))
+
+    # Totais por status calculados no banco (a página só contém uma parte dos equipamentos)
+    contagem_status = dict(db.session.query(Equipamento.status, db.func.count(Equipamento.id))
+                           .group_by(Equipamento.status).all())
+    return render_template('equipamentos.html', equipamentos=equipamentos, filtros=filtros,
+                           total_equipamentos=sum(contagem_status.values()),
+                           contagem_status=contagem_status)
 
 
 # -----------------------------------------------
@@ -96,12 +126,67 @@ def excluir_equipamento(equipamento_id):
 # ROTAS DE RESERVA (CRUD)
 # -----------------------------------------------
 
+def _filtros_reservas():
+    """Filtros da listagem vindos da query string (mantidos nos links de paginação)."""
+    filtros = {}
+    for campo in ('cliente', 'equipamento'):
+        if request.args.get(campo, '').strip():
+            filtros[campo] = request.args[campo].strip()
+    mes = request.args.get('mes', type=int)
+    if mes and 1 <= mes <= 12:
+        filtros['mes'] = mes
+    ano = request.args.get('ano', type=int)
+    if ano and 1900 <= ano <= 9999:
+        filtros['ano'] = ano
+    return filtros
+
+
+def _filtrar_reservas(query, filtros):
+    if 'cliente' in filtros:
+        query = query.filter(Reserva.cliente_nome.ilike(_padrao_like(filtros['cliente']), escape='\\'))
+    if 'equipamento' in filtros:
+        query = query.filter(Reserva.equipamento_id.in_(
+            db.select(Equipamento.id).where(Equipamento.nome.ilike(_padrao_like(filtros['equipamento']), escape='\\'))
+        ))
+    # Mês/ano pela data de início; com o ano informado vira um intervalo (usa o índice de data_inicio)
+    mes, ano = filtros.get('mes'), filtros.get('ano')
+    if ano:
+        inicio = datetime(ano, mes or 1, 1)
+        if mes:
+            fim = datetime(ano + (mes == 12), mes % 12 + 1, 1)
+        else:
+            fim = datetime(ano + 1, 1, 1)
+        query = query.filter(Reserva.data_inicio >= inicio, Reserva.data_inicio < fim)
+    elif mes:
+        query = query.filter(db.extract('month', Reserva.data_inicio) == mes)
+    return query
+
+
 @equipamento_bp.route('/reservas')
 @login_required
 def reservas():
-    reservas = Reserva.query.all()
+    # joinedload traz o equipamento de cada reserva na mesma consulta (evita uma consulta por linha no template)
+    filtros = _filtros_reservas()
+    query = _filtrar_reservas(Reserva.query.options(joinedload(Reserva.equipamento)), filtros)
+    try:
+        reservas = paginar(query, [Reserva.data_inicio, Reserva.id], request.args.get('cursor'),
+                           ler_limite(request.args.get('limite')))
+    except CursorInvalido:
+        flash('Link de paginação inválido. Exibindo a primeira página.', 'warning')
+        return redirect(url_for('equipamento.reservas', **filtros))
+
+    # Estatísticas e rankings agregados no banco (GROUP BY), sem percorrer as reservas no template
+    periodo = relatorios.ler_periodo(request.args.get('periodo'))
+    resumo = relatorios.resumo_reservas()
+    resumo_periodo = relatorios.resumo_reservas(periodo) if periodo else resumo
+
     # Para o template reservas.html, o nome da função que calcula a duração é necessário
-    return render_template('reservas.html', reservas=reservas, duracao_dias=Reserva.duracao_dias)
+    return render_template('reservas.html', reservas=reservas, filtros=filtros, total_reservas=resumo['total_reservas'],
+                           resumo=resumo_periodo,
+                           top_clientes=relatorios.top_clientes(dias=periodo),
+                           top_equipamentos=relatorios.top_equipamentos(dias=periodo),
+                           periodo=periodo, periodos=relatorios.PERIODOS_VALIDOS,
+                           duracao_dias=Reserva.duracao_dias)
 
 
 @equipamento_bp.route('/reservas/nova', methods=['GET', 'POST'])
@@ -131,27 +216,29 @@ def nova_reserva():
             flash(f'O equipamento "{equipamento.nome}" não está disponível no período solicitado.', 'danger')
             return redirect(url_for('equipamento.nova_reserva'))
 
-        nova_reserva = Reserva(
-            equipamento_id=equipamento.id,
-            cliente_nome=cliente_nome,
-            cliente_contato=cliente_contato,
-            data_inicio=data_inicio,
-            data_fim=data_fim
-        )
-
-        db.session.add(nova_reserva)
-        db.session.commit()
+        try:
+            # A checagem acima (índice em memória) só descarta os conflitos óbvios; a definitiva
+            # é feita no banco com o equipamento travado, para dois pedidos simultâneos não passarem
+            nova_reserva = criar_reserva(equipamento.id, cliente_nome, cliente_contato, data_inicio, data_fim)
+        except ReservaConflitante as e:
+            if e.conflitos:
+                flash(f'O equipamento "{equipamento.nome}" não está disponível no período solicitado.', 'danger')
+            else:
+                flash(str(e), 'danger')
+            return redirect(url_for('equipamento.nova_reserva'))
 
         flash(f'Reserva de "{equipamento.nome}" para {cliente_nome} criada com sucesso!', 'success')
 
         try:
-            send_confirmation_email(nova_reserva)
-            flash(f'E-mail de confirmação enviado para o cliente: {nova_reserva.cliente_contato}', 'info')
+            # O envio (SMTP) acontece em segundo plano; aqui o e-mail só é gravado na fila
+            email = send_confirmation_email(nova_reserva)
+            if email:
+                flash(f'E-mail de confirmação para {nova_reserva.cliente_contato} na fila de envio (#{email.id}).', 'info')
         except Exception as e:
             # Loga o erro, mas não impede o fluxo do usuário
-            flash(f'Falha ao enviar e-mail de confirmação (erro: {e}). Verifique as configurações de e-mail.',
-                  'warning')
-            print(f"Falha ao enviar e-mail de confirmação: {e}")
+            db.session.rollback()
+            flash(f'Falha ao enfileirar e-mail de confirmação (erro: {e}).', 'warning')
+            print(f"Falha ao enfileirar e-mail de confirmação: {e}")
 
 
         return redirect(url_for('equipamento.reservas'))
@@ -190,118 +277,141 @@ def excluir_reserva(reserva_id):
     return redirect(url_for('equipamento.reservas'))
 
 
-def render_to_pdf(template_src, context_dict={}):
-    """Converte um template Jinja2 renderizado para um objeto PDF."""
-    # 1. Renderiza o template HTML como string
-    html = render_template(template_src, **context_dict)
+def _ler_data(valor):
+    """Converte AAAA-MM-DD em date; valores ausentes ou inválidos viram None (filtro ignorado)."""
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d').date() if valor else None
+    except ValueError:
+        return None
 
-    # 2. Cria um buffer de memória para armazenar o PDF
-    result_file = io.BytesIO()
 
-    # 3. Converte HTML para PDF
-    pisa_status = pisa.CreatePDF(
-        html,  # o conteúdo HTML renderizado
-        dest=result_file  # o objeto de destino para armazenar o PDF
+def _enviar_pdf(job_id):
+    """Resposta de download do PDF já gerado e guardado em cache."""
+    prefixo = 'relatorio_reservas' if job_id.startswith('reservas') else 'relatorio_brinquedos'
+    return send_file(
+        relatorios_pdf.caminho_pdf(job_id),
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=f'{prefixo}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
     )
 
-    # 4. Retorna True/False e o buffer
-    if pisa_status.err:
-        return None  # Retorna None em caso de erro na conversão
-    return result_file
 
+def _responder_relatorio(tipo, filtros):
+    """
+    Agenda a geração do relatório em segundo plano.
 
-@equipamento_bp.route('/relatorio_pdf', methods=['POST'])
-# @login_required
-def gerar_relatorio_pdf():
-    # 1. Capturar os dados do formulário POST
-    data_inicio_str = request.form.get('data_inicio')
-    data_fim_str = request.form.get('data_fim')
-
-    # 2. Iniciar a query e o filtro base
-    query = Reserva.query
+    Se o PDF já está em cache ou fica pronto em até RELATORIO_ESPERA_SINCRONA segundos,
+    o download é imediato. Caso contrário, o formulário HTML é redirecionado para a página
+    que acompanha a geração; clientes que pedem JSON recebem 202 com os links de status e download.
+    """
+    job_id = relatorios_pdf.solicitar_relatorio(tipo, filtros)
+    status = relatorios_pdf.aguardar_relatorio(job_id, current_app.config.get('RELATORIO_ESPERA_SINCRONA', 5))
 
-    # 3. Aplicar filtros de data (se fornecidos)
-    data_inicio_obj = None
-    if data_inicio_str:
-        # Tenta converter a string para objeto date
-        try:
-            data_inicio_obj = datetime.strptime(data_inicio_str, '%Y-%m-%d').date()
-            query = query.filter(Reserva.data_fim >= data_inicio_obj)
-        except ValueError:
-            pass  # Ignora se a data for inválida
+    if status == 'pronto':
+        return _enviar_pdf(job_id)
+    if status == 'erro':
+        return "Erro ao gerar PDF", 500
+    if request.accept_mimetypes.best != 'application/json':
+        return redirect(url_for('equipamento.acompanhar_relatorio', job_id=job_id), 303)
+    return jsonify({
+        'id': job_id,
+        'status': status,
+        'status_url': url_for('equipamento.status_relatorio', job_id=job_id),
+        'download_url': url_for('equipamento.download_relatorio', job_id=job_id)
+    }), 202
 
-    data_fim_obj = None
-    if data_fim_str:
-        # Tenta converter a string para objeto date
-        try:
-            data_fim_obj = datetime.strptime(data_fim_str, '%Y-%m-%d').date()
-            query = query.filter(Reserva.data_inicio <= data_fim_obj)
-        except ValueError:
-            pass  # Ignora se a data for inválida
 
-    # 4. Executar a consulta
-    reservas_filtradas = query.order_by(Reserva.data_inicio).all()
+@equipamento_bp.route('/relatorio_pdf', methods=['POST'])
+@login_required
+def gerar_relatorio_pdf():
+    # Filtros de data (opcionais); datas inválidas são ignoradas
+    data_inicio = _ler_data(request.form.get('data_inicio'))
+    data_fim = _ler_data(request.form.get('data_fim'))
 
-    # 5. Configurar o contexto para o template de PDF
-    context = {
-        'reservas_filtradas': reservas_filtradas,
-        'data_inicio': data_inicio_obj.strftime('%d/%m/%Y') if data_inicio_obj else 'Todas',
-        'data_fim': data_fim_obj.strftime('%d/%m/%Y') if data_fim_obj else 'Todas',
-        'now': datetime.now  # Passa a função now para uso no template (se necessário)
+    filtros = {
+        'data_inicio': data_inicio.isoformat() if data_inicio else None,
+        'data_fim': data_fim.isoformat() if data_fim else None
     }
+    return _responder_relatorio('reservas', filtros)
 
-    # 6. Gera o PDF usando a função auxiliar
-    pdf_buffer = render_to_pdf('relatorio_reservas.html', context)
-
-    # 7. Retornar a resposta
-    if not pdf_buffer:
-        return "Erro ao gerar PDF", 500
-
-    pdf_buffer.seek(0)
-    response = make_response(pdf_buffer.read())
-    response.headers['Content-Type'] = 'application/pdf'
-    response.headers[
-        'Content-Disposition'] = f'attachment; filename=relatorio_reservas_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
 
-    return response
+@equipamento_bp.route('/relatorio_equipamento_pdf', methods=['POST'])
+@login_required
+def gerar_relatorio_equipamento_pdf():
+    filtros = {'status_filtro': request.form.get('status_filtro') or None}
+    return _responder_relatorio('equipamentos', filtros)
+
+
+def _responder_exportacao(nome, formato, cabecalho, linhas):
+    """Envia a exportação em streaming: as linhas saem do cursor do banco direto para a resposta."""
+    if formato == 'csv':
+        conteudo = exportacao.gerar_csv(cabecalho, linhas)
+        mimetype = 'text/csv; charset=utf-8'
+    elif formato == 'xlsx':
+        if not exportacao.xlsx_disponivel():
+            return "Exportação XLSX indisponível: instale o pacote xlsxwriter.", 501
+        conteudo = exportacao.gerar_xlsx(cabecalho, linhas)
+        mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    else:
+        abort(404)
+
+    arquivo = f'{nome}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{formato}'
+    return Response(
+        stream_with_context(conteudo),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={arquivo}'}
+    )
 
 
-# ... (Funções render_to_pdf e gerar_relatorio_pdf (reservas) já existentes) ...
+@equipamento_bp.route('/exportar/reservas.<formato>')
+@login_required
+def exportar_reservas(formato):
+    # Mesmos filtros do relatório em PDF (opcionais; datas inválidas são ignoradas)
+    linhas = exportacao.linhas_reservas(
+        _ler_data(request.args.get('data_inicio')),
+        _ler_data(request.args.get('data_fim'))
+    )
+    return _responder_exportacao('reservas', formato, exportacao.CABECALHO_RESERVAS, linhas)
 
-@equipamento_bp.route('/relatorio_equipamento_pdf', methods=['POST'])
-# @login_required
-def gerar_relatorio_equipamento_pdf():
-    # 1. Capturar os dados do formulário POST
-    status_filtro = request.form.get('status_filtro')
 
-    # 2. Iniciar a query
-    query = Equipamento.query
+@equipamento_bp.route('/exportar/equipamentos.<formato>')
+@login_required
+def exportar_equipamentos(formato):
+    linhas = exportacao.linhas_equipamentos(request.args.get('status_filtro') or None)
+    return _responder_exportacao('brinquedos', formato, exportacao.CABECALHO_EQUIPAMENTOS, linhas)
 
-    # 3. Aplicar filtro de status (se fornecido)
-    if status_filtro:
-        query = query.filter(Equipamento.status == status_filtro)
 
-    # 4. Executar a consulta
-    equipamentos_filtrados = query.order_by(Equipamento.nome).all()
+@equipamento_bp.route('/relatorios/<job_id>')
+@login_required
+def acompanhar_relatorio(job_id):
+    """Página exibida enquanto o PDF é gerado: consulta o status e inicia o download quando fica pronto."""
+    status, erro = relatorios_pdf.status_relatorio(job_id)
+    if status is None:
+        abort(404)
+    return render_template('relatorio_status.html', job_id=job_id, status=status, erro=erro)
 
-    # 5. Configurar o contexto para o template de PDF
-    context = {
-        'equipamentos_filtrados': equipamentos_filtrados,
-        'status_filtro': status_filtro,
-        'now': datetime.now
-    }
 
-    # 6. Gera o PDF usando a função auxiliar
-    pdf_buffer = render_to_pdf('relatorio_equipamentos.html', context)
+@equipamento_bp.route('/relatorios/<job_id>/status')
+@login_required
+def status_relatorio(job_id):
+    status, erro = relatorios_pdf.status_relatorio(job_id)
+    if status is None:
+        return jsonify({'message': 'Relatório não encontrado.'}), 404
 
-    # 7. Retornar a resposta (Mesma lógica de download)
-    if not pdf_buffer:
-        return "Erro ao gerar PDF de equipamentos", 500
+    resposta = {'id': job_id, 'status': status}
+    if status == 'pronto':
+        resposta['download_url'] = url_for('equipamento.download_relatorio', job_id=job_id)
+    if status == 'erro':
+        resposta['erro'] = erro
+    return jsonify(resposta)
 
-    pdf_buffer.seek(0)
-    response = make_response(pdf_buffer.read())
-    response.headers['Content-Type'] = 'application/pdf'
-    response.headers[
-        'Content-Disposition'] = f'attachment; filename=relatorio_brinquedos_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
 
-    return response
\ No newline at end of file
+@equipamento_bp.route('/relatorios/<job_id>/download')
+@login_required
+def download_relatorio(job_id):
+    status, _ = relatorios_pdf.status_relatorio(job_id)
+    if status is None:
+        abort(404)
+    if status != 'pronto':
+        return jsonify({'id': job_id, 'status': status}), 409
+    return _enviar_pdf(job_id)
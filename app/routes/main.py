@@ -1,13 +1,34 @@
 # Arquivo: app/routes/main.py
 
-from flask import Blueprint, render_template, redirect, url_for, request, flash
+from flask import Blueprint, render_template, redirect, url_for, request, flash, current_app
 from flask_login import login_user, logout_user, login_required, current_user
 from app.models import User, db  # Importação corrigida
 from sqlalchemy.exc import IntegrityError
+from app.utils.limitador import LimitadorTaxa
+from app.utils.senhas import SenhasSobrecarregadas
 
 auth_bp = Blueprint('auth', __name__, template_folder='../templates')
 
 
+def _limitadores_login():
+    """Token buckets de tentativas de login por IP e por usuário: (capacidade, fichas por minuto)."""
+    if 'limitadores_login' not in current_app.extensions:
+        current_app.extensions['limitadores_login'] = (
+            LimitadorTaxa(*current_app.config.get('LOGIN_LIMITE_IP', (20, 10))),
+            LimitadorTaxa(*current_app.config.get('LOGIN_LIMITE_USUARIO', (5, 5)))
+        )
+    return current_app.extensions['limitadores_login']
+
+
+def _tentativa_recusada(username):
+    """Segundos de espera se o IP ou o usuário excedeu o limite; 0 se a tentativa pode seguir."""
+    por_ip, por_usuario = _limitadores_login()
+    espera = por_ip.consumir(request.remote_addr)
+    if not espera and username:
+        espera = por_usuario.consumir(username.lower())
+    return espera
+
+
 @auth_bp.route('/login', methods=['GET', 'POST'])
 def login():
     if current_user.is_authenticated:
@@ -17,9 +38,25 @@ def login():
         username = request.form.get('username')
         password = request.form.get('password')
 
+        # Recusa excesso de tentativas antes de qualquer consulta ou cálculo de bcrypt
+        espera = _tentativa_recusada(username)
+        if espera:
+            flash(f'Muitas tentativas de login. Tente novamente em {espera} segundos.', 'danger')
+            return render_template('login.html', User=User), 429, {'Retry-After': str(espera)}
+
         user = User.query.filter_by(username=username).first()
 
-        if user and user.check_password(password):
+        try:
+            senha_valida = user is not None and user.check_password(password)
+        except SenhasSobrecarregadas as e:
+            flash(str(e), 'warning')
+            return render_template('login.html', User=User), 503, {'Retry-After': '1'}
+
+        if senha_valida:
+            if user.senha_precisa_rehash():
+                # Custo do bcrypt alterado: regrava o hash com a senha que acabou de ser validada
+                user.set_password(password)
+                db.session.commit()
             login_user(user, remember=True)
             flash(f'Bem-vindo(a), {user.username}!', 'success')
             next_page = request.args.get('next')
@@ -3,6 +3,7 @@
 from flask import Blueprint, jsonify, request, abort
 from app.models import User, db
 from flask_login import login_required, current_user  # Autenticação provisória via sessão
+from app.utils.usuarios import cache_usuarios
 
 user_api_bp = Blueprint('user_api', __name__)
 
@@ -66,6 +67,7 @@ def update_user(user_id):
     # Outros campos...
 
     db.session.commit()
+    cache_usuarios.invalidar(user_id)  # A permissão nova vale já na próxima requisição
     return jsonify(user.to_dict()), 200
 
 
@@ -79,4 +81,5 @@ def delete_user(user_id):
 
     db.session.delete(user)
     db.session.commit()
+    cache_usuarios.invalidar(user_id)
     return jsonify({'message': 'Usuário excluído'}), 204
\ No newline at end of file
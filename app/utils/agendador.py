@@ -0,0 +1,215 @@
+# Arquivo: app/utils/agendador.py
+
+import atexit
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from app import db, scheduler
+
+
+# Com vários workers (ex.: gunicorn -w 4) cada processo chama create_app e inicia o APScheduler.
+# Todos iniciam pausados; só o processo que detém a liderança executa as tarefas.
+NOME_LIDERANCA = 'agendador'
+
+_IDENTIDADE = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def configurar_jobstore(app):
+    """
+    Guarda as tarefas no próprio banco (tabela apscheduler_jobs), antes do scheduler.init_app.
+
+    Com o jobstore persistente, o próximo horário de cada tarefa sobrevive a reinícios e
+    execuções perdidas enquanto nenhum processo estava no ar são recuperadas (misfire_grace_time).
+    """
+    if 'SCHEDULER_JOBSTORES' in app.config:
+        return  # Configuração explícita tem prioridade
+    if app.config['SQLALCHEMY_DATABASE_URI'].endswith(':memory:') or app.config['SQLALCHEMY_DATABASE_URI'] == 'sqlite://':
+        return  # Banco em memória: o MemoryJobStore padrão é suficiente
+
+    from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+    with app.app_context():
+        app.config['SCHEDULER_JOBSTORES'] = {'default': SQLAlchemyJobStore(engine=db.engine)}
+
+
+# -----------------------------------------------
+# ESTRATÉGIAS DE LIDERANÇA
+# -----------------------------------------------
+
+class _LiderancaBanco:
+    """
+    Concessão (lease) gravada na tabela lider_agendador.
+
+    O líder renova a concessão periodicamente; se o processo morrer, ela expira
+    e outro processo assume na sua próxima tentativa.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.duracao = timedelta(seconds=app.config.get('AGENDADOR_LEASE', 30))
+        self._tabela_criada = False
+
+    def tentar(self):
+        from app.models import LiderAgendador
+        agora = datetime.utcnow()
+        tabela = LiderAgendador.__table__
+        with self.app.app_context():
+            try:
+                if not self._tabela_criada:
+                    # Não depende das migrações: num banco novo (ou com MIGRAR_AO_INICIAR = False)
+                    # a tabela da concessão ainda pode não existir
+                    tabela.create(db.engine, checkfirst=True)
+                    self._tabela_criada = True
+                with db.engine.begin() as conexao:
+                    # UPDATE condicional: renova a própria concessão ou assume uma expirada
+                    resultado = conexao.execute(
+                        db.update(tabela)
+                        .where(tabela.c.nome == NOME_LIDERANCA)
+                        .where((tabela.c.dono == _IDENTIDADE) | (tabela.c.expira_em < agora))
+                        .values(dono=_IDENTIDADE, expira_em=agora + self.duracao)
+                    )
+                    if resultado.rowcount:
+                        return True
+                    existe = conexao.execute(
+                        db.select(tabela.c.nome).where(tabela.c.nome == NOME_LIDERANCA)
+                    ).first()
+                    if existe:
+                        return False
+                    conexao.execute(tabela.insert().values(
+                        nome=NOME_LIDERANCA, dono=_IDENTIDADE, expira_em=agora + self.duracao
+                    ))
+                    return True
+            except IntegrityError:
+                return False  # Outro processo inseriu a linha ao mesmo tempo
+            except SQLAlchemyError as e:
+                # Ex.: banco indisponível
+                print(f"Agendador: não foi possível verificar a liderança: {e}")
+                return False
+
+    def liberar(self):
+        from app.models import LiderAgendador
+        tabela = LiderAgendador.__table__
+        with self.app.app_context():
+            try:
+                with db.engine.begin() as conexao:
+                    conexao.execute(
+                        db.update(tabela)
+                        .where(tabela.c.nome == NOME_LIDERANCA, tabela.c.dono == _IDENTIDADE)
+                        .values(expira_em=datetime.utcnow())
+                    )
+            except SQLAlchemyError:
+                pass
+
+
+class _LiderancaArquivo:
+    """
+    Lock exclusivo (fcntl.flock) em um arquivo, para instalações em um único servidor.
+
+    O sistema operacional libera o lock quando o processo termina, então não há expiração.
+    """
+
+    def __init__(self, app):
+        import fcntl  # Disponível apenas em sistemas Unix
+        self._fcntl = fcntl
+        self.caminho = app.config.get('AGENDADOR_ARQUIVO_LOCK') or os.path.join(app.instance_path, 'agendador.lock')
+        os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+        self._arquivo = None
+
+    def tentar(self):
+        if self._arquivo is not None:
+            return True
+        arquivo = open(self.caminho, 'a+')
+        try:
+            self._fcntl.flock(arquivo, self._fcntl.LOCK_EX | self._fcntl.LOCK_NB)
+        except OSError:
+            arquivo.close()
+            return False
+        self._arquivo = arquivo
+        return True
+
+    def liberar(self):
+        if self._arquivo is not None:
+            self._fcntl.flock(self._arquivo, self._fcntl.LOCK_UN)
+            self._arquivo.close()
+            self._arquivo = None
+
+
+ESTRATEGIAS = {
+    'banco': _LiderancaBanco,
+    'arquivo': _LiderancaArquivo,
+}
+
+
+# -----------------------------------------------
+# COORDENAÇÃO
+# -----------------------------------------------
+
+class CoordenadorAgendador:
+    """Tenta obter (ou renovar) a liderança periodicamente e pausa/retoma o scheduler conforme o resultado."""
+
+    def __init__(self, estrategia, intervalo):
+        self.estrategia = estrategia
+        self.intervalo = intervalo
+        self.lider = False
+        self._parar = threading.Event()
+
+    def verificar(self):
+        lider = self.estrategia.tentar()
+        if lider and not self.lider:
+            print(f"Agendador: este processo ({_IDENTIDADE}) assumiu as tarefas agendadas.")
+            scheduler.resume()
+        elif not lider and self.lider:
+            print(f"Agendador: este processo ({_IDENTIDADE}) perdeu a liderança; tarefas pausadas.")
+            scheduler.pause()
+        self.lider = lider
+
+    def _executar(self):
+        while not self._parar.is_set():
+            try:
+                self.verificar()
+            except Exception as e:
+                print(f"ERRO na coordenação do agendador: {e}")
+            self._parar.wait(self.intervalo)
+
+    def iniciar(self):
+        threading.Thread(target=self._executar, name='coordenador-agendador', daemon=True).start()
+        atexit.register(self.parar)
+
+    def parar(self):
+        """Libera a liderança ao encerrar, para que outro processo assuma sem esperar a expiração."""
+        self._parar.set()
+        if self.lider:
+            self.lider = False
+            self.estrategia.liberar()
+
+
+def iniciar_agendador(app):
+    """
+    Inicia o scheduler pausado e a coordenação entre processos (AGENDADOR_COORDENACAO).
+
+    'banco' (padrão): concessão renovável no banco, funciona com vários servidores.
+    'arquivo': lock de arquivo, para vários workers no mesmo servidor.
+    'nenhuma': o scheduler roda em todos os processos (uso com um único processo).
+    """
+    modo = app.config.get('AGENDADOR_COORDENACAO', 'banco')
+    if modo == 'nenhuma':
+        scheduler.start()
+        return None
+
+    scheduler.start(paused=True)
+    if not scheduler.running:
+        return None  # Host não autorizado ou processo pai do reloader do Flask
+
+    try:
+        estrategia = ESTRATEGIAS[modo](app)
+    except ImportError:
+        print("Agendador: lock de arquivo indisponível neste sistema; usando a concessão no banco.")
+        estrategia = _LiderancaBanco(app)
+
+    coordenador = CoordenadorAgendador(estrategia, app.config.get('AGENDADOR_RENOVACAO', 10))
+    coordenador.iniciar()
+    return coordenador
@@ -0,0 +1,73 @@
+# Arquivo: app/utils/banco.py
+
+import os
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+# Perfil padrão do SQLite em produção (aplicado em cada nova conexão).
+# WAL permite leituras simultâneas a uma escrita; busy_timeout faz o escritor esperar
+# o lock em vez de falhar com "database is locked".
+SQLITE_PRAGMAS_PADRAO = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,         # ms
+    'mmap_size': 268435456,       # 256 MB
+    'cache_size': -64000,         # em KB quando negativo (64 MB)
+    'temp_store': 'MEMORY',
+}
+
+
+def eh_sqlite(uri):
+    return make_url(uri).get_backend_name() == 'sqlite'
+
+
+def configurar_banco(app):
+    """
+    Monta as opções do engine a partir da configuração, antes do db.init_app.
+
+    A URI já vem resolvida pelo create_app (config_class > DATABASE_URL > SQLite padrão);
+    aqui só se normaliza o esquema `postgres://` usado por alguns provedores.
+    Opções definidas explicitamente em SQLALCHEMY_ENGINE_OPTIONS têm prioridade.
+    """
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    if uri.startswith('postgres://'):
+        uri = uri.replace('postgres://', 'postgresql://', 1)
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+
+    opcoes = {
+        'pool_size': app.config.get('DB_POOL_SIZE', 10),
+        'max_overflow': app.config.get('DB_MAX_OVERFLOW', 20),
+        'pool_timeout': app.config.get('DB_POOL_TIMEOUT', 30),
+    }
+
+    if eh_sqlite(uri):
+        caminho = make_url(uri).database
+        if caminho and caminho != ':memory:':
+            # Garante que a pasta do arquivo exista (ex.: app/database)
+            os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        else:
+            # Banco em memória: um pool de tamanho fixo não faz sentido
+            opcoes = {}
+        app.config.setdefault('SQLITE_PRAGMAS', SQLITE_PRAGMAS_PADRAO)
+    else:
+        # Servidores de banco (PostgreSQL/MySQL) derrubam conexões ociosas
+        opcoes['pool_pre_ping'] = True
+        opcoes['pool_recycle'] = app.config.get('DB_POOL_RECYCLE', 1800)
+
+    opcoes.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = opcoes
+
+
+def aplicar_pragmas(engine, pragmas):
+    """Executa os PRAGMAs do SQLite em cada conexão aberta pelo pool."""
+
+    @event.listens_for(engine, 'connect')
+    def _ao_conectar(conexao_dbapi, registro):
+        cursor = conexao_dbapi.cursor()
+        try:
+            for nome, valor in pragmas.items():
+                cursor.execute(f'PRAGMA {nome}={valor}')
+        finally:
+            cursor.close()
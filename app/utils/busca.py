@@ -0,0 +1,116 @@
+# Arquivo: app/utils/busca.py
+
+import re
+
+from flask import current_app
+from sqlalchemy import and_, or_
+
+from app import db
+from app.models import Equipamento, Reserva
+
+
+# Índices FTS5 (SQLite) em "external content": guardam só os termos; o texto continua nas
+# tabelas originais e os triggers mantêm o índice a cada INSERT/UPDATE/DELETE (inclusive em lote).
+# `pesos`: peso de cada coluna no bm25 (o nome conta mais que a descrição/contato).
+INDICES_FTS = {
+    'busca_equipamento': {'tabela': 'equipamento', 'colunas': ('nome', 'descricao'), 'pesos': (10.0, 1.0)},
+    'busca_reserva': {'tabela': 'reserva', 'colunas': ('cliente_nome', 'cliente_contato'), 'pesos': (5.0, 1.0)},
+}
+
+MAX_TERMOS = 8
+
+
+def _ddl_fts(indice, tabela, colunas):
+    lista = ', '.join(colunas)
+    novos = ', '.join(f'new.{coluna}' for coluna in colunas)
+    antigos = ', '.join(f'old.{coluna}' for coluna in colunas)
+    remover = f"INSERT INTO {indice}({indice}, rowid, {lista}) VALUES ('delete', old.id, {antigos});"
+    inserir = f"INSERT INTO {indice}(rowid, {lista}) VALUES (new.id, {novos});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {indice} USING fts5({lista}, content='{tabela}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {indice}_ai AFTER INSERT ON {tabela} BEGIN {inserir} END",
+        f"CREATE TRIGGER IF NOT EXISTS {indice}_ad AFTER DELETE ON {tabela} BEGIN {remover} END",
+        f"CREATE TRIGGER IF NOT EXISTS {indice}_au AFTER UPDATE OF {lista} ON {tabela} BEGIN {remover} {inserir} END",
+        # Indexa as linhas que já existem
+        f"INSERT INTO {indice}({indice}) VALUES ('rebuild')",
+    ]
+
+
+def criar_indices_fts(conexao):
+    """Cria os índices FTS5 e seus triggers (migração 0004). Em outros bancos, ou sem FTS5, não faz nada."""
+    if conexao.dialect.name != 'sqlite':
+        return False
+    if not conexao.exec_driver_sql("SELECT sqlite_compileoption_used('ENABLE_FTS5')").scalar():
+        print("Aviso: SQLite sem FTS5; a busca usará LIKE.")
+        return False
+    for indice, definicao in INDICES_FTS.items():
+        for comando in _ddl_fts(indice, definicao['tabela'], definicao['colunas']):
+            conexao.exec_driver_sql(comando)
+    return True
+
+
+def fts_disponivel():
+    """Se os índices FTS5 existem neste banco (verificado uma vez por app)."""
+    if 'busca_fts' not in current_app.extensions:
+        disponivel = False
+        if db.engine.dialect.name == 'sqlite':
+            nomes = db.session.execute(db.text(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('busca_equipamento', 'busca_reserva')"
+            )).scalars().all()
+            disponivel = len(nomes) == len(INDICES_FTS)
+        current_app.extensions['busca_fts'] = disponivel
+    return current_app.extensions['busca_fts']
+
+
+def termos_busca(texto):
+    """Palavras do texto digitado (no máximo MAX_TERMOS), sem a sintaxe de consulta do FTS5."""
+    return re.findall(r'\w+', texto or '')[:MAX_TERMOS]
+
+
+def _consulta_fts(termos):
+    # Cada palavra vira um prefixo entre aspas ("pul"* encontra "Pula-pula"); palavras separadas = AND
+    return ' '.join(f'"{termo}"*' for termo in termos)
+
+
+def _like(colunas, termos):
+    """Fallback sem FTS5: cada palavra precisa aparecer (em qualquer posição) em alguma das colunas."""
+    condicoes = []
+    for termo in termos:
+        padrao = '%' + termo.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        condicoes.append(or_(*[coluna.ilike(padrao, escape='\\') for coluna in colunas]))
+    return and_(*condicoes)
+
+
+def _buscar(modelo, indice, colunas, ordem_like, termos, pagina, limite):
+    """
+    Linhas de `colunas` que casam com os termos: ordenadas por relevância (bm25) com FTS5,
+    ou por `ordem_like` no fallback. Retorna (linhas, ha_mais).
+    """
+    query = db.session.query(*colunas)
+    if fts_disponivel():
+        tabela_fts = db.table(indice, db.column('rowid'))
+        pesos = ', '.join(str(peso) for peso in INDICES_FTS[indice]['pesos'])
+        relevancia = db.literal_column(f'bm25({indice}, {pesos})')
+        query = query.join(tabela_fts, tabela_fts.c.rowid == modelo.id).filter(
+            db.literal_column(indice).op('MATCH')(_consulta_fts(termos))
+        ).order_by(relevancia, modelo.id)
+    else:
+        colunas_texto = [getattr(modelo, coluna) for coluna in INDICES_FTS[indice]['colunas']]
+        query = query.filter(_like(colunas_texto, termos)).order_by(*ordem_like, modelo.id)
+
+    linhas = query.offset((pagina - 1) * limite).limit(limite + 1).all()
+    return linhas[:limite], len(linhas) > limite
+
+
+def buscar_equipamentos(termos, pagina=1, limite=20):
+    return _buscar(Equipamento, 'busca_equipamento',
+                   [Equipamento.id, Equipamento.nome, Equipamento.descricao, Equipamento.status],
+                   [Equipamento.nome], termos, pagina, limite)
+
+
+def buscar_reservas(termos, pagina=1, limite=20):
+    return _buscar(Reserva, 'busca_reserva',
+                   [Reserva.id, Reserva.equipamento_id, Reserva.cliente_nome, Reserva.cliente_contato,
+                    Reserva.data_inicio, Reserva.data_fim, Reserva.finalizada, Reserva.data_criacao],
+                   [Reserva.data_inicio.desc()], termos, pagina, limite)
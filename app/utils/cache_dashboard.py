@@ -0,0 +1,91 @@
+# Arquivo: app/utils/cache_dashboard.py
+
+import time
+from threading import Lock
+
+from flask import current_app
+
+from app import db
+from app.models import Equipamento, Reserva
+from app.utils import relatorios
+from app.utils.eventos import ao_confirmar
+
+
+class CacheDashboard:
+    """
+    Guarda as estatísticas do dashboard por `DASHBOARD_CACHE_TTL` segundos.
+
+    O cache é descartado a cada commit que altera equipamentos ou reservas neste
+    processo; alterações feitas por outros processos aparecem quando o TTL expira.
+    Só guarda valores simples (nunca objetos do SQLAlchemy, que ficariam desanexados da sessão).
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._dados = None
+        self._calculado_em = None
+
+    def invalidar(self):
+        with self._lock:
+            self._dados = None
+
+    def obter(self):
+        ttl = current_app.config.get('DASHBOARD_CACHE_TTL', 60)
+        with self._lock:
+            if self._dados is not None and time.monotonic() - self._calculado_em <= ttl:
+                return self._dados
+        dados = self._calcular()
+        with self._lock:
+            self._dados, self._calculado_em = dados, time.monotonic()
+        return dados
+
+    def _calcular(self):
+        limite_disponiveis = current_app.config.get('DASHBOARD_LIMITE_DISPONIVEIS', 10)
+
+        total_equipamentos, total_disponiveis = db.session.query(
+            db.func.count(Equipamento.id),
+            db.func.coalesce(db.func.sum(db.case((Equipamento.status == 'disponivel', 1), else_=0)), 0),
+        ).one()
+        resumo_ativas = relatorios.resumo_reservas(apenas_ativas=True)
+
+        disponiveis = db.session.query(Equipamento.nome, Equipamento.descricao, Equipamento.status) \
+            .filter(Equipamento.status == 'disponivel') \
+            .order_by(Equipamento.nome).limit(limite_disponiveis).all()
+
+        ultimas = db.session.query(Reserva.id, Reserva.cliente_nome, Reserva.data_inicio, Reserva.data_fim,
+                                   Equipamento.nome) \
+            .join(Equipamento, Reserva.equipamento_id == Equipamento.id) \
+            .filter(Reserva.finalizada.isnot(True)) \
+            .order_by(Reserva.data_inicio).limit(5).all()
+
+        return {
+            'total_equipamentos': total_equipamentos,
+            'total_disponiveis': int(total_disponiveis),
+            'reservas_ativas': resumo_ativas['total_reservas'],
+            'clientes_unicos': resumo_ativas['clientes_unicos'],
+            'total_dias': resumo_ativas['total_dias'],
+            'equipamentos_disponiveis': [
+                {'nome': nome, 'descricao': descricao, 'status': status}
+                for nome, descricao, status in disponiveis
+            ],
+            'ultimas_reservas': [
+                {
+                    'id': reserva_id,
+                    'cliente_nome': cliente_nome,
+                    'equipamento_nome': equipamento_nome,
+                    'data_inicio': data_inicio,
+                    'data_fim': data_fim,
+                    'duracao_dias': (data_fim - data_inicio).days + 1,
+                }
+                for reserva_id, cliente_nome, data_inicio, data_fim, equipamento_nome in ultimas
+            ],
+        }
+
+
+cache_dashboard = CacheDashboard()
+
+
+@ao_confirmar
+def _invalidar_dashboard(alteracoes):
+    if any(alteracao.tabela in ('equipamento', 'reserva') for alteracao in alteracoes):
+        cache_dashboard.invalidar()
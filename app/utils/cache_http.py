@@ -0,0 +1,81 @@
+# Arquivo: app/utils/cache_http.py
+
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import current_app, request
+from werkzeug.datastructures import ResponseCacheControl
+from werkzeug.http import http_date
+
+from app.utils.versoes import versao_recente
+
+
+def _validadores(tabelas):
+    """ETag e Last-Modified derivados das versões das tabelas (sem consultar os dados)."""
+    versoes = [versao_recente(tabela) for tabela in tabelas]
+    etag = '-'.join(f'{tabela}{versao}' for tabela, (versao, _) in zip(tabelas, versoes))
+    datas = [atualizado_em for _, atualizado_em in versoes if atualizado_em]
+    return etag, max(datas) if datas else None
+
+
+def _cabecalhos(etag, ultima_alteracao):
+    cache = ResponseCacheControl()
+    cache.public = True
+    cache.max_age = current_app.config.get('API_CACHE_MAX_AGE', 5)
+    cache.must_revalidate = True
+
+    cabecalhos = {'ETag': f'W/"{etag}"', 'Cache-Control': cache.to_header()}
+    # Last-Modified tem precisão de segundos: dentro do mesmo segundo da última alteração,
+    # outra alteração receberia a mesma data e um If-Modified-Since antigo levaria a um 304
+    # com dados velhos. Nesse caso só o ETag é enviado; passado o segundo, qualquer alteração
+    # nova tem uma data (truncada) maior que a enviada (atualizado_em é gravado em UTC)
+    if ultima_alteracao and datetime.utcnow() - ultima_alteracao >= timedelta(seconds=1):
+        cabecalhos['Last-Modified'] = http_date(ultima_alteracao.replace(microsecond=0))
+    return cabecalhos
+
+
+def _nao_modificado(etag, ultima_alteracao):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and ultima_alteracao:
+        # Só é seguro para datas enviadas em _cabecalhos (ver lá); a comparação é por segundo
+        return ultima_alteracao.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    return False
+
+
+def get_condicional(*tabelas):
+    """
+    GET condicional para recursos da API que dependem apenas das `tabelas` (Flask-RESTX).
+
+    Responde 304 sem consultar os dados nem serializar quando o ETag (ou a data)
+    enviado pelo cliente ainda corresponde à versão atual das tabelas.
+    Deve ficar por fora do marshal_with.
+    """
+    def decorador(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            etag, ultima_alteracao = _validadores(tabelas)
+            cabecalhos = _cabecalhos(etag, ultima_alteracao)
+            if _nao_modificado(etag, ultima_alteracao):
+                return current_app.response_class(status=304, headers=cabecalhos)
+
+            resposta = f(*args, **kwargs)
+            if isinstance(resposta, current_app.response_class):
+                # Resposta já serializada (ex.: serializacao.resposta_json)
+                if 200 <= resposta.status_code < 300:
+                    resposta.headers.update(cabecalhos)
+                return resposta
+            if not isinstance(resposta, tuple):
+                resposta = (resposta,)
+            dados, codigo, extras = resposta[0], 200, {}
+            if len(resposta) > 1:
+                codigo = resposta[1]
+            if len(resposta) > 2:
+                extras = resposta[2]
+            # As versões são lidas antes da consulta: se os dados mudarem no meio, o
+            # ETag fica mais antigo que o conteúdo e o próximo GET apenas recebe 200 de novo
+            if 200 <= codigo < 300:
+                extras = dict(extras or {}, **cabecalhos)
+            return dados, codigo, extras
+        return wrapper
+    return decorador
@@ -0,0 +1,99 @@
+# Arquivo: app/utils/concorrencia.py
+
+from datetime import datetime, time, timedelta
+
+from flask import current_app
+
+from app import db
+from app.models import Equipamento, Reserva
+
+
+def _como_data(valor):
+    return valor.date() if isinstance(valor, datetime) else valor
+
+
+class ReservaConflitante(ValueError):
+    """O período já está reservado (ou o equipamento não pôde ser travado); `conflitos` traz os ids encontrados."""
+
+    def __init__(self, mensagem, conflitos=None):
+        super().__init__(mensagem)
+        self.conflitos = conflitos or []
+
+
+def travar_equipamentos(equipamento_ids):
+    """
+    Incrementa a versão de cada equipamento com compare-and-swap, dentro da transação da sessão.
+
+    `UPDATE equipamento SET versao = versao + 1 WHERE id = ? AND versao = ?` só altera a
+    linha se ninguém reservou o equipamento desde a leitura da versão; se outra transação
+    passou na frente, a versão é relida e a troca repetida. A partir daqui a transação
+    segura o lock de escrita (a linha, no PostgreSQL; o banco, no SQLite), então as
+    reservas de outros pedidos para o mesmo equipamento esperam o commit ou o rollback.
+    Os ids são travados em ordem crescente, para dois lotes nunca esperarem um pelo outro.
+    """
+    tentativas = current_app.config.get('RESERVA_TENTATIVAS_CAS', 5)
+    for equipamento_id in sorted(set(equipamento_ids)):
+        for _ in range(tentativas):
+            versao = db.session.execute(
+                db.select(Equipamento.versao).where(Equipamento.id == equipamento_id)
+            ).scalar()
+            if versao is None:
+                raise ReservaConflitante(f'Equipamento {equipamento_id} não encontrado.')
+            resultado = db.session.execute(
+                db.update(Equipamento)
+                .where(Equipamento.id == equipamento_id, Equipamento.versao == versao)
+                .values(versao=versao + 1)
+                .execution_options(synchronize_session=False)
+            )
+            if resultado.rowcount == 1:
+                break
+        else:
+            db.session.rollback()
+            raise ReservaConflitante(f'Muitas reservas simultâneas para o equipamento {equipamento_id}. '
+                                     f'Tente novamente.')
+
+
+def consulta_conflitos(equipamento_id, data_inicio, data_fim):
+    """SELECT dos ids das reservas ativas do equipamento que cruzam o período (usa ix_reserva_equipamento_periodo)."""
+    inicio, fim = _como_data(data_inicio), _como_data(data_fim)
+    return db.select(Reserva.id).where(
+        Reserva.equipamento_id == equipamento_id,
+        Reserva.finalizada.isnot(True),
+        Reserva.data_fim >= datetime.combine(inicio, time.min),
+        Reserva.data_inicio < datetime.combine(fim + timedelta(days=1), time.min)
+    ).order_by(Reserva.id)
+
+
+def conflitos_no_banco(equipamento_id, data_inicio, data_fim):
+    """
+    Ids das reservas ativas do equipamento que cruzam o período, lidos do banco.
+
+    Feita depois de travar_equipamentos, é a verificação definitiva: o índice em memória
+    pode não ter as reservas gravadas há pouco por outros processos.
+    """
+    return db.session.scalars(consulta_conflitos(equipamento_id, data_inicio, data_fim)).all()
+
+
+def criar_reserva(equipamento_id, cliente_nome, cliente_contato, data_inicio, data_fim):
+    """
+    Grava uma reserva sem risco de dupla reserva sob pedidos simultâneos.
+
+    Trava o equipamento, confere os conflitos no banco e insere, tudo na mesma transação;
+    levanta ReservaConflitante (após o rollback) se o período já estiver ocupado.
+    """
+    travar_equipamentos([equipamento_id])
+    conflitos = conflitos_no_banco(equipamento_id, data_inicio, data_fim)
+    if conflitos:
+        db.session.rollback()
+        raise ReservaConflitante('O equipamento não está disponível no período solicitado.', conflitos)
+
+    reserva = Reserva(
+        equipamento_id=equipamento_id,
+        cliente_nome=cliente_nome,
+        cliente_contato=cliente_contato,
+        data_inicio=data_inicio,
+        data_fim=data_fim
+    )
+    db.session.add(reserva)
+    db.session.commit()
+    return reserva
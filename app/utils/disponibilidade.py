@@ -0,0 +1,201 @@
+# Arquivo: app/utils/disponibilidade.py
+
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from threading import RLock
+
+from flask import current_app
+
+from app import db
+from app.utils.eventos import ao_confirmar
+from app.utils.versoes import versao_recente
+
+
+def _como_data(valor):
+    """Normaliza datetime/date para date (as reservas são por dia, com o dia final incluso)."""
+    return valor.date() if isinstance(valor, datetime) else valor
+
+
+# -----------------------------------------------
+# INTERVALOS DE UM EQUIPAMENTO
+# -----------------------------------------------
+class IntervalosEquipamento:
+    """
+    Lista de reservas de um equipamento ordenada por data de início.
+
+    `max_fim[i]` guarda a maior data de término entre as reservas 0..i. Como essa
+    sequência nunca diminui, dá para descobrir por busca binária se alguma reserva
+    que começa antes do fim do período termina depois do seu início.
+    """
+
+    def __init__(self):
+        self.chaves = []   # (data_inicio, reserva_id), ordenadas
+        self.fins = []     # data_fim de cada chave
+        self.max_fim = []  # máximo acumulado de `fins`
+
+    def __len__(self):
+        return len(self.chaves)
+
+    def _recalcular_max(self, a_partir_de):
+        maior = self.max_fim[a_partir_de - 1] if a_partir_de > 0 else None
+        del self.max_fim[a_partir_de:]
+        for fim in self.fins[a_partir_de:]:
+            maior = fim if maior is None or fim > maior else maior
+            self.max_fim.append(maior)
+
+    def adicionar(self, reserva_id, inicio, fim):
+        chave = (inicio, reserva_id)
+        pos = bisect_left(self.chaves, chave)
+        self.chaves.insert(pos, chave)
+        self.fins.insert(pos, fim)
+        self._recalcular_max(pos)
+
+    def remover(self, reserva_id, inicio):
+        pos = bisect_left(self.chaves, (inicio, reserva_id))
+        if pos < len(self.chaves) and self.chaves[pos] == (inicio, reserva_id):
+            del self.chaves[pos]
+            del self.fins[pos]
+            self._recalcular_max(pos)
+
+    def _limite(self, fim):
+        # Quantidade de reservas que começam até `fim` (inclusive)
+        return bisect_right(self.chaves, (fim, float('inf')))
+
+    def esta_livre(self, inicio, fim):
+        limite = self._limite(fim)
+        return limite == 0 or self.max_fim[limite - 1] < inicio
+
+    def sobrepostas(self, inicio, fim):
+        limite = self._limite(fim)
+        primeira = bisect_left(self.max_fim, inicio, 0, limite)
+        return [
+            self.chaves[i][1]
+            for i in range(primeira, limite)
+            if self.fins[i] >= inicio
+        ]
+
+
+# -----------------------------------------------
+# ÍNDICE EM MEMÓRIA DE DISPONIBILIDADE
+# -----------------------------------------------
+class IndiceDisponibilidade:
+    """
+    Índice por equipamento das reservas não finalizadas.
+
+    É carregado com uma única consulta no primeiro uso e atualizado a cada commit
+    que altera reservas. Como cada processo do servidor tem o seu índice, a versão da
+    tabela reserva é comparada com a do índice antes de cada uso: se outro processo
+    gravou reservas, o índice é recarregado. A versão vem de versao_recente, que só vai
+    ao banco a cada VERSAO_CACHE_TTL segundos; nesse intervalo as consultas não tocam o
+    banco. A checagem definitiva contra dupla reserva é a de criar_reserva/inserir_lote
+    (app/utils/concorrencia.py). `DISPONIBILIDADE_TTL` segundos é só um limite extra para a recarga.
+    """
+
+    def __init__(self):
+        self._lock = RLock()
+        self._equipamentos = {}
+        self._reservas = {}  # reserva_id -> (equipamento_id, data_inicio, data_fim)
+        self._carregado_em = None
+        self._versao = None  # versão da tabela reserva que o índice reflete
+
+    def invalidar(self):
+        with self._lock:
+            self._carregado_em = None
+
+    def carregar(self, versao=None):
+        """Recarrega o índice a partir do banco em uma única consulta."""
+        from app.models import Reserva
+
+        # A versão é lida antes das reservas: um commit entre as duas leituras só causa uma recarga a mais
+        if versao is None:
+            versao = versao_recente('reserva')[0]
+        linhas = db.session.query(
+            Reserva.id, Reserva.equipamento_id, Reserva.data_inicio, Reserva.data_fim
+        ).filter(Reserva.finalizada.isnot(True)).all()
+
+        with self._lock:
+            self._equipamentos = {}
+            self._reservas = {}
+            for reserva_id, equipamento_id, inicio, fim in linhas:
+                self._adicionar(reserva_id, equipamento_id, _como_data(inicio), _como_data(fim))
+            self._carregado_em = time.monotonic()
+            self._versao = versao
+
+    def _garantir_carregado(self):
+        ttl = current_app.config.get('DISPONIBILIDADE_TTL', 60)
+        versao = versao_recente('reserva')[0]
+        if self._carregado_em is None or versao != self._versao or time.monotonic() - self._carregado_em > ttl:
+            self.carregar(versao)
+
+    def _adicionar(self, reserva_id, equipamento_id, inicio, fim):
+        self._remover(reserva_id)
+        self._reservas[reserva_id] = (equipamento_id, inicio, fim)
+        self._equipamentos.setdefault(equipamento_id, IntervalosEquipamento()).adicionar(reserva_id, inicio, fim)
+
+    def _remover(self, reserva_id):
+        anterior = self._reservas.pop(reserva_id, None)
+        if anterior:
+            equipamento_id, inicio, _ = anterior
+            self._equipamentos[equipamento_id].remover(reserva_id, inicio)
+
+    def esta_disponivel(self, equipamento_id, data_inicio, data_fim):
+        """Retorna True se nenhuma reserva ativa do equipamento cruza o período."""
+        with self._lock:
+            self._garantir_carregado()
+            intervalos = self._equipamentos.get(int(equipamento_id))
+            if not intervalos:
+                return True
+            return intervalos.esta_livre(_como_data(data_inicio), _como_data(data_fim))
+
+    def reservas_sobrepostas(self, equipamento_id, data_inicio, data_fim):
+        """Lista os ids das reservas ativas do equipamento que cruzam o período."""
+        with self._lock:
+            self._garantir_carregado()
+            intervalos = self._equipamentos.get(int(equipamento_id))
+            if not intervalos:
+                return []
+            return intervalos.sobrepostas(_como_data(data_inicio), _como_data(data_fim))
+
+    def filtrar_disponiveis(self, equipamento_ids, data_inicio, data_fim):
+        """Dentre os equipamentos informados, retorna os livres no período (sem consultar o banco)."""
+        inicio, fim = _como_data(data_inicio), _como_data(data_fim)
+        with self._lock:
+            self._garantir_carregado()
+            return [
+                equipamento_id for equipamento_id in equipamento_ids
+                if equipamento_id not in self._equipamentos
+                or self._equipamentos[equipamento_id].esta_livre(inicio, fim)
+            ]
+
+    def aplicar(self, alteracoes):
+        """Atualiza o índice com as reservas criadas, alteradas ou removidas em um commit."""
+        with self._lock:
+            if self._carregado_em is None:
+                return  # Será carregado já atualizado no próximo uso
+            reservas = [alteracao for alteracao in alteracoes if alteracao.tabela == 'reserva']
+            if not reservas:
+                return
+            for alteracao in reservas:
+                dados = alteracao.dados
+                if alteracao.acao == 'removida' or dados.get('finalizada'):
+                    self._remover(dados['id'])
+                else:
+                    self._adicionar(
+                        dados['id'],
+                        dados['equipamento_id'],
+                        _como_data(dados['data_inicio']),
+                        _como_data(dados['data_fim'])
+                    )
+            # O commit incrementou a versão de reserva uma vez (versoes.incrementar); se outro
+            # processo também gravou, a versão do banco fica à frente e o próximo uso recarrega
+            if self._versao is not None:
+                self._versao += 1
+
+
+indice_disponibilidade = IndiceDisponibilidade()
+
+
+@ao_confirmar
+def _atualizar_indice(alteracoes):
+    indice_disponibilidade.aplicar(alteracoes)
@@ -1,15 +1,19 @@
 from flask_mail import Message
 from datetime import datetime, timedelta
-from app.__init__ import mail, scheduler  # Importe o objeto mail e scheduler
-from app.models import Reserva  # Importe seu modelo de Reserva
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy.orm import joinedload
+from app import mail, scheduler, db  # Importar de `app.__init__` criaria cópias não inicializadas
+from app.models import Reserva, EmailFila  # Importe seu modelo de Reserva
+from app.utils.templates_email import renderizar, contexto_reserva
 
 
 # --- 1. Função Genérica de Envio ---
 
-def send_email(subject, recipients, html_body):
-    """Envia um e-mail com o corpo em HTML."""
+def send_email(subject, recipients, html_body, text_body=None):
+    """Envia um e-mail com o corpo em HTML (e a alternativa em texto, se houver)."""
     try:
         msg = Message(subject, recipients=recipients)
+        msg.body = text_body
         msg.html = html_body
         mail.send(msg)
         print(f"E-mail '{subject}' enviado com sucesso para {recipients[0]}")
@@ -17,89 +21,225 @@ def send_email(subject, recipients, html_body):
         print(f"ERRO ao enviar e-mail '{subject}': {e}")
 
 
-# --- 2. Função de Envio de Confirmação Imediata ---
+def _enviar_lote(app, mensagens):
+    """Envia um lote de mensagens por uma única conexão SMTP; retorna um erro (ou None) por mensagem."""
+    erros = []
+    with app.app_context():
+        try:
+            with mail.connect() as conexao:
+                for msg in mensagens:
+                    try:
+                        conexao.send(msg)
+                        erros.append(None)
+                    except Exception as e:
+                        erros.append(e)
+        except Exception as e:
+            # Falha ao abrir/fechar a conexão: as mensagens ainda não enviadas herdam o erro
+            erros.extend([e] * (len(mensagens) - len(erros)))
+    return erros
+
+
+def enviar_em_lote(app, mensagens):
+    """
+    Envia várias mensagens reaproveitando conexões SMTP.
 
-def send_confirmation_email(reserva):
-    """Envia e-mail imediatamente após a criação da reserva."""
-    subject = f"Confirmação de Reserva: {reserva.equipamento.nome}"
-    recipients = [reserva.cliente_contato]
-
-    # Formatação das datas
-    data_inicio_fmt = reserva.data_inicio.strftime('%d/%m/%Y')
-    data_fim_fmt = reserva.data_fim.strftime('%d/%m/%Y')
-
-    html_body = f"""
-    <h2>Sua Reserva está Confirmada!</h2>
-    <p>Olá {reserva.cliente_nome},</p>
-    <p>Confirmamos a sua reserva para o seguinte item:</p>
-    <ul>
-        <li><strong>Brinquedo:</strong> {reserva.equipamento.nome}</li>
-        <li><strong>Período:</strong> De {data_inicio_fmt} a {data_fim_fmt} ({reserva.duracao_dias()} dias)</li>        
-    </ul>
-    <p>Detalhes para retirada serão enviados em um lembrete no dia anterior ao início da reserva.</p>
-    <p>Obrigado!</p>
+    As mensagens são divididas em lotes de EMAIL_TAMANHO_LOTE; cada lote usa uma
+    conexão e até EMAIL_CONEXOES lotes são enviados em paralelo. Retorna uma lista
+    com o erro (ou None) de cada mensagem, na mesma ordem.
     """
-    send_email(subject, recipients, html_body)
+    if not mensagens:
+        return []
+    tamanho = app.config.get('EMAIL_TAMANHO_LOTE', 50)
+    lotes = [mensagens[i:i + tamanho] for i in range(0, len(mensagens), tamanho)]
+
+    with ThreadPoolExecutor(max_workers=min(app.config.get('EMAIL_CONEXOES', 4), len(lotes))) as pool:
+        resultados = pool.map(lambda lote: _enviar_lote(app, lote), lotes)
+        return [erro for erros_lote in resultados for erro in erros_lote]
+
+
+# --- 2. Fila Persistente de E-mails ---
 
+def _item_fila(subject, recipients, html_body, text_body=None):
+    """EmailFila ainda não gravado, ou None se não houver destinatário (o contato do cliente é opcional)."""
+    destinatarios = [d for d in recipients if d]
+    if not destinatarios:
+        return None
+    return EmailFila(assunto=subject, destinatarios=','.join(destinatarios), corpo_html=html_body,
+                     corpo_texto=text_body)
 
-# --- 3. Função de Verificação de Lembretes (Tarefa Agendada) ---
 
-def check_for_reminders(app):
-    """Tarefa diária que verifica reservas que começam amanhã."""
+def enfileirar_email(subject, recipients, html_body, text_body=None):
+    """
+    Grava o e-mail na fila (tabela email_fila) e retorna o item; o envio é feito em segundo plano.
+
+    O worker roda só no processo líder do agendador, então o e-mail sai na próxima execução:
+    a espera máxima é EMAIL_FILA_INTERVALO segundos (antecipar o job deste processo não
+    acordaria o líder, só gravaria no jobstore a cada e-mail).
+    """
+    item = _item_fila(subject, recipients, html_body, text_body)
+    if item is None:
+        return None
+    db.session.add(item)
+    db.session.commit()
+    return item
+
+
+def _registrar_resultado(app, item, erro):
+    """Atualiza o item da fila após a tentativa de envio."""
+    item.reservado_em = None
+    if erro is None:
+        item.status = 'enviado'
+        item.data_envio = datetime.utcnow()
+        item.ultimo_erro = None
+        return
+
+    item.tentativas += 1
+    item.ultimo_erro = str(erro)
+    if item.tentativas >= app.config.get('EMAIL_MAX_TENTATIVAS', 5):
+        item.status = 'falhou'
+    else:
+        # Backoff exponencial: 30s, 60s, 120s, ...
+        espera = app.config.get('EMAIL_BACKOFF_BASE', 30) * 2 ** (item.tentativas - 1)
+        item.status = 'pendente'
+        item.proxima_tentativa = datetime.utcnow() + timedelta(seconds=espera)
+
+
+def processar_fila_emails(app=None):
+    """Tarefa periódica que envia os e-mails pendentes da fila em lotes."""
+    app = app or scheduler.app
+    with app.app_context():
+        agora = datetime.utcnow()
+
+        # Devolve para a fila mensagens presas em 'enviando' (ex.: processo reiniciado no meio do envio)
+        EmailFila.query.filter(
+            EmailFila.status == 'enviando',
+            EmailFila.reservado_em < agora - timedelta(minutes=10)
+        ).update({'status': 'pendente', 'reservado_em': None}, synchronize_session=False)
+        db.session.commit()
+
+        candidatos = [item_id for (item_id,) in db.session.query(EmailFila.id).filter(
+            EmailFila.status == 'pendente',
+            EmailFila.proxima_tentativa <= agora
+        ).order_by(EmailFila.id).limit(app.config.get('EMAIL_LOTE', 50)).all()]
+
+        # Reserva cada item com um UPDATE condicional para que dois workers não enviem a mesma mensagem
+        reservados = []
+        for item_id in candidatos:
+            atualizados = EmailFila.query.filter_by(id=item_id, status='pendente').update(
+                {'status': 'enviando', 'reservado_em': agora}, synchronize_session=False
+            )
+            if atualizados:
+                reservados.append(item_id)
+        db.session.commit()
+
+        if not reservados:
+            return
+
+        itens = EmailFila.query.filter(EmailFila.id.in_(reservados)).order_by(EmailFila.id).all()
+        mensagens = []
+        for item in itens:
+            msg = Message(item.assunto, recipients=item.lista_destinatarios)
+            msg.body = item.corpo_texto
+            msg.html = item.corpo_html
+            mensagens.append(msg)
+
+        erros = enviar_em_lote(app, mensagens)
+        for item, erro in zip(itens, erros):
+            _registrar_resultado(app, item, erro)
+        db.session.commit()
+        print(f"Fila de e-mails: {erros.count(None)} enviados, {len(erros) - erros.count(None)} com falha.")
+
+
+# --- 3. Função de Envio de Confirmação Imediata ---
+
+def send_confirmation_email(reserva):
+    """Enfileira o e-mail de confirmação logo após a criação da reserva."""
+    email = renderizar('confirmacao', contexto_reserva(reserva))
+    return enfileirar_email(email.assunto, [reserva.cliente_contato], email.html, email.texto)
+
+
+# --- 4. Função de Verificação de Lembretes (Tarefa Agendada) ---
+
+def check_for_reminders(app=None):
+    """
+    Tarefa diária que enfileira os lembretes das reservas que começam amanhã.
+
+    Os lembretes passam pela fila como as confirmações: quem envia é o worker, com as
+    novas tentativas (backoff) em caso de falha do servidor SMTP.
+    """
+    app = app or scheduler.app
     with app.app_context():
         # Define "amanhã"
         amanha = (datetime.now() + timedelta(days=1)).date()
+        depois_de_amanha = amanha + timedelta(days=1)
 
-        # Consulta reservas que iniciam amanhã
-        reservas_amanha = Reserva.query.filter(
-            Reserva.data_inicio == amanha
+        # Uma única consulta, já com o equipamento de cada reserva (intervalo usa o índice de data_inicio)
+        reservas_amanha = Reserva.query.options(joinedload(Reserva.equipamento)).filter(
+            Reserva.data_inicio >= amanha,
+            Reserva.data_inicio < depois_de_amanha,
+            Reserva.finalizada.isnot(True)
         ).all()
 
         print(f"Verificação de lembretes: {len(reservas_amanha)} reservas encontradas para amanhã ({amanha}).")
 
+        itens = []
         for reserva in reservas_amanha:
-            send_reminder_email(reserva)
+            email = renderizar('lembrete', contexto_reserva(reserva))
+            item = _item_fila(email.assunto, [reserva.cliente_contato], email.html, email.texto)
+            if item is not None:
+                itens.append(item)
+        # Um único commit para o lote inteiro
+        db.session.add_all(itens)
+        db.session.commit()
+        print(f"Lembretes enfileirados: {len(itens)}.")
+
+
+def _mensagem_lembrete(reserva):
+    """Monta a mensagem de lembrete (texto + HTML) enviada 1 dia antes da retirada."""
+    email = renderizar('lembrete', contexto_reserva(reserva))
+    msg = Message(email.assunto, recipients=[reserva.cliente_contato])
+    msg.body = email.texto
+    msg.html = email.html
+    return msg
 
 
 def send_reminder_email(reserva):
-    """Envia o e-mail de lembrete 1 dia antes da retirada."""
-    subject = f"Lembrete: Sua Reserva de {reserva.equipamento.nome} Começa Amanhã!"
-    recipients = [reserva.cliente_email]
-
-    data_inicio_fmt = reserva.data_inicio.strftime('%d/%m/%Y')
-
-    html_body = f"""
-    <h2>Prezado(a) {reserva.cliente_nome},</h2>
-    <p>Sua reserva está marcada para começar **amanhã**, {data_inicio_fmt}.</p>
-    <p>Por favor, dirija-se ao nosso ponto de retirada com os seguintes detalhes:</p>
-
-    <h3>Detalhes da Retirada:</h3>
-    <ul>
-        <li><strong>Item Reservado:</strong> {reserva.equipamento.nome}</li>
-        <li><strong>Local de Retirada:</strong> [Seu Endereço de Retirada Aqui]</li>
-        <li><strong>Horário:</strong> [Seu Horário de Funcionamento Aqui]</li>
-        <li><strong>Documentação Necessária:</strong> Documento de Identidade e Comprovante de Residência.</li>
-    </ul>
-    <p>Em caso de dúvidas, responda a este e-mail ou ligue para [Seu Telefone].</p>
-    """
-    send_email(subject, recipients, html_body)
+    """Envia o e-mail de lembrete de uma única reserva."""
+    msg = _mensagem_lembrete(reserva)
+    send_email(msg.subject, msg.recipients, msg.html, msg.body)
 
 
-# --- 4. Agendamento da Tarefa ---
+# --- 5. Agendamento das Tarefas ---
 
 def agendar_tarefas_diarias(app):
-    """Adiciona a tarefa diária ao APScheduler."""
-    # Remove qualquer tarefa anterior com o mesmo ID
-    if scheduler.get_job('daily_reminder_check'):
-        scheduler.remove_job('daily_reminder_check')
+    """
+    Adiciona a tarefa diária e o worker da fila de e-mails ao APScheduler.
 
-    # Agenda para rodar todos os dias às 8:00 (ajuste o horário conforme necessário)
+    As tarefas ficam no jobstore persistente, por isso são referenciadas pelo nome
+    (texto) e recebem o app pelo `scheduler.app`, sem argumentos.
+    """
+    # A tarefa diária existente é mantida: substituí-la recalcularia o próximo horário
+    # e uma execução perdida durante um reinício não seria recuperada
+    if not scheduler.get_job('daily_reminder_check'):
+        # Agenda para rodar todos os dias às 8:00 (ajuste o horário conforme necessário)
+        scheduler.add_job(
+            id='daily_reminder_check',
+            func='app.utils.email_tasks:check_for_reminders',
+            trigger='cron',
+            hour=8,
+            minute=0,
+            coalesce=True,
+            misfire_grace_time=app.config.get('LEMBRETES_TOLERANCIA_ATRASO', 12 * 3600)  # Os lembretes ainda valem no mesmo dia
+        )
+
+    # Worker da fila de e-mails (uma execução por vez; execuções atrasadas são agrupadas).
+    # O intervalo é o atraso máximo entre enfileirar um e-mail e enviá-lo
     scheduler.add_job(
-        id='daily_reminder_check',
-        func=check_for_reminders,
-        args=[app],
-        trigger='cron',
-        hour=8,
-        minute=0,
-        misfire_grace_time=3600  # Executa mesmo se falhar por 1h
-    )
\ No newline at end of file
+        id='processar_fila_emails',
+        func='app.utils.email_tasks:processar_fila_emails',
+        trigger='interval',
+        seconds=app.config.get('EMAIL_FILA_INTERVALO', 10),
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True
+    )
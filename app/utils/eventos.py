@@ -0,0 +1,73 @@
+# Arquivo: app/utils/eventos.py
+
+from collections import namedtuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+
+# Uma alteração confirmada em um modelo. `dados` guarda os valores das colunas
+# no momento do flush e `anterior` os valores antigos das colunas alteradas.
+Alteracao = namedtuple('Alteracao', ['acao', 'tabela', 'dados', 'anterior'])
+
+_ouvintes_commit = []
+
+_CHAVE_PENDENTES = 'alteracoes_pendentes'
+
+
+def ao_confirmar(func):
+    """Registra uma função chamada com a lista de alterações após cada commit."""
+    _ouvintes_commit.append(func)
+    return func
+
+
+def _instantaneo(obj):
+    """Copia os valores das colunas e os valores antigos das colunas alteradas."""
+    estado = inspect(obj)
+    dados, anterior = {}, {}
+    for attr in estado.mapper.column_attrs:
+        dados[attr.key] = getattr(obj, attr.key)
+        historico = estado.attrs[attr.key].history
+        if historico.deleted:
+            anterior[attr.key] = historico.deleted[0]
+    return dados, anterior
+
+
+def registrar_alteracao(session, acao, tabela, dados, anterior=None):
+    """Registra manualmente uma alteração (usado por operações em lote que não passam pelo flush)."""
+    session.info.setdefault(_CHAVE_PENDENTES, []).append(
+        Alteracao(acao, tabela, dados, anterior or {})
+    )
+
+
+# -----------------------------------------------
+# Ouvintes da Sessão (valem para todas as sessões do SQLAlchemy)
+# -----------------------------------------------
+
+@event.listens_for(Session, 'after_flush')
+def _coletar_alteracoes(session, flush_context):
+    # Os valores são copiados aqui porque após o commit os objetos ficam expirados
+    # e o SQLAlchemy não permite novas consultas dentro do after_commit.
+    for acao, objetos in (('nova', session.new), ('alterada', session.dirty), ('removida', session.deleted)):
+        for obj in objetos:
+            if acao == 'alterada' and not session.is_modified(obj, include_collections=False):
+                continue
+            dados, anterior = _instantaneo(obj)
+            registrar_alteracao(session, acao, obj.__tablename__, dados, anterior)
+
+
+@event.listens_for(Session, 'after_commit')
+def _despachar_alteracoes(session):
+    alteracoes = session.info.pop(_CHAVE_PENDENTES, None)
+    if not alteracoes:
+        return
+    for ouvinte in _ouvintes_commit:
+        try:
+            ouvinte(alteracoes)
+        except Exception as e:
+            # Um ouvinte com problema não pode desfazer um commit já realizado
+            print(f"ERRO no ouvinte de commit {ouvinte.__name__}: {e}")
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_alteracoes(session):
+    session.info.pop(_CHAVE_PENDENTES, None)
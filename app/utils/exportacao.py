@@ -0,0 +1,123 @@
+# Arquivo: app/utils/exportacao.py
+
+import csv
+import os
+import tempfile
+from datetime import date, datetime, time, timedelta
+
+from app import db
+from app.models import Equipamento, Reserva
+
+
+# Linhas buscadas por vez no cursor do banco (a memória não cresce com o tamanho do histórico)
+LINHAS_POR_LOTE = 1000
+
+CABECALHO_RESERVAS = ['id', 'equipamento', 'cliente_nome', 'cliente_contato', 'data_inicio', 'data_fim',
+                      'dias', 'finalizada', 'data_criacao']
+CABECALHO_EQUIPAMENTOS = ['id', 'nome', 'descricao', 'status', 'data_cadastro']
+
+
+class _Eco:
+    """Objeto com `write` que só devolve o texto, para o csv.writer gerar linha a linha."""
+
+    def write(self, valor):
+        return valor
+
+
+# -----------------------------------------------
+# LINHAS (geradores sobre a consulta)
+# -----------------------------------------------
+
+def linhas_reservas(data_inicio=None, data_fim=None):
+    query = db.session.query(
+        Reserva.id, Equipamento.nome, Reserva.cliente_nome, Reserva.cliente_contato,
+        Reserva.data_inicio, Reserva.data_fim, Reserva.finalizada, Reserva.data_criacao
+    ).join(Equipamento, Reserva.equipamento_id == Equipamento.id)
+    # As colunas são DateTime: comparar com datetimes mantém o último dia do período incluído
+    if data_inicio:
+        query = query.filter(Reserva.data_fim >= datetime.combine(data_inicio, time.min))
+    if data_fim:
+        query = query.filter(Reserva.data_inicio < datetime.combine(data_fim + timedelta(days=1), time.min))
+
+    for reserva_id, equipamento, cliente, contato, inicio, fim, finalizada, criacao in \
+            query.order_by(Reserva.data_inicio, Reserva.id).yield_per(LINHAS_POR_LOTE):
+        yield [reserva_id, equipamento, cliente, contato, inicio.date(), fim.date(),
+               (fim - inicio).days + 1, bool(finalizada), criacao]
+
+
+def linhas_equipamentos(status=None):
+    query = db.session.query(
+        Equipamento.id, Equipamento.nome, Equipamento.descricao, Equipamento.status, Equipamento.data_cadastro
+    )
+    if status:
+        query = query.filter(Equipamento.status == status)
+
+    for linha in query.order_by(Equipamento.id).yield_per(LINHAS_POR_LOTE):
+        yield list(linha)
+
+
+# -----------------------------------------------
+# FORMATOS
+# -----------------------------------------------
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat(sep=' ') if isinstance(valor, datetime) else valor.isoformat()
+    return valor
+
+
+def gerar_csv(cabecalho, linhas):
+    """Gera o CSV uma linha por vez (os bytes começam a ser enviados antes do fim da consulta)."""
+    escritor = csv.writer(_Eco())
+    # BOM para o Excel reconhecer UTF-8 (acentos nos nomes)
+    yield '﻿' + escritor.writerow(cabecalho)
+    for linha in linhas:
+        yield escritor.writerow([_texto(valor) for valor in linha])
+
+
+def xlsx_disponivel():
+    try:
+        import xlsxwriter  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def gerar_xlsx(cabecalho, linhas, tamanho_bloco=64 * 1024):
+    """
+    Gera um XLSX com o xlsxwriter em modo constant_memory (cada linha vai para o disco ao ser escrita).
+
+    O formato é um ZIP, então o arquivo só pode ser enviado depois de fechado;
+    a memória continua limitada e o envio é feito em blocos.
+    """
+    import xlsxwriter
+
+    descritor, caminho = tempfile.mkstemp(suffix='.xlsx')
+    os.close(descritor)
+    try:
+        planilha_arquivo = xlsxwriter.Workbook(caminho, {'constant_memory': True})
+        planilha = planilha_arquivo.add_worksheet()
+        formato_data = planilha_arquivo.add_format({'num_format': 'dd/mm/yyyy'})
+        formato_data_hora = planilha_arquivo.add_format({'num_format': 'dd/mm/yyyy hh:mm'})
+
+        planilha.write_row(0, 0, cabecalho)
+        for numero, linha in enumerate(linhas, start=1):
+            for coluna, valor in enumerate(linha):
+                if isinstance(valor, datetime):
+                    planilha.write_datetime(numero, coluna, valor, formato_data_hora)
+                elif isinstance(valor, date):
+                    planilha.write_datetime(numero, coluna, datetime.combine(valor, datetime.min.time()), formato_data)
+                else:
+                    planilha.write(numero, coluna, valor)
+        planilha_arquivo.close()
+
+        with open(caminho, 'rb') as arquivo:
+            while True:
+                bloco = arquivo.read(tamanho_bloco)
+                if not bloco:
+                    break
+                yield bloco
+    finally:
+        os.remove(caminho)
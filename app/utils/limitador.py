@@ -0,0 +1,46 @@
+# Arquivo: app/utils/limitador.py
+
+import math
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+class LimitadorTaxa:
+    """
+    Token bucket por chave (ex.: IP ou nome de usuário), em memória.
+
+    Cada chave começa com `capacidade` fichas e recupera `por_minuto` fichas por minuto;
+    cada tentativa consome uma. Sem fichas, a tentativa é recusada.
+    Os limites valem por processo (com N workers, cada um tem seus baldes).
+    Guarda no máximo `max_chaves` baldes: passando disso, o usado há mais tempo é descartado.
+    """
+
+    def __init__(self, capacidade, por_minuto, max_chaves=10000):
+        self.capacidade = capacidade
+        self.taxa = por_minuto / 60.0
+        self.max_chaves = max_chaves
+        self._baldes = OrderedDict()  # {chave: (fichas, atualizado_em)}, do uso mais antigo ao mais recente
+        self._lock = Lock()
+
+    def _fichas(self, chave, agora):
+        fichas, atualizado_em = self._baldes.get(chave, (self.capacidade, agora))
+        return min(self.capacidade, fichas + (agora - atualizado_em) * self.taxa)
+
+    def _guardar(self, chave, fichas, agora):
+        """Grava o balde como o usado mais recentemente, descartando o mais antigo (LRU) se passar do limite."""
+        self._baldes[chave] = (fichas, agora)
+        self._baldes.move_to_end(chave)
+        if len(self._baldes) > self.max_chaves:
+            self._baldes.popitem(last=False)
+
+    def consumir(self, chave):
+        """Consome uma ficha; retorna 0 se permitido ou os segundos até a próxima ficha."""
+        agora = time.monotonic()
+        with self._lock:
+            fichas = self._fichas(chave, agora)
+            if fichas < 1:
+                self._guardar(chave, fichas, agora)
+                return math.ceil((1 - fichas) / self.taxa)
+            self._guardar(chave, fichas - 1, agora)
+            return 0
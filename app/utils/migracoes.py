@@ -0,0 +1,154 @@
+# Arquivo: app/utils/migracoes.py
+
+import os
+from contextlib import contextmanager
+from datetime import datetime
+
+from flask import current_app
+
+from app import db
+
+
+# Registro das migrações já aplicadas neste banco
+migracao_aplicada = db.Table(
+    'migracao_aplicada',
+    db.Column('nome', db.String(100), primary_key=True),
+    db.Column('aplicada_em', db.DateTime, nullable=False, default=datetime.utcnow),
+)
+
+
+# -----------------------------------------------
+# MIGRAÇÕES (executadas em ordem, uma única vez por banco)
+# -----------------------------------------------
+
+def _criar_indices(conexao):
+    """Cria os índices declarados nos modelos que ainda não existem (db.create_all não altera tabelas existentes)."""
+    for tabela in db.metadata.sorted_tables:
+        for indice in tabela.indexes:
+            indice.create(conexao, checkfirst=True)
+
+
+def _adicionar_coluna(conexao, tabela, coluna):
+    """ALTER TABLE ... ADD COLUMN com a definição do modelo, se a coluna ainda não existir."""
+    existentes = {c['name'] for c in db.inspect(conexao).get_columns(tabela)}
+    if coluna in existentes:
+        return  # Banco criado depois da alteração do modelo (db.create_all já incluiu a coluna)
+    definicao = db.metadata.tables[tabela].c[coluna]
+    ddl = f'{coluna} {definicao.type.compile(dialect=conexao.dialect)}'
+    if definicao.server_default is not None:
+        # Colunas NOT NULL só podem ser adicionadas com um DEFAULT para as linhas existentes
+        ddl += f" DEFAULT '{definicao.server_default.arg}'"
+        if not definicao.nullable:
+            ddl += ' NOT NULL'
+    conexao.execute(db.text(f'ALTER TABLE {tabela} ADD COLUMN {ddl}'))
+
+
+def _email_corpo_texto(conexao):
+    _adicionar_coluna(conexao, 'email_fila', 'corpo_texto')
+
+
+def _resumo_diario(conexao):
+    """Preenche a tabela resumo_diario (criada pelo db.create_all) com as reservas já existentes."""
+    from app.utils.resumos import recalcular_tudo
+    recalcular_tudo(conexao)
+
+
+def _busca_fts(conexao):
+    """Índices de busca textual (FTS5) sincronizados por triggers; só no SQLite."""
+    from app.utils.busca import criar_indices_fts
+    criar_indices_fts(conexao)
+
+
+def _equipamento_versao(conexao):
+    _adicionar_coluna(conexao, 'equipamento', 'versao')
+
+
+MIGRACOES = [
+    ('0001_indices_reserva', _criar_indices),
+    ('0002_email_corpo_texto', _email_corpo_texto),
+    ('0003_resumo_diario', _resumo_diario),
+    ('0004_busca_fts', _busca_fts),
+    ('0005_equipamento_versao', _equipamento_versao),
+]
+
+
+# Chave do pg_advisory_lock que serializa as migrações no PostgreSQL
+_CHAVE_TRAVA_POSTGRES = 7_040_025
+
+
+@contextmanager
+def _trava_migracoes():
+    """
+    Serializa as migrações entre processos que iniciam juntos (ex.: workers do gunicorn).
+
+    PostgreSQL: advisory lock. SQLite em arquivo: flock em instance/migracoes.lock (mesmo
+    servidor, como o lock do agendador). Outros casos (banco em memória, sem fcntl): sem trava.
+    """
+    engine = db.engine
+    if engine.dialect.name == 'postgresql':
+        with engine.connect() as conexao:
+            conexao.exec_driver_sql(f'SELECT pg_advisory_lock({_CHAVE_TRAVA_POSTGRES})')
+            try:
+                yield
+            finally:
+                conexao.exec_driver_sql(f'SELECT pg_advisory_unlock({_CHAVE_TRAVA_POSTGRES})')
+                conexao.commit()
+        return
+
+    try:
+        import fcntl
+    except ImportError:
+        fcntl = None
+    if engine.dialect.name != 'sqlite' or engine.url.database in (None, '', ':memory:') or fcntl is None:
+        yield
+        return
+
+    os.makedirs(current_app.instance_path, exist_ok=True)
+    with open(os.path.join(current_app.instance_path, 'migracoes.lock'), 'a+') as arquivo:
+        fcntl.flock(arquivo, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(arquivo, fcntl.LOCK_UN)
+
+
+def migracoes_pendentes():
+    """Nomes das migrações ainda não aplicadas neste banco (todas, se o banco ainda não tem a tabela de registro)."""
+    if not db.inspect(db.engine).has_table(migracao_aplicada.name):
+        return [nome for nome, _ in MIGRACOES]
+    with db.engine.connect() as conexao:
+        aplicadas = {linha.nome for linha in conexao.execute(db.select(migracao_aplicada.c.nome))}
+    return [nome for nome, _ in MIGRACOES if nome not in aplicadas]
+
+
+def aplicar_migracoes():
+    """Cria as tabelas que faltam e aplica as migrações pendentes. Deve ser chamada dentro do app_context."""
+    import app.models  # noqa: F401 - garante que todos os modelos estejam registrados no metadata
+
+    with _trava_migracoes():
+        # Quem esperou a trava encontra o trabalho já feito e só confere o registro
+        db.create_all()
+        with db.engine.begin() as conexao:
+            aplicadas = {linha.nome for linha in conexao.execute(db.select(migracao_aplicada.c.nome))}
+            for nome, migracao in MIGRACOES:
+                if nome in aplicadas:
+                    continue
+                migracao(conexao)
+                conexao.execute(migracao_aplicada.insert().values(nome=nome, aplicada_em=datetime.utcnow()))
+                print(f"Migração aplicada: {nome}")
+
+
+def preparar_banco(app):
+    """
+    Na inicialização (create_app): aplica as migrações pendentes, para nenhum processo servir
+    requisições com um esquema antigo (ex.: sem equipamento.versao).
+
+    Com MIGRAR_AO_INICIAR = False (migrações feitas no deploy com `flask migrar`), só avisa.
+    """
+    with app.app_context():
+        if app.config.get('MIGRAR_AO_INICIAR', True):
+            aplicar_migracoes()
+            return
+        pendentes = migracoes_pendentes()
+        if pendentes:
+            print(f"Aviso: migrações pendentes ({', '.join(pendentes)}); rode `flask migrar` antes de atender requisições.")
@@ -0,0 +1,100 @@
+# Arquivo: app/utils/ocupacao.py
+
+import base64
+from datetime import datetime, time, timedelta
+
+from app import db
+from app.models import Equipamento, Reserva
+
+
+FORMATOS = ('rle', 'bitset')
+
+
+def numpy_disponivel():
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def matriz_ocupacao(inicio, fim, incluir_finalizadas=False):
+    """
+    Matriz equipamento × dia (de `inicio` a `fim`, inclusive) com o número de reservas em cada dia.
+
+    Uma consulta de equipamentos e uma de reservas que cruzam o período; a matriz é
+    preenchida marcando +1 no primeiro dia e -1 no dia seguinte ao último de cada
+    reserva e acumulando (cumsum) ao longo dos dias. Valores > 1 indicam sobreposição.
+    Retorna (lista de (id, nome), matriz numpy int32).
+    """
+    import numpy as np
+
+    equipamentos = db.session.query(Equipamento.id, Equipamento.nome).order_by(Equipamento.nome, Equipamento.id).all()
+    dias = (fim - inicio).days + 1
+
+    query = db.session.query(Reserva.equipamento_id, Reserva.data_inicio, Reserva.data_fim).filter(
+        Reserva.data_fim >= datetime.combine(inicio, time.min),
+        Reserva.data_inicio < datetime.combine(fim + timedelta(days=1), time.min)
+    )
+    if not incluir_finalizadas:
+        query = query.filter(Reserva.finalizada.isnot(True))
+    reservas = query.all()
+
+    delta = np.zeros((len(equipamentos), dias + 1), dtype=np.int32)
+    if reservas and equipamentos:
+        ids = np.array([equipamento_id for equipamento_id, _ in equipamentos])
+        ordem = np.argsort(ids)
+        equipamento_ids, inicios, fins = zip(*reservas)
+        equipamento_ids = np.array(equipamento_ids)
+        posicoes = np.minimum(np.searchsorted(ids, equipamento_ids, sorter=ordem), len(ids) - 1)
+        linhas = ordem[posicoes]
+        existentes = ids[linhas] == equipamento_ids  # Ignora reservas de equipamentos já excluídos
+
+        base = np.datetime64(inicio, 'D')
+        linhas = linhas[existentes]
+        inicios = np.array(inicios, dtype='datetime64[D]')[existentes]
+        fins = np.array(fins, dtype='datetime64[D]')[existentes]
+        colunas_inicio = np.clip((inicios - base).astype(np.int64), 0, dias)
+        colunas_fim = np.clip((fins - base).astype(np.int64) + 1, 0, dias)
+
+        np.add.at(delta, (linhas, colunas_inicio), 1)
+        np.add.at(delta, (linhas, colunas_fim), -1)
+
+    return equipamentos, np.cumsum(delta[:, :dias], axis=1, dtype=np.int32)
+
+
+def codificar_rle(linha):
+    """Trechos ocupados da linha como [dia_inicial, quantidade_de_dias, reservas]; dias livres são omitidos."""
+    import numpy as np
+
+    if not linha.any():
+        return []
+    # Posições onde o valor muda (com bordas), e o valor de cada trecho
+    mudancas = np.flatnonzero(np.diff(linha, prepend=linha[0] - 1))
+    comprimentos = np.diff(np.append(mudancas, len(linha)))
+    valores = linha[mudancas]
+    ocupados = valores > 0
+    return np.column_stack((mudancas[ocupados], comprimentos[ocupados], valores[ocupados])).tolist()
+
+
+def codificar_bitset(linha):
+    """Um bit por dia (1 = ocupado), do primeiro dia no bit mais significativo, em base64."""
+    import numpy as np
+
+    return base64.b64encode(np.packbits(linha > 0).tobytes()).decode('ascii')
+
+
+def ocupacao(inicio, fim, formato='rle', incluir_finalizadas=False):
+    """Grade de ocupação pronta para JSON (ver matriz_ocupacao e os codificadores)."""
+    equipamentos, matriz = matriz_ocupacao(inicio, fim, incluir_finalizadas)
+    codificar = codificar_rle if formato == 'rle' else codificar_bitset
+    return {
+        'inicio': inicio.isoformat(),
+        'fim': fim.isoformat(),
+        'dias': (fim - inicio).days + 1,
+        'formato': formato,
+        'equipamentos': [
+            {'id': equipamento_id, 'nome': nome, 'ocupacao': codificar(linha)}
+            for (equipamento_id, nome), linha in zip(equipamentos, matriz)
+        ],
+    }
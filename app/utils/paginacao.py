@@ -0,0 +1,131 @@
+# Arquivo: app/utils/paginacao.py
+
+import base64
+import json
+from datetime import date, datetime
+
+from flask import current_app
+from sqlalchemy import and_, or_
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+class Pagina:
+    """Resultado de uma consulta paginada por cursor (keyset)."""
+
+    def __init__(self, itens, limite, proximo=None, anterior=None):
+        self.itens = itens
+        self.limite = limite
+        self.proximo = proximo
+        self.anterior = anterior
+
+    def __iter__(self):
+        return iter(self.itens)
+
+    def __len__(self):
+        return len(self.itens)
+
+    def cabecalhos(self):
+        """Cabeçalhos HTTP com os cursores, para as respostas da API."""
+        cabecalhos = {}
+        if self.proximo:
+            cabecalhos['X-Proximo-Cursor'] = self.proximo
+        if self.anterior:
+            cabecalhos['X-Cursor-Anterior'] = self.anterior
+        return cabecalhos
+
+
+def _serializar(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return valor
+
+
+def _desserializar(valor, coluna):
+    tipo = coluna.type.python_type
+    if tipo is datetime:
+        return datetime.fromisoformat(valor)
+    if tipo is date:
+        return date.fromisoformat(valor)
+    return tipo(valor)
+
+
+def codificar_cursor(direcao, valores):
+    conteudo = json.dumps({'d': direcao, 'v': [_serializar(v) for v in valores]})
+    return base64.urlsafe_b64encode(conteudo.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(token, colunas):
+    """Retorna (direcao, valores) ou levanta CursorInvalido."""
+    try:
+        preenchimento = '=' * (-len(token) % 4)
+        conteudo = json.loads(base64.urlsafe_b64decode(token + preenchimento))
+        direcao, valores = conteudo['d'], conteudo['v']
+        if direcao not in ('p', 'a') or len(valores) != len(colunas):
+            raise ValueError
+        return direcao, [_desserializar(v, c) for v, c in zip(valores, colunas)]
+    except (ValueError, TypeError, KeyError):
+        raise CursorInvalido('Cursor de paginação inválido.')
+
+
+def ler_limite(valor):
+    """Converte o parâmetro `limite` respeitando o padrão e o máximo configurados."""
+    padrao = current_app.config.get('PAGINACAO_LIMITE_PADRAO', 50)
+    maximo = current_app.config.get('PAGINACAO_LIMITE_MAXIMO', 200)
+    try:
+        limite = int(valor) if valor else padrao
+    except ValueError:
+        limite = padrao
+    return max(1, min(limite, maximo))
+
+
+def _apos(colunas, valores, depois=True):
+    """Condição (c1, c2, ...) > (v1, v2, ...) expandida (ou < se depois=False)."""
+    condicoes = []
+    for i, (coluna, valor) in enumerate(zip(colunas, valores)):
+        iguais = [c == v for c, v in zip(colunas[:i], valores[:i])]
+        comparacao = coluna > valor if depois else coluna < valor
+        condicoes.append(and_(*iguais, comparacao))
+    return or_(*condicoes)
+
+
+def paginar(query, colunas, cursor=None, limite=50):
+    """
+    Pagina `query` ordenando pelas `colunas` (a última deve ser única, ex.: id).
+
+    Em vez de OFFSET, o cursor guarda os valores da última (ou primeira) linha
+    exibida, então o custo de cada página não cresce com o histórico.
+    """
+    direcao, valores = 'p', None
+    if cursor:
+        direcao, valores = decodificar_cursor(cursor, colunas)
+
+    if valores is not None:
+        query = query.filter(_apos(colunas, valores, depois=(direcao == 'p')))
+
+    if direcao == 'p':
+        query = query.order_by(*colunas)
+    else:
+        query = query.order_by(*[c.desc() for c in colunas])
+
+    linhas = query.limit(limite + 1).all()
+    ha_mais = len(linhas) > limite
+    itens = linhas[:limite]
+    if direcao == 'a':
+        itens.reverse()
+
+    def chave(item):
+        return [getattr(item, c.key) for c in colunas]
+
+    proximo = anterior = None
+    if itens:
+        if direcao == 'p':
+            proximo = codificar_cursor('p', chave(itens[-1])) if ha_mais else None
+            anterior = codificar_cursor('a', chave(itens[0])) if valores is not None else None
+        else:
+            proximo = codificar_cursor('p', chave(itens[-1]))
+            anterior = codificar_cursor('a', chave(itens[0])) if ha_mais else None
+
+    return Pagina(itens, limite, proximo, anterior)
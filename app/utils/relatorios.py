@@ -0,0 +1,69 @@
+# Arquivo: app/utils/relatorios.py
+
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import Equipamento, Reserva
+
+
+# Janelas de tempo aceitas pelos rankings (em dias); None = todo o histórico
+PERIODOS_VALIDOS = (30, 90, 365)
+
+
+def ler_periodo(valor):
+    """Converte o parâmetro `periodo` em um número de dias válido ou None."""
+    try:
+        dias = int(valor)
+    except (TypeError, ValueError):
+        return None
+    return dias if dias in PERIODOS_VALIDOS else None
+
+
+def _filtrar_periodo(query, dias):
+    if dias:
+        query = query.filter(Reserva.data_inicio >= datetime.now() - timedelta(days=dias))
+    return query
+
+
+def _dias_reservados():
+    """Expressão SQL equivalente a Reserva.duracao_dias() (o dia final é incluso)."""
+    if db.engine.dialect.name == 'sqlite':
+        diferenca = db.func.julianday(Reserva.data_fim) - db.func.julianday(Reserva.data_inicio)
+    else:
+        diferenca = db.func.extract('epoch', Reserva.data_fim - Reserva.data_inicio) / 86400
+    return db.cast(diferenca, db.Integer) + 1
+
+
+def top_clientes(limite=5, dias=None):
+    """Clientes com mais reservas: lista de (cliente_nome, total)."""
+    total = db.func.count(Reserva.id).label('total')
+    query = db.session.query(Reserva.cliente_nome, total)
+    query = _filtrar_periodo(query, dias)
+    return query.group_by(Reserva.cliente_nome).order_by(total.desc(), Reserva.cliente_nome).limit(limite).all()
+
+
+def top_equipamentos(limite=5, dias=None):
+    """Equipamentos mais reservados: lista de (id, nome, total)."""
+    total = db.func.count(Reserva.id).label('total')
+    query = db.session.query(Equipamento.id, Equipamento.nome, total).join(Reserva, Reserva.equipamento_id == Equipamento.id)
+    query = _filtrar_periodo(query, dias)
+    return query.group_by(Equipamento.id, Equipamento.nome).order_by(total.desc(), Equipamento.nome).limit(limite).all()
+
+
+def resumo_reservas(dias=None, apenas_ativas=False):
+    """Totais de reservas, dias reservados, clientes únicos e equipamentos reservados."""
+    query = db.session.query(
+        db.func.count(Reserva.id),
+        db.func.coalesce(db.func.sum(_dias_reservados()), 0),
+        db.func.count(db.distinct(Reserva.cliente_nome)),
+        db.func.count(db.distinct(Reserva.equipamento_id)),
+    )
+    if apenas_ativas:
+        query = query.filter(Reserva.finalizada.isnot(True))
+    total, total_dias, clientes, equipamentos = _filtrar_periodo(query, dias).one()
+    return {
+        'total_reservas': total,
+        'total_dias': int(total_dias),
+        'clientes_unicos': clientes,
+        'equipamentos_reservados': equipamentos,
+    }
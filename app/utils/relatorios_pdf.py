@@ -0,0 +1,428 @@
+# Arquivo: app/utils/relatorios_pdf.py
+
+import gc
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from threading import Lock
+
+from flask import current_app, render_template
+from sqlalchemy.orm import joinedload
+
+from app.models import Equipamento, Reserva
+from app.utils.versoes import versao_atual
+
+
+# Tabelas das quais cada relatório depende (a versão delas entra na chave do cache)
+DEPENDENCIAS = {
+    'reservas': ('reserva', 'equipamento'),
+    'equipamentos': ('equipamento',),
+}
+
+_JOB_ID_VALIDO = re.compile(r'^(%s)-[0-9a-f]{20}$' % '|'.join(DEPENDENCIAS))
+
+_lock = Lock()
+_processos = None  # conversão HTML -> PDF (CPU)
+_threads = None    # consulta + renderização do HTML de cada job
+
+
+# -----------------------------------------------
+# CONVERSÃO (executada nos processos do pool)
+# -----------------------------------------------
+
+def html_para_pdf(html, caminho):
+    """Converte o HTML em PDF e grava em `caminho`. Roda em um processo separado."""
+    from xhtml2pdf import pisa
+
+    resultado = io.BytesIO()
+    status = pisa.CreatePDF(html, dest=resultado)
+    if status.err:
+        raise RuntimeError('Erro na conversão do HTML para PDF')
+
+    temporario = f'{caminho}.{os.getpid()}.tmp'
+    with open(temporario, 'wb') as arquivo:
+        arquivo.write(resultado.getvalue())
+    os.replace(temporario, caminho)  # o PDF só aparece no cache quando está completo
+
+
+def _copiar_objeto(objeto, novo_id, ignorar=()):
+    """Cópia rasa de um objeto PDF com cada referência indireta trocada pela numeração do arquivo final."""
+    from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+
+    if isinstance(objeto, IndirectObject):
+        return IndirectObject(novo_id(objeto), 0, None)
+    if isinstance(objeto, DictionaryObject):
+        copia = objeto.__class__() if isinstance(objeto, StreamObject) else DictionaryObject()
+        for chave, valor in objeto.items():
+            if chave not in ignorar:
+                copia[chave] = _copiar_objeto(valor, novo_id)
+        if isinstance(objeto, StreamObject):
+            copia._data = objeto._data  # bytes como estão no arquivo (ainda comprimidos)
+        return copia
+    if isinstance(objeto, ArrayObject):
+        return ArrayObject(_copiar_objeto(valor, novo_id) for valor in objeto)
+    return objeto
+
+
+def juntar_pdfs(partes, caminho):
+    """
+    Concatena os PDFs das partes (na ordem) em um único arquivo. Roda em um processo separado.
+
+    Os objetos de cada parte são renumerados e gravados direto no arquivo final, uma parte
+    por vez: a memória de pico é a de uma parte aberta (até RELATORIO_PDF_LINHAS_POR_PARTE
+    linhas) mais a tabela de posições (xref), alguns bytes por objeto do relatório inteiro.
+    Um PdfWriter manteria todas as páginas em memória até o write. Só as páginas são
+    copiadas (com o que elas referenciam): os relatórios não têm marcadores nem links entre partes.
+    """
+    from pypdf import PdfReader
+    from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject, NumberObject
+
+    # Objetos 1 (catálogo) e 2 (árvore de páginas) são gravados no fim, quando as páginas são conhecidas
+    raiz_paginas = IndirectObject(2, 0, None)
+    posicoes = {}
+    paginas = []
+    proximo_id = 3
+
+    temporario = f'{caminho}.{os.getpid()}.tmp'
+    with open(temporario, 'wb') as arquivo:
+        arquivo.write(b'%PDF-1.7\n%\xe2\xe3\xcf\xd3\n')
+
+        def gravar(numero, objeto):
+            posicoes[numero] = arquivo.tell()
+            arquivo.write(b'%d 0 obj\n' % numero)
+            objeto.write_to_stream(arquivo)
+            arquivo.write(b'\nendobj\n')
+
+        for parte in partes:
+            leitor = PdfReader(parte)
+            ids = {}  # (número, geração) na parte -> número no arquivo final
+            pendentes = []
+
+            def novo_id(referencia):
+                nonlocal proximo_id
+                chave = (referencia.idnum, referencia.generation)
+                if chave not in ids:
+                    ids[chave] = proximo_id
+                    proximo_id += 1
+                    pendentes.append(chave)
+                return ids[chave]
+
+            # As páginas do leitor já trazem os atributos herdados da árvore original (Resources, MediaBox...)
+            for pagina in leitor.pages:
+                paginas.append(novo_id(pagina.indirect_reference))
+            while pendentes:
+                chave = pendentes.pop()
+                objeto = leitor.get_object(IndirectObject(*chave, leitor))
+                if isinstance(objeto, DictionaryObject) and objeto.get('/Type') == '/Page':
+                    # /Parent aponta para a árvore da parte, que não é copiada
+                    copia = _copiar_objeto(objeto, novo_id, ignorar=('/Parent',))
+                    copia[NameObject('/Parent')] = raiz_paginas
+                else:
+                    copia = _copiar_objeto(objeto, novo_id)
+                gravar(ids[chave], copia)
+            del leitor
+            gc.collect()  # o PdfReader tem ciclos de referência (páginas <-> leitor)
+
+        gravar(2, DictionaryObject({
+            NameObject('/Type'): NameObject('/Pages'),
+            NameObject('/Kids'): ArrayObject(IndirectObject(numero, 0, None) for numero in paginas),
+            NameObject('/Count'): NumberObject(len(paginas)),
+        }))
+        gravar(1, DictionaryObject({
+            NameObject('/Type'): NameObject('/Catalog'),
+            NameObject('/Pages'): raiz_paginas,
+        }))
+
+        inicio_xref = arquivo.tell()
+        arquivo.write(b'xref\n0 %d\n0000000000 65535 f \n' % proximo_id)
+        for numero in range(1, proximo_id):
+            arquivo.write(b'%010d 00000 n \n' % posicoes[numero])
+        arquivo.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (proximo_id, inicio_xref))
+    os.replace(temporario, caminho)
+
+
+def _pools():
+    global _processos, _threads
+    with _lock:
+        if _processos is None:
+            # 'spawn' evita copiar (fork) as threads do scheduler e as conexões abertas do processo web
+            _processos = ProcessPoolExecutor(
+                max_workers=current_app.config.get('RELATORIO_PROCESSOS', 2),
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        if _threads is None:
+            _threads = ThreadPoolExecutor(max_workers=current_app.config.get('RELATORIO_PROCESSOS', 2))
+        return _processos, _threads
+
+
+# -----------------------------------------------
+# CACHE EM DISCO
+# -----------------------------------------------
+
+def _pasta_cache():
+    pasta = current_app.config.get('RELATORIO_CACHE_DIR') or os.path.join(current_app.instance_path, 'relatorios')
+    os.makedirs(pasta, exist_ok=True)
+    return pasta
+
+
+def _caminhos(job_id):
+    if not _JOB_ID_VALIDO.match(job_id):
+        return None  # O id vem da URL: nunca montar caminhos com valores arbitrários
+    base = os.path.join(_pasta_cache(), job_id)
+    return {'pdf': base + '.pdf', 'processando': base + '.processando', 'erro': base + '.erro'}
+
+
+def chave_relatorio(tipo, filtros):
+    """Identificador do job: tipo + filtros + versão atual dos dados de que o relatório depende."""
+    versoes = [versao_atual(tabela)[0] for tabela in DEPENDENCIAS[tipo]]
+    conteudo = json.dumps({'tipo': tipo, 'filtros': filtros, 'versoes': versoes}, sort_keys=True, default=str)
+    return f"{tipo}-{hashlib.sha1(conteudo.encode('utf-8')).hexdigest()[:20]}"
+
+
+def _limpar_cache_antigo(pasta):
+    limite = time.time() - current_app.config.get('RELATORIO_CACHE_MAX_IDADE', 7 * 24 * 3600)
+    for nome in os.listdir(pasta):
+        caminho = os.path.join(pasta, nome)
+        try:
+            if os.path.getmtime(caminho) < limite:
+                os.remove(caminho)
+        except OSError:
+            pass
+
+
+def _criar_marcador(caminho, token):
+    """Cria o marcador de processamento com o token do job, só se ele ainda não existir (atômico entre processos)."""
+    try:
+        descritor = os.open(caminho, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(descritor, 'w') as arquivo:
+        arquivo.write(token)
+    return True
+
+
+def _remover_marcador(caminho, token):
+    """Remove o marcador se ele ainda for deste job (um marcador abandonado pode ter sido assumido por outro)."""
+    try:
+        with open(caminho) as arquivo:
+            if arquivo.read() != token:
+                return
+        os.remove(caminho)
+    except OSError:
+        pass
+
+
+def _descartar_marcador_abandonado(caminho):
+    # Renomeado antes de remover: de vários pedidos que viram o marcador vencido, só um o descarta
+    abandonado = f'{caminho}.{uuid.uuid4().hex}'
+    try:
+        os.rename(caminho, abandonado)
+        os.remove(abandonado)
+    except OSError:
+        pass
+
+
+def _em_processamento(caminhos):
+    """Há um job em andamento? Marcadores antigos (processo encerrado no meio do job) são ignorados."""
+    try:
+        idade = time.time() - os.path.getmtime(caminhos['processando'])
+    except OSError:
+        return False
+    return idade < current_app.config.get('RELATORIO_TIMEOUT', 600)
+
+
+# -----------------------------------------------
+# CONSULTAS E RENDERIZAÇÃO DE CADA RELATÓRIO
+# -----------------------------------------------
+
+def _em_partes(query, tamanho):
+    """Percorre a consulta com um cursor no servidor, entregando listas de até `tamanho` linhas."""
+    parte = []
+    for linha in query.yield_per(tamanho):
+        parte.append(linha)
+        if len(parte) == tamanho:
+            yield parte
+            parte = []
+    if parte:
+        yield parte
+
+
+def _renderizar_partes(template, chave_linhas, query, contexto):
+    """
+    Renderiza o relatório em fatias de RELATORIO_PDF_LINHAS_POR_PARTE linhas.
+
+    O xhtml2pdf consome memória de forma mais que linear com o tamanho da tabela;
+    cada fatia vira um PDF separado e as partes são concatenadas no fim.
+    Só a primeira parte tem o cabeçalho e só a última tem o total.
+    """
+    tamanho = current_app.config.get('RELATORIO_PDF_LINHAS_POR_PARTE', 500)
+    total = query.order_by(None).count()
+    contexto = dict(contexto, total=total, now=datetime.now)
+
+    if total == 0:
+        yield render_template(template, **contexto, **{chave_linhas: [], 'primeira_parte': True, 'ultima_parte': True})
+        return
+
+    renderizadas = 0
+    for indice, linhas in enumerate(_em_partes(query, tamanho)):
+        renderizadas += len(linhas)
+        yield render_template(template, **contexto, **{
+            chave_linhas: linhas,
+            'primeira_parte': indice == 0,
+            'ultima_parte': renderizadas >= total
+        })
+
+
+def _html_reservas(filtros):
+    query = Reserva.query.options(joinedload(Reserva.equipamento))
+    data_inicio = data_fim = None
+    if filtros.get('data_inicio'):
+        data_inicio = datetime.strptime(filtros['data_inicio'], '%Y-%m-%d').date()
+        query = query.filter(Reserva.data_fim >= data_inicio)
+    if filtros.get('data_fim'):
+        data_fim = datetime.strptime(filtros['data_fim'], '%Y-%m-%d').date()
+        query = query.filter(Reserva.data_inicio <= data_fim)
+
+    return _renderizar_partes('relatorio_reservas.html', 'reservas_filtradas',
+                              query.order_by(Reserva.data_inicio, Reserva.id), {
+        'data_inicio': data_inicio.strftime('%d/%m/%Y') if data_inicio else 'Todas',
+        'data_fim': data_fim.strftime('%d/%m/%Y') if data_fim else 'Todas',
+    })
+
+
+def _html_equipamentos(filtros):
+    query = Equipamento.query
+    if filtros.get('status_filtro'):
+        query = query.filter(Equipamento.status == filtros['status_filtro'])
+
+    return _renderizar_partes('relatorio_equipamentos.html', 'equipamentos_filtrados',
+                              query.order_by(Equipamento.nome, Equipamento.id), {
+        'status_filtro': filtros.get('status_filtro'),
+    })
+
+
+GERADORES_HTML = {
+    'reservas': _html_reservas,
+    'equipamentos': _html_equipamentos,
+}
+
+
+def _registrar_erro(caminhos, erro):
+    with open(caminhos['erro'], 'w', encoding='utf-8') as arquivo:
+        arquivo.write(str(erro))
+    print(f"ERRO ao gerar relatório {os.path.basename(caminhos['pdf'])}: {erro}")
+
+
+def _descartar_pool_processos():
+    """Um processo do pool morreu (ex.: falta de memória): o próximo job cria um pool novo."""
+    global _processos
+    with _lock:
+        if _processos is not None:
+            _processos.shutdown(wait=False)
+            _processos = None
+
+
+def _executar_job(app, tipo, filtros, caminhos, token):
+    partes = []
+    try:
+        with app.app_context():
+            processos, _ = _pools()
+            # Uma fatia por vez: a memória de pico não depende do tamanho do período
+            for indice, html in enumerate(GERADORES_HTML[tipo](filtros)):
+                parte = f"{caminhos['pdf']}.{token}.parte{indice:04d}"
+                partes.append(parte)
+                processos.submit(html_para_pdf, html, parte).result()
+                del html
+
+        if len(partes) == 1:
+            os.replace(partes[0], caminhos['pdf'])
+        else:
+            processos.submit(juntar_pdfs, partes, caminhos['pdf']).result()
+    except BrokenProcessPool as e:
+        _descartar_pool_processos()
+        _registrar_erro(caminhos, e)
+    except Exception as e:
+        _registrar_erro(caminhos, e)
+    finally:
+        for parte in partes:
+            if os.path.exists(parte):
+                os.remove(parte)
+        _remover_marcador(caminhos['processando'], token)
+
+
+# -----------------------------------------------
+# API DO MÓDULO (usada pelas rotas)
+# -----------------------------------------------
+
+def solicitar_relatorio(tipo, filtros):
+    """
+    Garante que exista (ou esteja sendo gerado) o PDF para os filtros e retorna o id do job.
+
+    Pedidos repetidos com os mesmos filtros reaproveitam o PDF em cache até que
+    os dados de que o relatório depende mudem. Só o pedido que consegue criar o
+    marcador `.processando` (O_EXCL) inicia o job; pedidos simultâneos, inclusive
+    de outros processos, apenas acompanham o mesmo id.
+    """
+    job_id = chave_relatorio(tipo, filtros)
+    caminhos = _caminhos(job_id)
+    if os.path.exists(caminhos['pdf']):
+        return job_id
+
+    token = uuid.uuid4().hex
+    if not _criar_marcador(caminhos['processando'], token):
+        if _em_processamento(caminhos):
+            return job_id
+        # Marcador de um job que não terminou (processo encerrado no meio)
+        _descartar_marcador_abandonado(caminhos['processando'])
+        if not _criar_marcador(caminhos['processando'], token):
+            return job_id
+    if os.path.exists(caminhos['pdf']):
+        # Outro pedido terminou o job entre a primeira verificação e o marcador
+        _remover_marcador(caminhos['processando'], token)
+        return job_id
+
+    _limpar_cache_antigo(os.path.dirname(caminhos['pdf']))
+    if os.path.exists(caminhos['erro']):
+        os.remove(caminhos['erro'])  # nova tentativa
+
+    _, threads = _pools()
+    threads.submit(_executar_job, current_app._get_current_object(), tipo, filtros, caminhos, token)
+    return job_id
+
+
+def status_relatorio(job_id):
+    """Retorna (status, detalhe): 'pronto', 'processando', 'erro' ou (None, None) se o job não existe."""
+    caminhos = _caminhos(job_id)
+    if caminhos is None:
+        return None, None
+    if os.path.exists(caminhos['pdf']):
+        return 'pronto', None
+    if _em_processamento(caminhos):
+        return 'processando', None
+    if os.path.exists(caminhos['erro']):
+        with open(caminhos['erro'], encoding='utf-8') as arquivo:
+            return 'erro', arquivo.read()
+    return None, None
+
+
+def aguardar_relatorio(job_id, segundos):
+    """Espera até `segundos` pelo fim do job; retorna o status final observado."""
+    limite = time.monotonic() + segundos
+    status, _ = status_relatorio(job_id)
+    while status == 'processando' and time.monotonic() < limite:
+        time.sleep(0.1)
+        status, _ = status_relatorio(job_id)
+    return status
+
+
+def caminho_pdf(job_id):
+    caminhos = _caminhos(job_id)
+    return caminhos['pdf'] if caminhos else None
@@ -0,0 +1,172 @@
+# Arquivo: app/utils/reservas_lote.py
+
+from collections import defaultdict
+from datetime import datetime
+
+from app import db
+from app.models import Equipamento, Reserva
+from app.utils import versoes
+from app.utils.concorrencia import travar_equipamentos, conflitos_no_banco, ReservaConflitante
+from app.utils.disponibilidade import indice_disponibilidade
+from app.utils.eventos import registrar_alteracao
+
+
+# Colunas copiadas para as alterações registradas manualmente (mesmo formato do after_flush)
+_COLUNAS = [coluna.key for coluna in Reserva.__table__.columns]
+
+
+class ErroLote(ValueError):
+    """Lote rejeitado; `erros` traz um dict por item inválido ({'indice', 'mensagem'})."""
+
+    def __init__(self, erros):
+        super().__init__(f'{len(erros)} reserva(s) inválida(s) no lote')
+        self.erros = erros
+
+
+def _ler_data(valor):
+    return datetime.strptime(valor, '%Y-%m-%d')
+
+
+# -----------------------------------------------
+# CRIAÇÃO EM LOTE
+# -----------------------------------------------
+
+def validar_lote(itens):
+    """
+    Valida o lote inteiro e retorna as linhas prontas para o INSERT.
+
+    Os conflitos são verificados em uma passada: contra as reservas existentes
+    (índice de disponibilidade em memória) e entre os próprios itens do lote.
+    Se houver qualquer erro, nada é gravado (ErroLote com todos os erros).
+    """
+    erros = []
+    linhas = []
+
+    ids_equipamentos = {item.get('equipamento_id') for item in itens}
+    equipamentos = dict(db.session.query(Equipamento.id, Equipamento.status)
+                        .filter(Equipamento.id.in_([i for i in ids_equipamentos if isinstance(i, int)])))
+
+    for indice, item in enumerate(itens):
+        equipamento_id = item.get('equipamento_id')
+        cliente_nome = (item.get('cliente_nome') or '').strip()
+        try:
+            data_inicio = _ler_data(item.get('data_inicio') or '')
+            data_fim = _ler_data(item.get('data_fim') or '')
+        except (TypeError, ValueError):
+            erros.append({'indice': indice, 'mensagem': 'Datas inválidas: use o formato AAAA-MM-DD.'})
+            continue
+
+        if equipamento_id not in equipamentos:
+            erros.append({'indice': indice, 'mensagem': f'Equipamento {equipamento_id} não encontrado.'})
+        elif equipamentos[equipamento_id] == 'manutencao':
+            erros.append({'indice': indice, 'mensagem': f'Equipamento {equipamento_id} está em manutenção.'})
+        elif not cliente_nome:
+            erros.append({'indice': indice, 'mensagem': 'Informe o nome do cliente.'})
+        elif data_inicio > data_fim:
+            erros.append({'indice': indice, 'mensagem': 'A data de início é posterior à de término.'})
+        elif not indice_disponibilidade.esta_disponivel(equipamento_id, data_inicio, data_fim):
+            conflitos = indice_disponibilidade.reservas_sobrepostas(equipamento_id, data_inicio, data_fim)
+            erros.append({'indice': indice, 'mensagem': f'Conflito com a(s) reserva(s) {", ".join(map(str, conflitos))}.'})
+        else:
+            linhas.append({
+                'equipamento_id': equipamento_id,
+                'cliente_nome': cliente_nome,
+                'cliente_contato': item.get('cliente_contato') or None,
+                'data_inicio': data_inicio,
+                'data_fim': data_fim,
+                'data_criacao': datetime.utcnow(),
+                'finalizada': False,
+                '_indice': indice,
+            })
+
+    # Conflitos dentro do próprio lote: por equipamento, ordenado pelo início
+    por_equipamento = defaultdict(list)
+    for linha in linhas:
+        por_equipamento[linha['equipamento_id']].append(linha)
+    for reservas in por_equipamento.values():
+        reservas.sort(key=lambda linha: linha['data_inicio'])
+        anterior = None
+        for linha in reservas:
+            if anterior is not None and linha['data_inicio'] <= anterior['data_fim']:
+                erros.append({'indice': linha['_indice'],
+                              'mensagem': f'Conflito com o item {anterior["_indice"]} do mesmo lote.'})
+            if anterior is None or linha['data_fim'] > anterior['data_fim']:
+                anterior = linha
+
+    if erros:
+        raise ErroLote(sorted(erros, key=lambda erro: erro['indice']))
+
+    for linha in linhas:
+        del linha['_indice']
+    return linhas
+
+
+def inserir_lote(itens):
+    """Valida e grava o lote em uma única transação (um INSERT com vários VALUES); retorna os ids na ordem."""
+    linhas = validar_lote(itens)
+    if not linhas:
+        return []
+
+    # Checagem definitiva no banco, com os equipamentos do lote travados (ver app/utils/concorrencia.py)
+    try:
+        travar_equipamentos(linha['equipamento_id'] for linha in linhas)
+    except ReservaConflitante as e:
+        raise ErroLote([{'indice': None, 'mensagem': str(e)}])
+    erros = []
+    for indice, linha in enumerate(linhas):
+        conflitos = conflitos_no_banco(linha['equipamento_id'], linha['data_inicio'], linha['data_fim'])
+        if conflitos:
+            erros.append({'indice': indice, 'mensagem': f'Conflito com a(s) reserva(s) {", ".join(map(str, conflitos))}.'})
+    if erros:
+        db.session.rollback()
+        raise ErroLote(erros)
+
+    ids = db.session.scalars(
+        db.insert(Reserva).returning(Reserva.id, sort_by_parameter_order=True),
+        linhas
+    ).all()
+
+    # O INSERT em lote não passa pelo flush do ORM: avisa o índice, os caches e o contador de versão
+    for reserva_id, linha in zip(ids, linhas):
+        registrar_alteracao(db.session, 'nova', 'reserva', dict(linha, id=reserva_id))
+    versoes.incrementar(db.session, 'reserva')
+    db.session.commit()
+    return ids
+
+
+# -----------------------------------------------
+# FINALIZAÇÃO E EXCLUSÃO EM LOTE
+# -----------------------------------------------
+
+def _registrar_linhas(acao, linhas, anterior=None):
+    for linha in linhas:
+        registrar_alteracao(db.session, acao, 'reserva', dict(linha._mapping), anterior)
+    if linhas:
+        versoes.incrementar(db.session, 'reserva')
+
+
+def finalizar_lote(ids):
+    """Finaliza as reservas em um único UPDATE; retorna os ids finalizados (as já finalizadas são ignoradas)."""
+    linhas = db.session.execute(
+        db.update(Reserva)
+        .where(Reserva.id.in_(ids), Reserva.finalizada.isnot(True))
+        .values(finalizada=True)
+        .returning(*[getattr(Reserva, coluna) for coluna in _COLUNAS])
+        .execution_options(synchronize_session=False)
+    ).all()
+    _registrar_linhas('alterada', linhas, {'finalizada': False})
+    db.session.commit()
+    return sorted(linha.id for linha in linhas)
+
+
+def excluir_lote(ids):
+    """Exclui as reservas em um único DELETE; retorna os ids excluídos."""
+    linhas = db.session.execute(
+        db.delete(Reserva)
+        .where(Reserva.id.in_(ids))
+        .returning(*[getattr(Reserva, coluna) for coluna in _COLUNAS])
+        .execution_options(synchronize_session=False)
+    ).all()
+    _registrar_linhas('removida', linhas)
+    db.session.commit()
+    return sorted(linha.id for linha in linhas)
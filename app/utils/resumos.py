@@ -0,0 +1,194 @@
+# Arquivo: app/utils/resumos.py
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from threading import Lock
+
+from app import db
+from app.models import Equipamento, Reserva, ResumoDiario
+from app.utils.eventos import ao_confirmar
+
+
+DIAS_SEMANA = ('segunda', 'terça', 'quarta', 'quinta', 'sexta', 'sábado', 'domingo')
+
+# Colunas da reserva que entram no resumo; alterar só as outras (ex.: finalizada) não muda nada
+COLUNAS_RESUMO = frozenset({'equipamento_id', 'cliente_nome', 'data_inicio', 'data_fim'})
+
+# Períodos cuja atualização falhou, refeitos junto com a próxima: {equipamento_id: (primeiro_dia, ultimo_dia)}
+_pendentes = {}
+_pendentes_lock = Lock()
+
+
+def _como_data(valor):
+    return valor.date() if isinstance(valor, datetime) else valor
+
+
+# -----------------------------------------------
+# MANUTENÇÃO DA TABELA resumo_diario
+# -----------------------------------------------
+
+def _linhas_resumo(reservas, inicio=None, fim=None):
+    """
+    Agrega (equipamento_id, cliente_nome, data_inicio, data_fim) em linhas por equipamento e dia.
+
+    Todas as reservas contam (inclusive as finalizadas): o resumo descreve o uso que houve.
+    """
+    ocupacao = defaultdict(int)
+    inicios = defaultdict(int)
+    clientes = defaultdict(set)
+    for equipamento_id, cliente_nome, data_inicio, data_fim in reservas:
+        primeiro, ultimo = _como_data(data_inicio), _como_data(data_fim)
+        inicios[(equipamento_id, primeiro)] += 1
+        if inicio is not None:
+            primeiro = max(primeiro, inicio)
+        if fim is not None:
+            ultimo = min(ultimo, fim)
+        dia = primeiro
+        while dia <= ultimo:
+            chave = (equipamento_id, dia)
+            ocupacao[chave] += 1
+            clientes[chave].add(cliente_nome)
+            dia += timedelta(days=1)
+
+    return [
+        {'equipamento_id': equipamento_id, 'dia': dia, 'reservas': total,
+         'inicios': inicios.get((equipamento_id, dia), 0), 'clientes': len(clientes[(equipamento_id, dia)])}
+        for (equipamento_id, dia), total in ocupacao.items()
+    ]
+
+
+def recalcular(conexao, equipamento_id, inicio, fim):
+    """Refaz as linhas de um equipamento entre `inicio` e `fim` (inclusive) a partir da tabela reserva."""
+    reserva = Reserva.__table__
+    reservas = conexao.execute(
+        db.select(reserva.c.equipamento_id, reserva.c.cliente_nome, reserva.c.data_inicio, reserva.c.data_fim)
+        .where(reserva.c.equipamento_id == equipamento_id,
+               reserva.c.data_fim >= datetime.combine(inicio, time.min),
+               reserva.c.data_inicio < datetime.combine(fim + timedelta(days=1), time.min))
+    ).all()
+
+    resumo = ResumoDiario.__table__
+    conexao.execute(resumo.delete().where(
+        resumo.c.equipamento_id == equipamento_id, resumo.c.dia >= inicio, resumo.c.dia <= fim
+    ))
+    linhas = _linhas_resumo(reservas, inicio, fim)
+    if linhas:
+        conexao.execute(resumo.insert(), linhas)
+
+
+def recalcular_tudo(conexao):
+    """Reconstrói a tabela inteira (migração 0003 e `flask recalcular-resumos`); retorna o número de linhas."""
+    reserva = Reserva.__table__
+    reservas = conexao.execute(
+        db.select(reserva.c.equipamento_id, reserva.c.cliente_nome, reserva.c.data_inicio, reserva.c.data_fim)
+    ).all()
+    conexao.execute(ResumoDiario.__table__.delete())
+    linhas = _linhas_resumo(reservas)
+    if linhas:
+        conexao.execute(ResumoDiario.__table__.insert(), linhas)
+    return len(linhas)
+
+
+def _juntar_periodo(periodos, equipamento_id, inicio, fim):
+    if equipamento_id in periodos:
+        atual = periodos[equipamento_id]
+        inicio, fim = min(inicio, atual[0]), max(fim, atual[1])
+    periodos[equipamento_id] = (inicio, fim)
+
+
+def _periodos_afetados(alteracoes):
+    """{equipamento_id: (primeiro_dia, ultimo_dia)} cobrindo os valores novos e antigos das reservas alteradas."""
+    periodos = {}
+    for alteracao in alteracoes:
+        if alteracao.tabela != 'reserva':
+            continue
+        # Sem `anterior` (objeto expirado antes da alteração) não dá para saber o que mudou: recalcula
+        if alteracao.acao == 'alterada' and alteracao.anterior and not COLUNAS_RESUMO & alteracao.anterior.keys():
+            continue
+        versoes = [alteracao.dados, dict(alteracao.dados, **alteracao.anterior)]
+        for dados in versoes:
+            equipamento_id = dados.get('equipamento_id')
+            if equipamento_id is None or dados.get('data_inicio') is None or dados.get('data_fim') is None:
+                continue
+            _juntar_periodo(periodos, equipamento_id, _como_data(dados['data_inicio']), _como_data(dados['data_fim']))
+    return periodos
+
+
+@ao_confirmar
+def _atualizar_resumos(alteracoes):
+    periodos = _periodos_afetados(alteracoes)
+    with _pendentes_lock:
+        for equipamento_id, (inicio, fim) in _pendentes.items():
+            _juntar_periodo(periodos, equipamento_id, inicio, fim)
+        _pendentes.clear()
+    if not periodos:
+        return
+    # Transação própria, logo após o commit das reservas
+    try:
+        with db.engine.begin() as conexao:
+            for equipamento_id, (inicio, fim) in periodos.items():
+                recalcular(conexao, equipamento_id, inicio, fim)
+    except Exception as e:
+        # Guarda os períodos para a próxima atualização; se o processo terminar antes,
+        # `flask recalcular-resumos` reconstrói a tabela
+        with _pendentes_lock:
+            for equipamento_id, (inicio, fim) in periodos.items():
+                _juntar_periodo(_pendentes, equipamento_id, inicio, fim)
+        print(f"ERRO ao atualizar resumo_diario ({len(periodos)} equipamentos; refeito no próximo commit "
+              f"de reservas): {e}")
+
+
+# -----------------------------------------------
+# CONSULTAS (endpoints de análise)
+# -----------------------------------------------
+
+def utilizacao(inicio, fim):
+    """
+    Dias ocupados, reservas iniciadas e % de utilização de cada equipamento no período.
+
+    Lista de dicts ordenada da maior para a menor utilização.
+    """
+    dias_periodo = (fim - inicio).days + 1
+    ocupados = db.func.count(ResumoDiario.dia)
+    iniciadas = db.func.coalesce(db.func.sum(ResumoDiario.inicios), 0)
+    linhas = db.session.query(Equipamento.id, Equipamento.nome, Equipamento.status, ocupados, iniciadas).outerjoin(
+        ResumoDiario,
+        (ResumoDiario.equipamento_id == Equipamento.id) & (ResumoDiario.dia >= inicio) & (ResumoDiario.dia <= fim)
+    ).group_by(Equipamento.id, Equipamento.nome, Equipamento.status).all()
+
+    resultado = [
+        {'id': equipamento_id, 'nome': nome, 'status': status, 'dias_ocupados': dias, 'reservas': reservas,
+         'utilizacao': round(100.0 * dias / dias_periodo, 1)}
+        for equipamento_id, nome, status, dias, reservas in linhas
+    ]
+    resultado.sort(key=lambda item: (-item['utilizacao'], item['nome']))
+    return resultado
+
+
+def dias_semana(inicio, fim):
+    """Ocupação somada por dia da semana: equipamentos-dia ocupados, reservas iniciadas e clientes."""
+    por_dia = db.session.query(
+        ResumoDiario.dia,
+        db.func.count(ResumoDiario.equipamento_id),
+        db.func.sum(ResumoDiario.inicios),
+        db.func.sum(ResumoDiario.clientes)
+    ).filter(ResumoDiario.dia >= inicio, ResumoDiario.dia <= fim).group_by(ResumoDiario.dia).all()
+
+    semana = [{'dia_semana': nome, 'ocupados': 0, 'reservas': 0, 'clientes': 0} for nome in DIAS_SEMANA]
+    for dia, ocupados, reservas, clientes in por_dia:
+        if not isinstance(dia, date):
+            dia = date.fromisoformat(str(dia))
+        item = semana[dia.weekday()]
+        item['ocupados'] += ocupados
+        item['reservas'] += reservas or 0
+        item['clientes'] += clientes or 0
+    return sorted(semana, key=lambda item: -item['ocupados'])
+
+
+def ociosos(inicio, fim):
+    """Equipamentos sem nenhum dia ocupado no período: lista de dicts (id, nome, status)."""
+    usados = db.session.query(ResumoDiario.equipamento_id).filter(ResumoDiario.dia >= inicio, ResumoDiario.dia <= fim)
+    linhas = db.session.query(Equipamento.id, Equipamento.nome, Equipamento.status).filter(
+        Equipamento.id.notin_(usados)
+    ).order_by(Equipamento.nome).all()
+    return [{'id': equipamento_id, 'nome': nome, 'status': status} for equipamento_id, nome, status in linhas]
@@ -0,0 +1,64 @@
+# Arquivo: app/utils/senhas.py
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore, Lock
+
+from flask import current_app
+
+from app import bcrypt
+
+
+class SenhasSobrecarregadas(RuntimeError):
+    """Há mais cálculos de bcrypt pendentes do que o limite (BCRYPT_FILA_MAXIMA)."""
+
+
+_lock = Lock()
+_pool = None
+_vagas = None
+
+
+def _executor():
+    """
+    Pool dedicado ao bcrypt (BCRYPT_WORKERS threads; a biblioteca libera o GIL durante o hash).
+
+    O semáforo limita quantos cálculos podem estar em execução ou na fila: além disso
+    a requisição é recusada na hora, em vez de ocupar todos os workers do servidor.
+    """
+    global _pool, _vagas
+    with _lock:
+        if _pool is None:
+            workers = current_app.config.get('BCRYPT_WORKERS', 2)
+            _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+            _vagas = BoundedSemaphore(workers + current_app.config.get('BCRYPT_FILA_MAXIMA', 16))
+        return _pool, _vagas
+
+
+def _executar(funcao, *args):
+    pool, vagas = _executor()
+    if not vagas.acquire(blocking=False):
+        raise SenhasSobrecarregadas('Muitas verificações de senha em andamento. Tente novamente em instantes.')
+    try:
+        return pool.submit(funcao, *args).result()
+    finally:
+        vagas.release()
+
+
+def custo_atual():
+    """Fator de custo (log2 das rodadas) usado nos hashes novos: BCRYPT_LOG_ROUNDS, padrão 12."""
+    return current_app.config.get('BCRYPT_LOG_ROUNDS', 12)
+
+
+def gerar_hash(senha):
+    return _executar(bcrypt.generate_password_hash, senha, custo_atual()).decode('utf-8')
+
+
+def verificar(hash_senha, senha):
+    return _executar(bcrypt.check_password_hash, hash_senha, senha)
+
+
+def precisa_rehash(hash_senha):
+    """O hash foi gerado com um custo diferente do configurado? (formato $2b$<custo>$...)"""
+    try:
+        return int(hash_senha.split('$')[2]) != custo_atual()
+    except (AttributeError, IndexError, ValueError):
+        return True
@@ -0,0 +1,41 @@
+# Arquivo: app/utils/serializacao.py
+
+import json
+from datetime import date
+
+from flask import current_app
+
+try:
+    import orjson
+except ImportError:  # Opcional: sem o orjson as respostas usam o json da biblioteca padrão
+    orjson = None
+
+
+def _padrao(valor):
+    if isinstance(valor, date):
+        return valor.isoformat()
+    raise TypeError(f'Tipo não serializável: {type(valor).__name__}')
+
+
+def para_json(dados):
+    """Serializa em bytes; datas saem em ISO 8601, como no fields.DateTime do Flask-RESTX."""
+    if orjson is not None:
+        return orjson.dumps(dados)
+    return json.dumps(dados, default=_padrao, ensure_ascii=False).encode('utf-8')
+
+
+def linhas_para_dicts(linhas, campos):
+    """Converte tuplas de uma consulta por colunas em dicts, usando só as primeiras posições (`campos`)."""
+    quantidade = len(campos)
+    return [dict(zip(campos, linha[:quantidade])) for linha in linhas]
+
+
+def resposta_json(dados, codigo=200, cabecalhos=None):
+    """
+    Resposta JSON montada direto a partir de dicts/listas, sem o marshal do Flask-RESTX.
+
+    Usada nas listagens grandes, onde percorrer cada campo de cada objeto em Python
+    domina o tempo da requisição.
+    """
+    return current_app.response_class(para_json(dados), status=codigo, headers=cabecalhos,
+                                      mimetype='application/json')
@@ -0,0 +1,58 @@
+# Arquivo: app/utils/templates_email.py
+
+from collections import namedtuple
+
+from flask import current_app
+from jinja2 import Environment, select_autoescape
+
+
+# Assunto (str.format com o contexto) e templates em app/templates/emails/<nome>.html/.txt
+ASSUNTOS = {
+    'confirmacao': 'Confirmação de Reserva: {equipamento_nome}',
+    'lembrete': 'Lembrete: Sua Reserva de {equipamento_nome} Começa Amanhã!',
+}
+
+EmailRenderizado = namedtuple('EmailRenderizado', ['assunto', 'texto', 'html'])
+
+
+def _ambiente():
+    """
+    Ambiente Jinja próprio dos e-mails (mesmo loader dos templates do app).
+
+    O jinja_env do Flask tem globais de requisição (url_for, request, session, ...) que
+    seriam copiadas para o contexto de cada renderização; aqui o contexto é só o da reserva.
+    """
+    if 'templates_email' not in current_app.extensions:
+        current_app.extensions['templates_email'] = {
+            'ambiente': Environment(loader=current_app.jinja_env.loader,
+                                    autoescape=select_autoescape(['html']), auto_reload=False),
+            'templates': {},
+        }
+    return current_app.extensions['templates_email']
+
+
+def _templates(nome):
+    """Templates (texto, html) do e-mail, compilados uma única vez por app."""
+    registro = _ambiente()
+    templates = registro['templates']
+    if nome not in templates:
+        ambiente = registro['ambiente']
+        templates[nome] = (ambiente.get_template(f'emails/{nome}.txt'), ambiente.get_template(f'emails/{nome}.html'))
+    return templates[nome]
+
+
+def contexto_reserva(reserva):
+    """Valores usados pelos templates, calculados uma vez por reserva."""
+    return {
+        'cliente_nome': reserva.cliente_nome,
+        'equipamento_nome': reserva.equipamento.nome,
+        'data_inicio': reserva.data_inicio.strftime('%d/%m/%Y'),
+        'data_fim': reserva.data_fim.strftime('%d/%m/%Y'),
+        'dias': reserva.duracao_dias(),
+    }
+
+
+def renderizar(nome, contexto):
+    """Assunto, corpo em texto e corpo em HTML (multipart) do e-mail `nome`."""
+    texto, html = _templates(nome)
+    return EmailRenderizado(ASSUNTOS[nome].format(**contexto), texto.render(contexto), html.render(contexto))
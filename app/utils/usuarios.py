@@ -0,0 +1,77 @@
+# Arquivo: app/utils/usuarios.py
+
+import time
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+
+from flask import current_app
+from flask_login import UserMixin, current_user
+from flask_restx import abort
+
+from app import db
+
+
+class UsuarioSessao(UserMixin):
+    """
+    Dados do usuário logado guardados no cache (o `current_user` das requisições).
+
+    Só os campos usados em permissões e nos templates; para alterar o usuário,
+    carregue o modelo `User` pelo id.
+    """
+
+    def __init__(self, id, username, is_admin):
+        self.id = id
+        self.username = username
+        self.is_admin = bool(is_admin)
+
+
+class CacheUsuarios:
+    """LRU com validade (USUARIO_CACHE_TTL segundos) dos usuários carregados pelo Flask-Login."""
+
+    def __init__(self):
+        self._itens = OrderedDict()  # {id: (UsuarioSessao, lido_em)}
+        self._lock = Lock()
+
+    def obter(self, user_id):
+        agora = time.monotonic()
+        with self._lock:
+            item = self._itens.get(user_id)
+            if item and agora - item[1] < current_app.config.get('USUARIO_CACHE_TTL', 60):
+                self._itens.move_to_end(user_id)
+                return item[0]
+
+        from app.models import User
+        linha = db.session.query(User.id, User.username, User.is_admin).filter(User.id == user_id).first()
+        if linha is None:
+            self.invalidar(user_id)
+            return None
+
+        usuario = UsuarioSessao(*linha)
+        with self._lock:
+            self._itens[user_id] = (usuario, agora)
+            self._itens.move_to_end(user_id)
+            while len(self._itens) > current_app.config.get('USUARIO_CACHE_MAX', 1024):
+                self._itens.popitem(last=False)
+        return usuario
+
+    def invalidar(self, user_id):
+        """Remove o usuário do cache (chamar após alterar ou excluir o usuário)."""
+        with self._lock:
+            self._itens.pop(user_id, None)
+
+
+cache_usuarios = CacheUsuarios()
+
+
+def login_api(f):
+    """
+    `login_required` para os Resources da API: sem sessão, responde 401 em JSON
+    em vez de redirecionar (302) para a página de login em HTML.
+    """
+    @wraps(f)
+    def decorado(*args, **kwargs):
+        if not current_user.is_authenticated:
+            abort(401, 'Autenticação necessária.')
+        return f(*args, **kwargs)
+    return decorado
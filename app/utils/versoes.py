@@ -0,0 +1,119 @@
+# Arquivo: app/utils/versoes.py
+
+import time
+from datetime import datetime
+from threading import Lock
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app import db
+
+
+# Tabelas cujas alterações incrementam o contador de versão
+TABELAS_VERSIONADAS = ('equipamento', 'reserva')
+
+_CHAVE_INCREMENTADAS = 'versoes_incrementadas'
+
+# Cache local de versao_recente: {tabela: (versao, atualizado_em, lido_em)}
+_cache = {}
+_cache_lock = Lock()
+_geracao = 0  # incrementada a cada invalidação (uma leitura iniciada antes dela não é guardada)
+
+
+def incrementar(session, tabela):
+    """
+    Incrementa a versão da tabela dentro da transação atual (no máximo uma vez por transação).
+
+    Operações em lote que não passam pelo flush do ORM devem chamar esta função.
+    """
+    incrementadas = session.info.setdefault(_CHAVE_INCREMENTADAS, set())
+    if tabela in incrementadas:
+        return
+    incrementadas.add(tabela)
+
+    from app.models import VersaoTabela
+    conexao = session.connection()
+    agora = datetime.utcnow()
+    proxima = {'versao': VersaoTabela.versao + 1, 'atualizado_em': agora}
+    dialeto = conexao.dialect.name
+
+    # Um único comando (upsert): com UPDATE e depois INSERT, duas transações que alteram a
+    # tabela pela primeira vez podem não achar a linha e tentar inseri-la ao mesmo tempo
+    if dialeto in ('sqlite', 'postgresql'):
+        insert = sqlite.insert if dialeto == 'sqlite' else postgresql.insert
+        conexao.execute(
+            insert(VersaoTabela).values(tabela=tabela, versao=1, atualizado_em=agora)
+            .on_conflict_do_update(index_elements=[VersaoTabela.tabela], set_=proxima)
+        )
+    elif dialeto in ('mysql', 'mariadb'):
+        conexao.execute(
+            mysql.insert(VersaoTabela).values(tabela=tabela, versao=1, atualizado_em=agora)
+            .on_duplicate_key_update(**proxima)
+        )
+    else:
+        resultado = conexao.execute(db.update(VersaoTabela).where(VersaoTabela.tabela == tabela).values(**proxima))
+        if resultado.rowcount == 0:
+            conexao.execute(db.insert(VersaoTabela).values(tabela=tabela, versao=1, atualizado_em=agora))
+
+
+def versao_atual(tabela):
+    """Retorna (versao, atualizado_em) da tabela; (0, None) se ela nunca foi alterada."""
+    from app.models import VersaoTabela
+    # SELECT explícito: session.get devolveria o objeto já carregado no identity map desta sessão
+    linha = db.session.execute(
+        db.select(VersaoTabela.versao, VersaoTabela.atualizado_em).where(VersaoTabela.tabela == tabela)
+    ).first()
+    if linha is None:
+        return 0, None
+    return linha.versao, linha.atualizado_em
+
+
+def versao_recente(tabela):
+    """
+    Como versao_atual, mas guardada em memória por VERSAO_CACHE_TTL segundos.
+
+    Commits deste processo invalidam a entrada na hora; alterações feitas por outros
+    processos aparecem em no máximo VERSAO_CACHE_TTL segundos.
+    """
+    agora = time.monotonic()
+    with _cache_lock:
+        entrada = _cache.get(tabela)
+        geracao = _geracao
+    if entrada and agora - entrada[2] < current_app.config.get('VERSAO_CACHE_TTL', 2):
+        return entrada[0], entrada[1]
+
+    versao, atualizado_em = versao_atual(tabela)
+    with _cache_lock:
+        if geracao == _geracao:
+            _cache[tabela] = (versao, atualizado_em, agora)
+    return versao, atualizado_em
+
+
+@event.listens_for(Session, 'after_flush')
+def _incrementar_versoes(session, flush_context):
+    tabelas = {
+        obj.__tablename__
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if getattr(obj, '__tablename__', None) in TABELAS_VERSIONADAS
+    }
+    for tabela in tabelas:
+        incrementar(session, tabela)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidar_cache(session):
+    global _geracao
+    incrementadas = session.info.pop(_CHAVE_INCREMENTADAS, None)
+    if incrementadas:
+        with _cache_lock:
+            _geracao += 1
+            for tabela in incrementadas:
+                _cache.pop(tabela, None)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _limpar_incrementadas(session):
+    session.info.pop(_CHAVE_INCREMENTADAS, None)
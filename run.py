@@ -2,13 +2,10 @@
 
 from app import create_app, db
 
-# Inicializa o app e cria as tabelas se necessário
+# Inicializa o app; o create_app cria as tabelas e aplica as migrações pendentes
 app = create_app()
 
 if __name__ == '__main__':
-    with app.app_context():
-        # Cria o banco de dados e as tabelas (apenas se não existirem)
-        db.create_all()
-        # Lógica de criação do primeiro admin pode ir aqui se preferir.
+    # Lógica de criação do primeiro admin pode ir aqui se preferir.
 
-    app.run(debug=True, use_reloader=False)
\ No newline at end of file
+    app.run(debug=True, use_reloader=False)
@@ -0,0 +1,107 @@
+# Arquivo: tests/conftest.py
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app, db, scheduler
+from app.models import Equipamento, Reserva, User
+
+
+class ConfigTeste:
+    TESTING = True
+    SECRET_KEY = 'testes'
+    BCRYPT_LOG_ROUNDS = 4            # bcrypt rápido nos testes
+    AGENDADOR_COORDENACAO = 'nenhuma'
+    LOGIN_LIMITE_IP = (1000, 1000)
+    LOGIN_LIMITE_USUARIO = (1000, 1000)
+    MAIL_SUPPRESS_SEND = True
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    """Um app por sessão de testes, com banco SQLite em arquivo (migrações aplicadas, como em produção)."""
+    caminho = tmp_path_factory.mktemp('banco') / 'testes.db'
+
+    class ConfigSessao(ConfigTeste):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{caminho}'
+
+    app = create_app(ConfigSessao)  # Aplica as migrações (MIGRAR_AO_INICIAR)
+    scheduler.pause()  # As tarefas agendadas não rodam durante os testes
+    return app
+
+
+def limpar_banco():
+    """Esvazia as tabelas e zera os caches em memória (deve ser chamada dentro do app_context)."""
+    from app.utils import versoes
+    from app.utils.cache_dashboard import cache_dashboard
+    from app.utils.disponibilidade import indice_disponibilidade
+    from app.utils.resumos import _pendentes
+    from app.utils.usuarios import cache_usuarios
+
+    db.session.remove()
+    with db.engine.begin() as conexao:
+        for tabela in reversed(db.metadata.sorted_tables):
+            if tabela.name not in ('migracao_aplicada', 'apscheduler_jobs'):
+                conexao.execute(tabela.delete())
+    indice_disponibilidade.invalidar()
+    cache_dashboard.invalidar()
+    cache_usuarios._itens.clear()
+    versoes._cache.clear()
+    _pendentes.clear()
+
+
+@pytest.fixture(autouse=True)
+def banco(app):
+    """Cada teste começa com as tabelas vazias e os caches em memória zerados."""
+    with app.app_context():
+        limpar_banco()
+        yield
+        db.session.remove()
+
+
+@pytest.fixture
+def cliente(app):
+    return app.test_client()
+
+
+def criar_usuario(username='admin', senha='senha', is_admin=True):
+    usuario = User(username=username, email=f'{username}@teste.com', is_admin=is_admin)
+    usuario.set_password(senha)
+    db.session.add(usuario)
+    db.session.commit()
+    return usuario
+
+
+def login(cliente, username='admin', senha='senha'):
+    return cliente.post('/auth/login', data={'username': username, 'password': senha})
+
+
+def criar_reservas(quantidade, equipamentos=1, inicio=datetime(2025, 1, 1)):
+    """Reservas de um dia, sem sobreposição, distribuídas entre `equipamentos` equipamentos."""
+    itens = [Equipamento(nome=f'Equipamento {i}', status='disponivel') for i in range(equipamentos)]
+    db.session.add_all(itens)
+    db.session.flush()
+    for i in range(quantidade):
+        dia = inicio + timedelta(days=i)
+        db.session.add(Reserva(equipamento_id=itens[i % equipamentos].id, cliente_nome=f'Cliente {i}',
+                               cliente_contato=f'cliente{i}@teste.com', data_inicio=dia, data_fim=dia))
+    db.session.commit()
+    return itens
+
+
+@contextmanager
+def contar_consultas():
+    """Lista dos comandos SQL enviados ao banco dentro do bloco."""
+    comandos = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        comandos.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        yield comandos
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
@@ -0,0 +1,20 @@
+# Arquivo: tests/test_agendador.py
+
+from flask import Flask
+
+from app import db
+from app.utils.agendador import _LiderancaBanco
+
+
+def test_lideranca_no_banco_sem_migracoes(tmp_path):
+    # Banco novo, antes de qualquer migração: a tabela lider_agendador ainda não existe
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tmp_path / "novo.db"}'
+    db.init_app(app)
+
+    estrategia = _LiderancaBanco(app)
+    assert estrategia.tentar() is True
+    assert estrategia.tentar() is True  # renova a própria concessão
+    with app.app_context():
+        assert db.inspect(db.engine).has_table('lider_agendador')
+        db.engine.dispose()
@@ -0,0 +1,36 @@
+# Arquivo: tests/test_api.py
+
+from app import create_app
+
+from conftest import ConfigTeste, criar_usuario, login
+
+
+def test_create_app_pode_ser_chamado_de_novo(app, tmp_path):
+    # Os namespaces são registrados no Api uma só vez, na importação; um segundo app não os duplica
+    class ConfigOutroBanco(ConfigTeste):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "outro.db"}'
+
+    outro = create_app(ConfigOutroBanco)
+    for aplicacao in (app, outro):
+        rotas = [regra.rule for regra in aplicacao.url_map.iter_rules()]
+        assert rotas.count('/api/reservas') == 1
+        assert rotas.count('/api/emails/<int:id>') == 1
+
+
+def test_api_sem_login_responde_401_em_json(cliente):
+    relatorios = ['/api/relatorios/rankings'] + [
+        f'/api/relatorios/{nome}?inicio=2025-01-01&fim=2025-01-31'
+        for nome in ('ocupacao', 'utilizacao', 'dias-semana', 'ociosos')
+    ]
+    for url in ['/api/reservas', '/api/emails/1'] + relatorios:
+        resposta = cliente.get(url)
+        assert resposta.status_code == 401
+        assert resposta.is_json and 'message' in resposta.get_json()
+
+
+def test_api_com_login(cliente):
+    criar_usuario()
+    login(cliente)
+    assert cliente.get('/api/reservas').status_code == 200
+    assert cliente.get('/api/relatorios/rankings').status_code == 200
+    assert cliente.get('/api/relatorios/utilizacao?inicio=2025-01-01&fim=2025-01-31').status_code == 200
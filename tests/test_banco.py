@@ -0,0 +1,23 @@
+# Arquivo: tests/test_banco.py
+
+from app import create_app
+
+from conftest import ConfigTeste
+
+
+def test_config_class_prevalece_sobre_database_url(app, tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', f'sqlite:///{tmp_path / "ambiente.db"}')
+
+    class ConfigProprio(ConfigTeste):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "proprio.db"}'
+
+    assert create_app(ConfigProprio).config['SQLALCHEMY_DATABASE_URI'].endswith('proprio.db')
+
+
+def test_database_url_e_o_padrao_sem_uri_no_config(app, tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', f'sqlite:///{tmp_path / "ambiente.db"}')
+
+    class ConfigSemUri(ConfigTeste):
+        pass
+
+    assert create_app(ConfigSemUri).config['SQLALCHEMY_DATABASE_URI'].endswith('ambiente.db')
@@ -0,0 +1,37 @@
+# Arquivo: tests/test_cache_http.py
+
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import Equipamento, VersaoTabela
+from app.utils import versoes
+
+
+def _alterar_equipamentos(atualizado_em):
+    """Uma alteração na tabela equipamento, registrada com a data informada."""
+    db.session.add(Equipamento(nome='Pula-pula', status='disponivel'))
+    db.session.commit()
+    db.session.execute(db.update(VersaoTabela).where(VersaoTabela.tabela == 'equipamento')
+                       .values(atualizado_em=atualizado_em))
+    db.session.commit()
+    versoes._cache.clear()
+
+
+def test_sem_last_modified_no_mesmo_segundo_da_alteracao(cliente):
+    _alterar_equipamentos(datetime.utcnow())
+    resposta = cliente.get('/api/equipamentos')
+    assert resposta.status_code == 200
+    assert 'ETag' in resposta.headers
+    assert 'Last-Modified' not in resposta.headers
+
+
+def test_if_modified_since_depois_do_segundo_da_alteracao(cliente):
+    _alterar_equipamentos(datetime.utcnow() - timedelta(seconds=5))
+    resposta = cliente.get('/api/equipamentos')
+    ultima = resposta.headers['Last-Modified']
+
+    assert cliente.get('/api/equipamentos', headers={'If-Modified-Since': ultima}).status_code == 304
+
+    # Alteração posterior à resposta: data (truncada) maior que a enviada
+    _alterar_equipamentos(datetime.utcnow())
+    assert cliente.get('/api/equipamentos', headers={'If-Modified-Since': ultima}).status_code == 200
@@ -0,0 +1,85 @@
+# Arquivo: tests/test_concorrencia.py
+
+import threading
+from collections import Counter
+from datetime import date
+
+from app import db
+from app.models import Equipamento, Reserva
+from app.utils.concorrencia import ReservaConflitante, criar_reserva
+from app.utils.reservas_lote import ErroLote, inserir_lote
+
+THREADS = 32
+
+
+def _disputar(app, pedido):
+    """Roda `pedido(i)` em THREADS threads liberadas ao mesmo tempo; retorna os resultados."""
+    barreira = threading.Barrier(THREADS)
+    resultados = []
+
+    def executar(i):
+        with app.app_context():
+            barreira.wait()
+            try:
+                resultados.append(pedido(i))
+            except Exception as e:  # qualquer erro fora do esperado aparece na contagem
+                resultados.append(f'{type(e).__name__}: {e}')
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=executar, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return Counter(resultados)
+
+
+def _pares_sobrepostos(equipamento_id):
+    reservas = Reserva.query.filter_by(equipamento_id=equipamento_id).all()
+    return [(a.id, b.id) for a in reservas for b in reservas
+            if a.id < b.id and a.data_inicio <= b.data_fim and b.data_inicio <= a.data_fim]
+
+
+def _equipamento():
+    equipamento = Equipamento(nome='Pula-pula', status='disponivel')
+    db.session.add(equipamento)
+    db.session.commit()
+    return equipamento.id
+
+
+def test_reservas_simultaneas_no_mesmo_periodo_gravam_so_uma(app):
+    equipamento_id = _equipamento()
+
+    def reservar(i):
+        # Períodos diferentes, mas todos cruzando os dias 2 e 3
+        try:
+            criar_reserva(equipamento_id, f'Cliente {i}', '', date(2025, 1, 1 + i % 2), date(2025, 1, 3))
+            return 'gravada'
+        except ReservaConflitante:
+            return 'recusada'
+
+    assert _disputar(app, reservar) == {'gravada': 1, 'recusada': THREADS - 1}
+    db.session.expire_all()
+    assert Reserva.query.filter_by(equipamento_id=equipamento_id).count() == 1
+    assert _pares_sobrepostos(equipamento_id) == []
+
+
+def test_lotes_simultaneos_nao_gravam_reservas_sobrepostas(app):
+    equipamento_id = _equipamento()
+
+    def reservar_lote(i):
+        # Os lotes se cruzam em pares diferentes de dias; nenhum par gravado pode se sobrepor
+        itens = [{'equipamento_id': equipamento_id, 'cliente_nome': f'Cliente {i}',
+                  'data_inicio': f'2025-02-{1 + i % 8:02d}', 'data_fim': f'2025-02-{2 + i % 8:02d}'}]
+        try:
+            inserir_lote(itens)
+            return 'gravada'
+        except ErroLote:
+            return 'recusada'
+
+    resultados = _disputar(app, reservar_lote)
+    assert set(resultados) <= {'gravada', 'recusada'}, resultados
+    db.session.expire_all()
+    assert Reserva.query.filter_by(equipamento_id=equipamento_id).count() == resultados['gravada'] >= 1
+    assert _pares_sobrepostos(equipamento_id) == []
@@ -0,0 +1,42 @@
+# Arquivo: tests/test_dashboard.py
+
+import re
+from datetime import datetime
+
+from app import db
+from app.models import Reserva
+from conftest import contar_consultas, criar_reservas, criar_usuario, login
+
+
+def _contagens(cliente):
+    """(disponíveis, reservas ativas) exibidos nos cabeçalhos dos cartões do dashboard."""
+    pagina = cliente.get('/dashboard').data.decode()
+    disponiveis = re.search(r'bg-light text-success ms-2">(\d+)<', pagina).group(1)
+    ativas = re.search(r'bg-light text-info ms-2">(\d+)<', pagina).group(1)
+    return int(disponiveis), int(ativas)
+
+
+def test_dashboard_atualiza_apos_commit_de_reservas(app, cliente, monkeypatch):
+    monkeypatch.setitem(app.config, 'DASHBOARD_CACHE_TTL', 3600)  # só a invalidação pode atualizar
+    criar_usuario()
+    equipamento = criar_reservas(3, equipamentos=2)[0]
+    login(cliente)
+    assert _contagens(cliente) == (2, 3)
+
+    # Sem alterações, a segunda visita vem do cache (nenhuma consulta a reservas)
+    with contar_consultas() as comandos:
+        assert _contagens(cliente) == (2, 3)
+    assert not [comando for comando in comandos if 'reserva' in comando]
+
+    db.session.add(Reserva(equipamento_id=equipamento.id, cliente_nome='Nova', cliente_contato='',
+                           data_inicio=datetime(2025, 2, 1), data_fim=datetime(2025, 2, 2)))
+    db.session.commit()
+    assert _contagens(cliente) == (2, 4)
+
+    reserva_id = Reserva.query.filter_by(cliente_nome='Cliente 0').one().id
+    cliente.post(f'/reservas/finalizar/{reserva_id}')
+    assert _contagens(cliente) == (2, 3)
+
+    equipamento.status = 'manutencao'
+    db.session.commit()
+    assert _contagens(cliente) == (1, 3)
@@ -0,0 +1,148 @@
+# Arquivo: tests/test_desempenho.py
+#
+# Benchmarks comparativos: cada teste mede o caminho antigo e o atual nas mesmas condições
+# e exige só a vantagem relativa (os números absolutos dependem da máquina).
+# Medem tempo de relógio, então só rodam quando pedidos:
+#     RODAR_BENCHMARKS=1 pytest -s tests/test_desempenho.py
+# Sem a variável, rodam apenas as verificações de comportamento (mesma saída nos dois caminhos).
+
+import json
+import os
+import time
+import timeit
+
+import pytest
+from sqlalchemy.orm import joinedload
+
+from app import db
+from app.models import Equipamento, Reserva
+
+benchmark = pytest.mark.skipif(not os.environ.get('RODAR_BENCHMARKS'),
+                               reason='benchmark de tempo: defina RODAR_BENCHMARKS=1')
+
+
+def _melhor_tempo(funcao, repeticoes=5):
+    """Menor tempo (s) entre `repeticoes` execuções, depois de uma execução de aquecimento."""
+    funcao()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def _inserir_equipamentos(quantidade):
+    db.session.connection().execute(Equipamento.__table__.insert(), [
+        {'nome': f'Equipamento {i}', 'descricao': 'Brinquedo inflável para festas', 'status': 'disponivel'}
+        for i in range(quantidade)
+    ])
+    db.session.commit()
+
+
+def test_listagem_tuplas_e_orjson_igual_ao_marshal(app, cliente):
+    from flask_restx import marshal
+    from app.api.equipamento_ns import equipamento_model
+
+    _inserir_equipamentos(200)
+    with app.test_request_context():
+        esperado = marshal(Equipamento.query.order_by(Equipamento.id).limit(100).all(), equipamento_model)
+    assert cliente.get('/api/equipamentos?limite=100').get_json() == json.loads(json.dumps(esperado))
+
+
+@benchmark
+def test_listagem_de_10k_equipamentos_tuplas_e_orjson(app, cliente, monkeypatch):
+    from flask_restx import marshal
+    from app.api.equipamento_ns import equipamento_model
+
+    _inserir_equipamentos(10_000)
+    monkeypatch.setitem(app.config, 'PAGINACAO_LIMITE_MAXIMO', 10_000)
+
+    def antes():
+        # Objetos do ORM + marshal campo a campo do Flask-RESTX + json
+        with app.test_request_context():
+            equipamentos = Equipamento.query.order_by(Equipamento.id).limit(10_000).all()
+            corpo = json.dumps(marshal(equipamentos, equipamento_model))
+            db.session.expunge_all()
+        assert corpo.count('"id"') == 10_000
+
+    def depois():
+        resposta = cliente.get('/api/equipamentos?limite=10000')
+        assert len(resposta.get_json()) == 10_000
+
+    def projecao():
+        resposta = cliente.get('/api/equipamentos?limite=10000&fields=id,nome')
+        assert set(resposta.get_json()[0]) == {'id', 'nome'}
+
+    tempo_antes, tempo_depois, tempo_projecao = _melhor_tempo(antes), _melhor_tempo(depois), _melhor_tempo(projecao)
+    print(f"\n10k equipamentos: ORM + marshal {tempo_antes * 1000:.0f} ms, tuplas + orjson {tempo_depois * 1000:.0f} ms, "
+          f"fields=id,nome {tempo_projecao * 1000:.0f} ms")
+    assert tempo_depois < tempo_antes / 2
+    assert tempo_projecao < tempo_depois
+
+
+def _lembrete_f_string(reserva):
+    """Como os lembretes eram montados antes dos templates: só HTML, f-string, sem escapar os dados."""
+    from flask_mail import Message
+
+    equipamento_nome = reserva.equipamento.nome
+    msg = Message(f"Lembrete: Sua Reserva de {equipamento_nome} Começa Amanhã!", recipients=[reserva.cliente_contato])
+    msg.html = f"""
+    <h2>Prezado(a) {reserva.cliente_nome},</h2>
+    <p>Sua reserva está marcada para começar **amanhã**, {reserva.data_inicio.strftime('%d/%m/%Y')}.</p>
+    <p>Por favor, dirija-se ao nosso ponto de retirada com os seguintes detalhes:</p>
+
+    <h3>Detalhes da Retirada:</h3>
+    <ul>
+        <li><strong>Item Reservado:</strong> {equipamento_nome}</li>
+        <li><strong>Local de Retirada:</strong> [Seu Endereço de Retirada Aqui]</li>
+        <li><strong>Horário:</strong> [Seu Horário de Funcionamento Aqui]</li>
+        <li><strong>Documentação Necessária:</strong> Documento de Identidade e Comprovante de Residência.</li>
+    </ul>
+    <p>Em caso de dúvidas, responda a este e-mail ou ligue para [Seu Telefone].</p>
+    """
+    return msg
+
+
+def test_lembrete_pelos_templates_escapa_os_dados(app):
+    from app.utils.email_tasks import _mensagem_lembrete
+    from conftest import criar_reservas
+
+    criar_reservas(1)
+    reserva = Reserva.query.one()
+    reserva.cliente_nome = 'Ana <b>'
+    with app.test_request_context():
+        mensagem = _mensagem_lembrete(reserva)
+    assert 'Ana &lt;b&gt;' in mensagem.html
+    assert 'Ana <b>' in mensagem.body
+
+
+@benchmark
+def test_mensagens_por_segundo_dos_lembretes(app):
+    from app.utils.email_tasks import _mensagem_lembrete
+    from app.utils.templates_email import contexto_reserva, renderizar
+
+    from conftest import criar_reservas
+
+    criar_reservas(1)
+    reserva = Reserva.query.options(joinedload(Reserva.equipamento)).one()  # como na tarefa de lembretes
+    contexto = contexto_reserva(reserva)
+
+    casos = {
+        'antes': lambda: _lembrete_f_string(reserva),
+        'depois': lambda: _mensagem_lembrete(reserva),
+        'so_render': lambda: renderizar('lembrete', contexto),
+    }
+    melhores = dict.fromkeys(casos, float('inf'))
+    with app.test_request_context():
+        # Rodadas intercaladas: variações de carga da máquina atingem todos os casos por igual
+        for _ in range(7):
+            for nome, funcao in casos.items():
+                melhores[nome] = min(melhores[nome], timeit.timeit(funcao, number=1000))
+    antes, depois, so_render = (1000 / melhores[nome] for nome in casos)
+
+    print(f"\nLembretes (msg/s): f-string + Message {antes:.0f}, templates + Message {depois:.0f}; "
+          f"só renderização dos templates {so_render:.0f}")
+    # A mensagem completa leva também o corpo em texto e o HTML escapado, que a f-string não tinha
+    # (duas renderizações pelo Jinja por e-mail); o custo extra tem de ficar abaixo de ~3x
+    assert depois > 0.3 * antes
@@ -0,0 +1,130 @@
+# Arquivo: tests/test_disponibilidade.py
+
+import random
+from datetime import date, datetime, timedelta
+
+from app import db
+from app.models import Equipamento, Reserva
+from app.utils.disponibilidade import IntervalosEquipamento, indice_disponibilidade
+from conftest import contar_consultas, criar_reservas
+
+
+def _intervalos(*reservas):
+    intervalos = IntervalosEquipamento()
+    for reserva_id, inicio, fim in reservas:
+        intervalos.adicionar(reserva_id, inicio, fim)
+    return intervalos
+
+
+def test_reserva_longa_contem_periodo_curto():
+    # A reserva 1 começa antes e termina depois do período; a 2, curta, não alcança o período
+    intervalos = _intervalos((1, date(2025, 1, 1), date(2025, 1, 31)), (2, date(2025, 1, 2), date(2025, 1, 3)))
+    assert not intervalos.esta_livre(date(2025, 1, 10), date(2025, 1, 12))
+    assert intervalos.sobrepostas(date(2025, 1, 10), date(2025, 1, 12)) == [1]
+    # E o período que contém as duas cruza ambas
+    assert sorted(intervalos.sobrepostas(date(2024, 12, 1), date(2025, 2, 28))) == [1, 2]
+
+
+def test_dias_de_inicio_e_fim_sao_inclusos():
+    intervalos = _intervalos((1, date(2025, 1, 5), date(2025, 1, 10)))
+    assert not intervalos.esta_livre(date(2025, 1, 10), date(2025, 1, 12))  # começa no último dia
+    assert not intervalos.esta_livre(date(2025, 1, 1), date(2025, 1, 5))    # termina no primeiro dia
+    assert intervalos.esta_livre(date(2025, 1, 11), date(2025, 1, 12))
+    assert intervalos.esta_livre(date(2025, 1, 1), date(2025, 1, 4))
+
+
+def test_remover_recalcula_o_maximo_acumulado():
+    intervalos = _intervalos((1, date(2025, 1, 1), date(2025, 3, 1)), (2, date(2025, 1, 5), date(2025, 1, 6)))
+    intervalos.remover(1, date(2025, 1, 1))
+    assert len(intervalos) == 1
+    assert intervalos.esta_livre(date(2025, 2, 1), date(2025, 2, 5))
+    assert intervalos.sobrepostas(date(2025, 1, 6), date(2025, 1, 8)) == [2]
+    # Remover uma reserva que não está no índice não altera nada
+    intervalos.remover(99, date(2025, 1, 5))
+    assert len(intervalos) == 1
+
+
+def test_intervalos_conferem_com_forca_bruta():
+    aleatorio = random.Random(42)
+    base = date(2025, 1, 1)
+    reservas = {}
+    intervalos = IntervalosEquipamento()
+    for reserva_id in range(200):
+        inicio = base + timedelta(days=aleatorio.randrange(120))
+        fim = inicio + timedelta(days=aleatorio.randrange(15))
+        reservas[reserva_id] = (inicio, fim)
+        intervalos.adicionar(reserva_id, inicio, fim)
+    for reserva_id in aleatorio.sample(sorted(reservas), 60):
+        intervalos.remover(reserva_id, reservas.pop(reserva_id)[0])
+
+    for _ in range(500):
+        inicio = base + timedelta(days=aleatorio.randrange(-10, 140))
+        fim = inicio + timedelta(days=aleatorio.randrange(10))
+        esperadas = sorted(r for r, (a, b) in reservas.items() if a <= fim and inicio <= b)
+        assert sorted(intervalos.sobrepostas(inicio, fim)) == esperadas
+        assert intervalos.esta_livre(inicio, fim) == (not esperadas)
+
+
+def test_consultas_ao_indice_nao_vao_ao_banco():
+    equipamentos = criar_reservas(30, equipamentos=3)
+    ids = [equipamento.id for equipamento in equipamentos]
+    indice_disponibilidade.esta_disponivel(ids[0], date(2025, 1, 1), date(2025, 1, 1))  # carrega o índice
+
+    # Dentro do VERSAO_CACHE_TTL a versão da tabela reserva vem da memória
+    with contar_consultas() as comandos:
+        for dia in range(30):
+            inicio = date(2025, 1, 1) + timedelta(days=dia)
+            indice_disponibilidade.esta_disponivel(ids[dia % 3], inicio, inicio)
+            indice_disponibilidade.reservas_sobrepostas(ids[dia % 3], inicio, inicio)
+            indice_disponibilidade.filtrar_disponiveis(ids, inicio, inicio)
+    assert comandos == []
+    assert not indice_disponibilidade.esta_disponivel(ids[1], date(2025, 1, 2), date(2025, 1, 2))
+    assert indice_disponibilidade.esta_disponivel(ids[1], date(2025, 1, 3), date(2025, 1, 3))
+
+
+def _livres_no_banco(inicio, fim):
+    """Ids dos equipamentos fora de manutenção sem reserva ativa que cruze o período (consulta direta)."""
+    ocupados = db.select(Reserva.equipamento_id).where(
+        Reserva.finalizada.isnot(True),
+        db.func.date(Reserva.data_inicio) <= fim.isoformat(),
+        db.func.date(Reserva.data_fim) >= inicio.isoformat(),
+    )
+    return set(db.session.scalars(
+        db.select(Equipamento.id).where(Equipamento.status != 'manutencao', Equipamento.id.not_in(ocupados))
+    ))
+
+
+def test_equipamentos_disponiveis_em_varios_periodos(cliente):
+    aleatorio = random.Random(3)
+    equipamentos = [Equipamento(nome=f'Equipamento {i}', status='manutencao' if i == 0 else 'disponivel')
+                    for i in range(12)]
+    db.session.add_all(equipamentos)
+    db.session.flush()
+    db.session.execute(Reserva.__table__.insert(), [
+        {'equipamento_id': aleatorio.choice(equipamentos).id, 'cliente_nome': f'Cliente {i}',
+         'data_inicio': datetime(2025, 1, 1) + timedelta(days=dia),
+         'data_fim': datetime(2025, 1, 1) + timedelta(days=dia + aleatorio.randrange(5)),
+         'finalizada': i % 5 == 0}
+        for i, dia in enumerate(aleatorio.randrange(60) for _ in range(40))
+    ])
+    db.session.commit()
+
+    periodos = [(date(2025, 1, 1), date(2025, 1, 1)), (date(2025, 1, 10), date(2025, 1, 20)),
+                (date(2025, 2, 1), date(2025, 2, 3)), (date(2025, 6, 1), date(2025, 6, 30))]
+    consulta = '&'.join(f'periodo={inicio},{fim}' for inicio, fim in periodos)
+    resposta = cliente.get(f'/api/equipamentos/disponiveis?{consulta}')
+    assert resposta.status_code == 200
+
+    dados = resposta.get_json()
+    assert [(item['inicio'], item['fim']) for item in dados] == [(i.isoformat(), f.isoformat()) for i, f in periodos]
+    for item, (inicio, fim) in zip(dados, periodos):
+        assert {equipamento['id'] for equipamento in item['equipamentos']} == _livres_no_banco(inicio, fim)
+    assert min(len(item['equipamentos']) for item in dados[:3]) < 11  # há conflitos nos períodos de jan/fev
+    assert len(dados[-1]['equipamentos']) == 11  # em junho só o de manutenção fica de fora
+
+
+def test_periodo_mal_formado_responde_400(cliente):
+    for periodo in ('2025-01-01', '2025-13-01,2025-13-02', '2025-01-05,2025-01-01'):
+        resposta = cliente.get(f'/api/equipamentos/disponiveis?periodo=2025-01-01,2025-01-02&periodo={periodo}')
+        assert resposta.status_code == 400
+        assert periodo in resposta.get_json()['message']
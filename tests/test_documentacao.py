@@ -0,0 +1,51 @@
+# Arquivo: tests/test_documentacao.py
+
+import subprocess
+import sys
+from pathlib import Path
+
+
+def test_guide_md_so_e_lido_quando_a_documentacao_e_pedida(app):
+    # Processo novo: a importação (o que cada worker faz ao iniciar) não pode ler o guide.md
+    codigo = ('from app.api.equipamento_ns import load_readme; '
+              'print(load_readme.cache_info().currsize)')
+    saida = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True, check=True,
+                           cwd=Path(__file__).resolve().parents[1])
+    assert saida.stdout.strip() == '0'
+
+    from app.api.equipamento_ns import load_readme
+    load_readme.cache_clear()
+    resposta = app.test_client().get('/api/swagger.json')
+    assert resposta.status_code == 200
+    assert load_readme.cache_info().currsize == 1
+
+
+MODULOS_PESADOS = ('xhtml2pdf', 'reportlab', 'pypdf', 'xlsxwriter', 'numpy')
+
+
+def test_create_app_nao_importa_modulos_pesados(tmp_path):
+    # Partida a frio com -X importtime: PDF, Excel e NumPy só são importados por quem os usa
+    codigo = f'''
+import sys
+from app import create_app
+
+class Config:
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///{tmp_path / "partida.db"}'
+    AGENDADOR_COORDENACAO = 'nenhuma'
+
+create_app(Config)
+print(' '.join(nome for nome in {MODULOS_PESADOS!r} if nome in sys.modules))
+'''
+    saida = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo], capture_output=True, text=True,
+                           check=True, timeout=120, cwd=Path(__file__).resolve().parents[1])
+    assert saida.stdout.splitlines()[-1].strip() == ''
+
+    # Linhas do log: "import time: self [us] | cumulative | nome.do.modulo"
+    importados = [linha.rsplit('|', 1)[1].strip() for linha in saida.stderr.splitlines()
+                  if linha.startswith('import time:') and '|' in linha]
+    assert 'app' in importados
+    assert [nome for nome in importados if nome.split('.')[0] in MODULOS_PESADOS] == []
+    total_app = next(int(linha.split('|')[1]) for linha in saida.stderr.splitlines()
+                     if linha.rsplit('|', 1)[-1].strip() == 'app')
+    print(f"\nimport app: {total_app / 1000:.0f} ms")
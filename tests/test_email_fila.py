@@ -0,0 +1,157 @@
+# Arquivo: tests/test_email_fila.py
+
+import smtplib
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.models import EmailFila, Equipamento, Reserva
+from app.utils import email_tasks
+from app.utils.email_tasks import check_for_reminders, enfileirar_email, processar_fila_emails
+
+
+class ConexaoFalsa:
+    """Substitui o mail.connect(): guarda as mensagens ou falha ao abrir a conexão."""
+
+    def __init__(self, falhar=False):
+        self.falhar = falhar
+        self.enviadas = []
+
+    def __call__(self):
+        if self.falhar:
+            raise smtplib.SMTPConnectError(421, 'Servidor indisponível')
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        return False
+
+    def send(self, msg):
+        self.enviadas.append(msg)
+
+
+@pytest.fixture
+def smtp(app, monkeypatch):
+    conexao = ConexaoFalsa()
+    monkeypatch.setattr(email_tasks.mail, 'connect', conexao)
+    monkeypatch.setitem(app.config, 'EMAIL_MAX_TENTATIVAS', 3)
+    monkeypatch.setitem(app.config, 'EMAIL_BACKOFF_BASE', 30)
+    return conexao
+
+
+def _recarregar(item):
+    db.session.expire_all()
+    return db.session.get(EmailFila, item.id)
+
+
+def _liberar(item):
+    """Antecipa a próxima tentativa (simula a passagem do backoff)."""
+    item.proxima_tentativa = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+
+def test_envio_com_sucesso_nao_e_repetido(app, smtp):
+    item = enfileirar_email('Assunto', ['ana@teste.com'], '<p>Oi</p>', 'Oi')
+    processar_fila_emails(app)
+    processar_fila_emails(app)
+
+    assert [msg.recipients for msg in smtp.enviadas] == [['ana@teste.com']]
+    item = _recarregar(item)
+    assert (item.status, item.tentativas, item.reservado_em) == ('enviado', 0, None)
+    assert item.data_envio is not None
+
+
+def test_falhas_usam_backoff_exponencial_e_desistem_no_limite(app, smtp):
+    item = enfileirar_email('Assunto', ['ana@teste.com'], '<p>Oi</p>')
+    smtp.falhar = True
+
+    esperas = []
+    for tentativa in (1, 2):
+        antes = datetime.utcnow()
+        processar_fila_emails(app)
+        item = _recarregar(item)
+        assert (item.status, item.tentativas) == ('pendente', tentativa)
+        assert 'Servidor indisponível' in item.ultimo_erro
+        esperas.append(round((item.proxima_tentativa - antes).total_seconds()))
+
+        # Antes do fim da espera o item não é pego de novo
+        processar_fila_emails(app)
+        assert _recarregar(item).tentativas == tentativa
+        _liberar(item)
+    assert esperas == [30, 60]
+
+    processar_fila_emails(app)
+    item = _recarregar(item)
+    assert (item.status, item.tentativas) == ('falhou', 3)
+    smtp.falhar = False
+    _liberar(item)
+    processar_fila_emails(app)
+    assert smtp.enviadas == []  # 'falhou' é definitivo
+
+
+def test_item_preso_em_enviando_volta_para_a_fila(app, smtp):
+    preso = enfileirar_email('Preso', ['ana@teste.com'], '<p>1</p>')
+    recente = enfileirar_email('Recente', ['bia@teste.com'], '<p>2</p>')
+    # Um worker encerrado no meio do envio (há 11 min) e outro ainda enviando (há 1 min)
+    preso.status, preso.reservado_em = 'enviando', datetime.utcnow() - timedelta(minutes=11)
+    recente.status, recente.reservado_em = 'enviando', datetime.utcnow() - timedelta(minutes=1)
+    db.session.commit()
+
+    processar_fila_emails(app)
+    assert [msg.subject for msg in smtp.enviadas] == ['Preso']
+    assert _recarregar(preso).status == 'enviado'
+    assert _recarregar(recente).status == 'enviando'
+
+
+def test_item_reservado_por_outro_worker_nao_e_enviado(app, smtp):
+    item = enfileirar_email('Assunto', ['ana@teste.com'], '<p>Oi</p>')
+
+    updates = []
+
+    def outro_worker(estado):
+        # Outro worker reserva o item entre a consulta dos candidatos e o UPDATE condicional deste
+        # (o primeiro UPDATE é o que devolve os itens presos em 'enviando')
+        if estado.is_update and estado.statement.table.name == 'email_fila':
+            updates.append(estado.statement)
+            if len(updates) != 2:
+                return
+            with db.engine.begin() as conexao:
+                conexao.execute(db.update(EmailFila).values(status='enviando', reservado_em=datetime.utcnow()))
+
+    event.listen(db.session, 'do_orm_execute', outro_worker)
+    try:
+        processar_fila_emails(app)
+    finally:
+        event.remove(db.session, 'do_orm_execute', outro_worker)
+    assert len(updates) == 2
+    assert smtp.enviadas == []
+    assert _recarregar(item).status == 'enviando'
+
+
+def test_lembretes_vao_para_a_fila(app, smtp):
+    amanha = datetime.combine((datetime.now() + timedelta(days=1)).date(), datetime.min.time())
+    equipamento = Equipamento(nome='Pula-pula', status='disponivel')
+    db.session.add(equipamento)
+    db.session.flush()
+    db.session.add_all([
+        Reserva(equipamento_id=equipamento.id, cliente_nome='Ana', cliente_contato='ana@teste.com',
+                data_inicio=amanha, data_fim=amanha),
+        Reserva(equipamento_id=equipamento.id, cliente_nome='Sem contato', cliente_contato='',
+                data_inicio=amanha, data_fim=amanha),
+        Reserva(equipamento_id=equipamento.id, cliente_nome='Depois', cliente_contato='bia@teste.com',
+                data_inicio=amanha + timedelta(days=1), data_fim=amanha + timedelta(days=1)),
+    ])
+    db.session.commit()
+
+    check_for_reminders(app)
+    assert smtp.enviadas == []  # quem envia é o worker da fila
+    itens = EmailFila.query.all()
+    assert [(item.destinatarios, item.status) for item in itens] == [('ana@teste.com', 'pendente')]
+    assert 'Pula-pula' in itens[0].assunto
+
+    processar_fila_emails(app)
+    assert [msg.recipients for msg in smtp.enviadas] == [['ana@teste.com']]
@@ -0,0 +1,85 @@
+# Arquivo: tests/test_email_lote.py
+
+import socket
+
+import pytest
+from aiosmtpd.controller import Controller
+from flask_mail import Message
+
+from app import create_app
+from app.utils.email_tasks import enviar_em_lote
+
+from conftest import ConfigTeste
+
+
+class ServidorSmtp:
+    """Handler do aiosmtpd: guarda as mensagens aceitas e a conexão (porta do cliente) de cada uma."""
+
+    def __init__(self, recusados=()):
+        self.recusados = set(recusados)
+        self.entregues = []  # [(porta do cliente, destinatários)]
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.recusados:
+            return '550 Caixa postal inexistente'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        self.entregues.append((session.peer[1], list(envelope.rcpt_tos)))
+        return '250 Mensagem aceita'
+
+
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtp(app, tmp_path):
+    """(app enviando para um servidor SMTP local, handler do servidor)."""
+    handler = ServidorSmtp(recusados={'invalido@teste.com'})
+    controller = Controller(handler, hostname='127.0.0.1', port=_porta_livre())
+    controller.start()
+
+    class ConfigSmtp(ConfigTeste):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "smtp.db"}'
+        MAIL_SUPPRESS_SEND = False
+        MAIL_SERVER = '127.0.0.1'
+        MAIL_PORT = controller.port
+        MAIL_USE_TLS = False
+        MAIL_USERNAME = None
+        MAIL_PASSWORD = None
+        MAIL_DEFAULT_SENDER = 'reservas@teste.com'
+
+    try:
+        yield create_app(ConfigSmtp), handler
+    finally:
+        controller.stop()
+
+
+def _mensagens(destinatarios):
+    return [Message(f'Teste {i}', recipients=[destino], body='corpo') for i, destino in enumerate(destinatarios)]
+
+
+def test_lote_usa_uma_unica_conexao(smtp):
+    app_smtp, servidor = smtp
+    destinatarios = [f'cliente{i}@teste.com' for i in range(20)]
+
+    erros = enviar_em_lote(app_smtp, _mensagens(destinatarios))
+
+    assert erros == [None] * 20
+    assert [rcpt for _, rcpt in servidor.entregues] == [[destino] for destino in destinatarios]
+    assert len({porta for porta, _ in servidor.entregues}) == 1
+
+
+def test_falha_de_uma_mensagem_nao_afeta_as_outras(smtp):
+    app_smtp, servidor = smtp
+    destinatarios = ['a@teste.com', 'invalido@teste.com', 'b@teste.com', 'invalido@teste.com', 'c@teste.com']
+
+    erros = enviar_em_lote(app_smtp, _mensagens(destinatarios))
+
+    assert [erro is None for erro in erros] == [True, False, True, False, True]
+    assert [rcpt for _, rcpt in servidor.entregues] == [['a@teste.com'], ['b@teste.com'], ['c@teste.com']]
+    assert len({porta for porta, _ in servidor.entregues}) == 1
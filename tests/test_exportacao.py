@@ -0,0 +1,105 @@
+# Arquivo: tests/test_exportacao.py
+
+import csv
+import io
+import re
+import zipfile
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import Equipamento, Reserva
+from app.utils import exportacao
+from conftest import criar_reservas, criar_usuario, login
+
+
+@pytest.fixture
+def logado(cliente):
+    criar_usuario()
+    login(cliente)
+    return cliente
+
+
+def _ler_csv(dados):
+    texto = dados.decode('utf-8')
+    assert texto.startswith('﻿')  # BOM para o Excel
+    return list(csv.reader(io.StringIO(texto[1:])))
+
+
+def test_csv_de_reservas_com_cabecalho_e_filtro(logado):
+    criar_reservas(40, equipamentos=2)
+    resposta = logado.get('/exportar/reservas.csv')
+    assert resposta.status_code == 200
+    assert resposta.mimetype == 'text/csv'
+    assert 'attachment; filename=reservas_' in resposta.headers['Content-Disposition']
+
+    linhas = _ler_csv(resposta.data)
+    assert linhas[0] == exportacao.CABECALHO_RESERVAS
+    assert len(linhas) == 41
+    assert linhas[1][1:7] == ['Equipamento 0', 'Cliente 0', 'cliente0@teste.com', '2025-01-01', '2025-01-01', '1']
+
+    # O último dia do período é incluído
+    filtradas = _ler_csv(logado.get('/exportar/reservas.csv?data_inicio=2025-01-05&data_fim=2025-01-07').data)
+    assert [linha[4] for linha in filtradas[1:]] == ['2025-01-05', '2025-01-06', '2025-01-07']
+
+
+def test_csv_de_equipamentos_por_status(logado):
+    db.session.add_all([Equipamento(nome='Pula-pula', status='disponivel', descricao='Grande, "azul"'),
+                        Equipamento(nome='Escorregador', status='manutencao')])
+    db.session.commit()
+    linhas = _ler_csv(logado.get('/exportar/equipamentos.csv?status_filtro=disponivel').data)
+    assert linhas[0] == exportacao.CABECALHO_EQUIPAMENTOS
+    assert [linha[1:4] for linha in linhas[1:]] == [['Pula-pula', 'Grande, "azul"', 'disponivel']]
+
+
+def test_csv_grande_sai_em_streaming(app, logado):
+    equipamento = Equipamento(nome='Pula-pula', status='disponivel')
+    db.session.add(equipamento)
+    db.session.flush()
+    quantidade = 3 * exportacao.LINHAS_POR_LOTE + 10
+    db.session.execute(Reserva.__table__.insert(), [
+        {'equipamento_id': equipamento.id, 'cliente_nome': f'Cliente {i}', 'cliente_contato': '',
+         'data_inicio': datetime(2020, 1, 1) + timedelta(days=i), 'data_fim': datetime(2020, 1, 1) + timedelta(days=i)}
+        for i in range(quantidade)
+    ])
+    db.session.commit()
+
+    resposta = logado.get('/exportar/reservas.csv')
+    assert resposta.is_streamed
+    # Um pedaço por linha: o cabeçalho sai antes de a consulta ser percorrida
+    pedacos = list(resposta.response)
+    assert len(pedacos) == quantidade + 1
+    assert pedacos[0].decode('utf-8').lstrip('﻿').startswith('id,equipamento,')
+    assert len(_ler_csv(b''.join(pedacos))) == quantidade + 1
+
+
+def test_xlsx_de_reservas(logado):
+    pytest.importorskip('xlsxwriter')
+    criar_reservas(25)
+    resposta = logado.get('/exportar/reservas.xlsx')
+    assert resposta.status_code == 200
+    assert resposta.mimetype == 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+    with zipfile.ZipFile(io.BytesIO(resposta.data)) as arquivo:
+        planilha = arquivo.read('xl/worksheets/sheet1.xml').decode('utf-8')
+    assert len(re.findall(r'<row ', planilha)) == 26  # cabeçalho + 25 reservas
+    for coluna in exportacao.CABECALHO_RESERVAS:
+        assert f'>{coluna}<' in planilha
+    assert '>Cliente 24<' in planilha
+
+
+def test_formato_nao_suportado(logado, monkeypatch):
+    assert logado.get('/exportar/reservas.pdf').status_code == 404
+    assert logado.get('/exportar/equipamentos.json').status_code == 404
+
+    monkeypatch.setattr(exportacao, 'xlsx_disponivel', lambda: False)
+    resposta = logado.get('/exportar/reservas.xlsx')
+    assert resposta.status_code == 501
+    assert b'xlsxwriter' in resposta.data
+
+
+def test_exportacao_exige_login(cliente):
+    resposta = cliente.get('/exportar/reservas.csv')
+    assert resposta.status_code == 302
+    assert '/auth/login' in resposta.location
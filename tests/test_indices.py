@@ -0,0 +1,54 @@
+# Arquivo: tests/test_indices.py
+
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import Equipamento, Reserva
+from app.utils.concorrencia import consulta_conflitos
+
+QUANTIDADE = 100_000
+
+
+@pytest.fixture
+def reservas_100k():
+    """100 mil reservas em 50 equipamentos (INSERT em lote, sem passar pelo flush do ORM)."""
+    db.session.execute(db.insert(Equipamento), [{'nome': f'E{i}', 'status': 'disponivel'} for i in range(50)])
+    ids = db.session.scalars(db.select(Equipamento.id)).all()
+    base = datetime(2020, 1, 1)
+    linhas = [
+        {'equipamento_id': ids[i % len(ids)], 'cliente_nome': f'C{i}', 'finalizada': i % 3 == 0,
+         'data_inicio': base + timedelta(days=i // 50), 'data_fim': base + timedelta(days=i // 50 + 2)}
+        for i in range(QUANTIDADE)
+    ]
+    db.session.connection().execute(Reserva.__table__.insert(), linhas)
+    db.session.commit()
+    return ids
+
+
+def _plano(consulta):
+    """Linhas do EXPLAIN QUERY PLAN da consulta, com os parâmetros já inseridos no SQL."""
+    sql = str(consulta.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+    return [linha[-1] for linha in db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}'))]
+
+
+def _usa_indice_sem_scan(plano):
+    assert any('USING' in passo and 'INDEX ix_reserva_' in passo for passo in plano), plano
+    assert not any(passo.startswith('SCAN reserva') for passo in plano), plano
+
+
+def test_consultas_de_reserva_usam_indices_com_100k_linhas(reservas_100k):
+    assert db.session.scalar(db.select(db.func.count(Reserva.id))) == QUANTIDADE
+
+    # Conflitos de um equipamento em um período (nova reserva, reservas em lote)
+    plano = _plano(consulta_conflitos(reservas_100k[0], date(2023, 6, 1), date(2023, 6, 5)))
+    _usa_indice_sem_scan(plano)
+    assert any('ix_reserva_equipamento_periodo' in passo for passo in plano), plano
+
+    # Lembretes: reservas que começam amanhã
+    amanha = datetime(2023, 6, 1)
+    plano = _plano(db.select(Reserva.id).where(
+        Reserva.data_inicio >= amanha, Reserva.data_inicio < amanha + timedelta(days=1), Reserva.finalizada.isnot(True)
+    ))
+    _usa_indice_sem_scan(plano)
@@ -0,0 +1,72 @@
+# Arquivo: tests/test_listagens.py
+
+from datetime import datetime
+
+from app import db
+from app.models import Equipamento
+from conftest import criar_usuario, criar_reservas, login
+
+
+def test_filtro_de_reservas_encontra_itens_fora_da_primeira_pagina(cliente):
+    criar_usuario()
+    criar_reservas(60, equipamentos=3)
+    login(cliente)
+
+    # Sem filtro, 'Cliente 59' está na segunda página (50 por página)
+    assert b'Cliente 59<' not in cliente.get('/reservas').data
+
+    resposta = cliente.get('/reservas?cliente=cliente 59')
+    assert resposta.status_code == 200
+    assert b'Cliente 59' in resposta.data
+    assert b'Cliente 58' not in resposta.data
+
+
+def test_filtro_de_reservas_por_mes_ano_e_equipamento(cliente):
+    criar_usuario()
+    criar_reservas(60, equipamentos=3, inicio=datetime(2025, 1, 1))
+    login(cliente)
+
+    # Fevereiro/2025 = dias 31..58 a partir de 01/01; o equipamento 1 fica com um terço deles
+    dados = cliente.get('/reservas?mes=2&ano=2025&equipamento=Equipamento 1').data.decode()
+    assert '01/02/2025' in dados  # Cliente 31 -> Equipamento 1
+    assert '31/01/2025' not in dados
+    assert 'Equipamento 0' not in dados.split('Lista de Reservas')[1].split('Paginação')[0]
+
+
+def test_paginacao_mantem_os_filtros(cliente):
+    criar_usuario()
+    criar_reservas(60, equipamentos=1)
+    login(cliente)
+
+    dados = cliente.get('/reservas?limite=10&cliente=Cliente').data.decode()
+    assert 'cliente=Cliente' in dados.split('Paginação')[1]
+
+
+def test_filtro_de_equipamentos_por_nome_e_status(cliente):
+    criar_usuario()
+    db.session.add_all([Equipamento(nome=f'Brinquedo {i}', status='disponivel') for i in range(55)] +
+                       [Equipamento(nome='Pula 100%', status='manutencao')])
+    db.session.commit()
+    login(cliente)
+
+    dados = cliente.get('/equipamentos?nome=100%25').data.decode()
+    assert 'Pula 100%' in dados and 'Brinquedo 1<' not in dados
+    # '%' é literal, não curinga
+    assert 'Nenhum brinquedo encontrado' in cliente.get('/equipamentos?nome=1%25').data.decode()
+    dados = cliente.get('/equipamentos?status=manutencao').data.decode()
+    assert 'Pula 100%' in dados and 'Brinquedo 0' not in dados
+
+
+def test_campos_de_busca_consultam_a_api(cliente):
+    criar_usuario()
+    criar_reservas(60, equipamentos=3)
+    login(cliente)
+
+    # Os campos de texto apontam para os endpoints de busca, que respondem à sessão do navegador
+    assert b'data-busca-url="/api/reservas/busca"' in cliente.get('/reservas').data
+    assert b'data-busca-url="/api/equipamentos/busca"' in cliente.get('/equipamentos').data
+
+    dados = cliente.get('/api/reservas/busca?q=cliente 59').get_json()
+    assert [item['cliente_nome'] for item in dados['itens']] == ['Cliente 59']
+    dados = cliente.get('/api/equipamentos/busca?q=equipamento&limite=2').get_json()
+    assert len(dados['itens']) == 2 and dados['proxima'] == 2
@@ -0,0 +1,45 @@
+# Arquivo: tests/test_login.py
+
+from app import create_app
+
+from conftest import ConfigTeste
+
+
+def _app_limitado(tmp_path, **config):
+    """App com uma única tentativa de login por IP."""
+    config = dict(SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path / "login.db"}', LOGIN_LIMITE_IP=(1, 0.001), **config)
+    return create_app(type('ConfigLimite', (ConfigTeste,), config)).test_client()
+
+
+def _tentar(cliente, ip_encaminhado):
+    return cliente.post('/auth/login', data={'username': 'ninguem', 'password': 'x'},
+                        headers={'X-Forwarded-For': ip_encaminhado}).status_code
+
+
+def test_limite_por_ip_do_cliente_atras_do_proxy(app, tmp_path):
+    cliente = _app_limitado(tmp_path, PROXY_SALTOS=1)
+    assert _tentar(cliente, '203.0.113.1') == 200
+    assert _tentar(cliente, '203.0.113.2') == 200  # outro cliente atrás do mesmo proxy
+    assert _tentar(cliente, '203.0.113.1') == 429
+
+
+def test_sem_proxy_x_forwarded_for_e_ignorado(app, tmp_path):
+    cliente = _app_limitado(tmp_path)
+    assert _tentar(cliente, '203.0.113.1') == 200
+    assert _tentar(cliente, '203.0.113.2') == 429  # o cabeçalho forjado não cria um balde novo
+
+
+def test_limitador_descarta_o_balde_usado_ha_mais_tempo():
+    from app.utils.limitador import LimitadorTaxa
+
+    limitador = LimitadorTaxa(1, 0.001, max_chaves=3)
+    for chave in ('a', 'b', 'c'):
+        assert limitador.consumir(chave) == 0
+    assert limitador.consumir('a') > 0  # 'a' sem fichas passa a ser o usado mais recentemente
+
+    # Nenhum balde se recuperou e mesmo assim o tamanho fica no limite: sai 'b', o mais antigo
+    for chave in range(100):
+        limitador.consumir(chave)
+        assert len(limitador._baldes) == 3
+    assert 'b' not in limitador._baldes
+    assert limitador.consumir('b') == 0
@@ -0,0 +1,44 @@
+# Arquivo: tests/test_migracoes.py
+
+import sqlite3
+
+from flask import Flask
+
+from app import db
+from app.utils.migracoes import MIGRACOES, migracoes_pendentes, preparar_banco
+
+
+def _app_com_banco(caminho, **config):
+    """App mínimo ligado a outro arquivo de banco, para exercitar a inicialização do esquema."""
+    app = Flask(__name__, instance_path=str(caminho.parent / 'instance'))
+    app.config.update(SQLALCHEMY_DATABASE_URI=f'sqlite:///{caminho}', **config)
+    db.init_app(app)
+    return app
+
+
+def test_inicializacao_migra_banco_existente(tmp_path):
+    # Banco criado antes das colunas novas (ex.: equipamento.versao)
+    caminho = tmp_path / 'antigo.db'
+    conexao = sqlite3.connect(caminho)
+    conexao.execute('CREATE TABLE equipamento (id INTEGER PRIMARY KEY, nome VARCHAR(100) NOT NULL, '
+                    'descricao TEXT, status VARCHAR(20), data_cadastro DATETIME)')
+    conexao.execute("INSERT INTO equipamento (nome, status) VALUES ('Pula-pula', 'disponivel')")
+    conexao.commit()
+    conexao.close()
+
+    antigo = _app_com_banco(caminho)
+    preparar_banco(antigo)
+    with antigo.app_context():
+        assert migracoes_pendentes() == []
+        assert db.session.execute(db.text('SELECT nome, versao FROM equipamento')).all() == [('Pula-pula', 0)]
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_sem_migrar_ao_iniciar_so_avisa(tmp_path, capsys):
+    novo = _app_com_banco(tmp_path / 'novo.db', MIGRAR_AO_INICIAR=False)
+    preparar_banco(novo)
+    assert 'migrações pendentes' in capsys.readouterr().out
+    with novo.app_context():
+        assert migracoes_pendentes() == [nome for nome, _ in MIGRACOES]
+        db.engine.dispose()
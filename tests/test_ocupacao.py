@@ -0,0 +1,83 @@
+# Arquivo: tests/test_ocupacao.py
+
+import base64
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import Equipamento, Reserva
+from app.utils import ocupacao
+
+np = pytest.importorskip('numpy')
+
+INICIO, FIM = date(2025, 3, 1), date(2025, 4, 15)
+
+
+def _reservas_aleatorias(quantidade, equipamentos):
+    """Reservas sobrepostas à vontade, algumas finalizadas e algumas cruzando as bordas do período."""
+    aleatorio = random.Random(7)
+    itens = [Equipamento(nome=f'Equipamento {i:02d}', status='disponivel') for i in range(equipamentos)]
+    db.session.add_all(itens)
+    db.session.flush()
+    linhas = []
+    for i in range(quantidade):
+        inicio = datetime(2025, 2, 15) + timedelta(days=aleatorio.randrange(75))
+        linhas.append({
+            'equipamento_id': aleatorio.choice(itens).id,
+            'cliente_nome': f'Cliente {i}',
+            'data_inicio': inicio,
+            'data_fim': inicio + timedelta(days=aleatorio.randrange(12)),
+            'finalizada': aleatorio.random() < 0.2,
+        })
+    db.session.execute(Reserva.__table__.insert(), linhas)
+    db.session.commit()
+    return linhas
+
+
+def _contagem_direta(linhas, equipamento_id, dia, incluir_finalizadas):
+    return sum(1 for linha in linhas
+               if linha['equipamento_id'] == equipamento_id
+               and (incluir_finalizadas or not linha['finalizada'])
+               and linha['data_inicio'].date() <= dia <= linha['data_fim'].date())
+
+
+@pytest.mark.parametrize('incluir_finalizadas', [False, True])
+def test_matriz_confere_com_contagem_direta(incluir_finalizadas):
+    linhas = _reservas_aleatorias(300, equipamentos=8)
+    equipamentos, matriz = ocupacao.matriz_ocupacao(INICIO, FIM, incluir_finalizadas)
+
+    dias = (FIM - INICIO).days + 1
+    assert matriz.shape == (8, dias)
+    assert [nome for _, nome in equipamentos] == sorted(nome for _, nome in equipamentos)
+    for linha, (equipamento_id, _) in enumerate(equipamentos):
+        for coluna in range(dias):
+            dia = INICIO + timedelta(days=coluna)
+            assert matriz[linha, coluna] == _contagem_direta(linhas, equipamento_id, dia, incluir_finalizadas)
+
+
+def _decodificar_rle(trechos, dias):
+    linha = np.zeros(dias, dtype=np.int32)
+    for dia_inicial, quantidade, reservas in trechos:
+        linha[dia_inicial:dia_inicial + quantidade] = reservas
+    return linha
+
+
+def test_codificadores_reproduzem_a_matriz():
+    _reservas_aleatorias(300, equipamentos=8)
+    _, matriz = ocupacao.matriz_ocupacao(INICIO, FIM)
+    dias = matriz.shape[1]
+    assert matriz.max() > 1  # há sobreposições, então o RLE precisa guardar a contagem
+
+    for linha in matriz:
+        assert np.array_equal(_decodificar_rle(ocupacao.codificar_rle(linha), dias), linha)
+        bits = np.unpackbits(np.frombuffer(base64.b64decode(ocupacao.codificar_bitset(linha)), dtype=np.uint8))
+        assert np.array_equal(bits[:dias], (linha > 0).astype(np.uint8))
+        assert not bits[dias:].any()
+
+
+def test_codificadores_de_linha_vazia_e_cheia():
+    assert ocupacao.codificar_rle(np.zeros(10, dtype=np.int32)) == []
+    assert ocupacao.codificar_rle(np.full(10, 2, dtype=np.int32)) == [[0, 10, 2]]
+    assert ocupacao.codificar_bitset(np.ones(9, dtype=np.int32)) == base64.b64encode(b'\xff\x80').decode('ascii')
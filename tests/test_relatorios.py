@@ -0,0 +1,146 @@
+# Arquivo: tests/test_relatorios.py
+
+import os
+import threading
+import time
+
+import pytest
+
+from app.utils import relatorios_pdf
+
+from conftest import criar_usuario, login
+
+JOB = 'reservas-0123456789abcdef0123'
+
+
+@pytest.fixture
+def relatorio_demorado(monkeypatch):
+    """Um relatório que continua 'processando' depois da espera síncrona."""
+    monkeypatch.setattr(relatorios_pdf, 'solicitar_relatorio', lambda tipo, filtros: JOB)
+    monkeypatch.setattr(relatorios_pdf, 'status_relatorio', lambda job_id: ('processando', None))
+    monkeypatch.setattr(relatorios_pdf, 'aguardar_relatorio', lambda job_id, segundos: 'processando')
+
+
+def test_formulario_redireciona_para_a_pagina_de_acompanhamento(cliente, relatorio_demorado):
+    criar_usuario()
+    login(cliente)
+
+    resposta = cliente.post('/relatorio_pdf', data={'data_inicio': '', 'data_fim': ''})
+    assert resposta.status_code == 303
+    assert resposta.location == f'/relatorios/{JOB}'
+
+    pagina = cliente.get(resposta.location)
+    assert pagina.status_code == 200
+    assert pagina.mimetype == 'text/html'
+    assert f'/relatorios/{JOB}/status'.encode() in pagina.data
+
+
+def test_cliente_json_recebe_202(cliente, relatorio_demorado):
+    criar_usuario()
+    login(cliente)
+    resposta = cliente.post('/relatorio_equipamento_pdf', headers={'Accept': 'application/json'})
+    assert resposta.status_code == 202
+    assert resposta.get_json()['status_url'] == f'/relatorios/{JOB}/status'
+
+
+def test_gerar_relatorio_exige_login(cliente, monkeypatch):
+    pedidos = []
+    monkeypatch.setattr(relatorios_pdf, 'solicitar_relatorio', lambda tipo, filtros: pedidos.append(tipo))
+    for url in ('/relatorio_pdf', '/relatorio_equipamento_pdf'):
+        resposta = cliente.post(url)
+        assert resposta.status_code == 302
+        assert '/auth/login' in resposta.location
+    assert pedidos == []
+
+
+@pytest.fixture
+def jobs_registrados(app, monkeypatch, tmp_path):
+    """Jobs submetidos por solicitar_relatorio, sem executá-los."""
+    submetidos = []
+
+    class Executor:
+        def submit(self, funcao, *args):
+            submetidos.append(args)
+
+    monkeypatch.setitem(app.config, 'RELATORIO_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(relatorios_pdf, '_pools', lambda: (None, Executor()))
+    return submetidos
+
+
+def test_pedidos_simultaneos_iniciam_um_unico_job(app, jobs_registrados, monkeypatch):
+    # Alarga a janela entre a verificação e o início do job
+    monkeypatch.setattr(relatorios_pdf, '_limpar_cache_antigo', lambda pasta: time.sleep(0.05))
+    barreira = threading.Barrier(16)
+    ids = []
+
+    def pedir():
+        with app.app_context():
+            barreira.wait()
+            ids.append(relatorios_pdf.solicitar_relatorio('equipamentos', {'status_filtro': None}))
+
+    threads = [threading.Thread(target=pedir) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(ids)) == 1 and len(ids) == 16
+    assert len(jobs_registrados) == 1
+
+
+def test_marcador_abandonado_e_assumido_por_um_novo_job(app, jobs_registrados):
+    job_id = relatorios_pdf.solicitar_relatorio('equipamentos', {})
+    caminhos, token_antigo = jobs_registrados[0][3:]
+    vencido = time.time() - app.config.get('RELATORIO_TIMEOUT', 600) - 1
+    os.utime(caminhos['processando'], (vencido, vencido))
+
+    assert relatorios_pdf.solicitar_relatorio('equipamentos', {}) == job_id
+    assert len(jobs_registrados) == 2
+    # O job antigo, se ainda terminar, não apaga o marcador do novo
+    relatorios_pdf._remover_marcador(caminhos['processando'], token_antigo)
+    assert relatorios_pdf.status_relatorio(job_id) == ('processando', None)
+
+
+def _partes_pdf(pasta, quantidade, paginas=1):
+    """PDFs gerados pelo xhtml2pdf (como as partes dos relatórios), com o número da parte no texto."""
+    partes = []
+    for i in range(quantidade):
+        corpo = ''.join(f'<p>Parte {i} pagina {j}</p><pdf:nextpage />' for j in range(paginas))
+        caminho = str(pasta / f'parte{i:04d}.pdf')
+        relatorios_pdf.html_para_pdf(f'<html><body>{corpo}</body></html>', caminho)
+        partes.append(caminho)
+    return partes
+
+
+def test_juntar_pdfs_preserva_paginas_e_ordem(tmp_path):
+    from pypdf import PdfReader
+
+    partes = _partes_pdf(tmp_path, 3, paginas=2)
+    destino = str(tmp_path / 'relatorio.pdf')
+    relatorios_pdf.juntar_pdfs(partes, destino)
+
+    leitor = PdfReader(destino, strict=True)
+    esperadas = sum(len(PdfReader(parte).pages) for parte in partes)
+    assert len(leitor.pages) == esperadas
+    textos = [pagina.extract_text() for pagina in leitor.pages]
+    assert 'Parte 0 pagina 0' in textos[0]
+    assert 'Parte 2 pagina 1' in ''.join(textos[-2:])
+
+
+def test_juntar_pdfs_memoria_nao_cresce_com_o_numero_de_partes(tmp_path):
+    import shutil
+    import tracemalloc
+
+    parte = _partes_pdf(tmp_path, 1, paginas=10)[0]
+
+    def pico(quantidade):
+        partes = []
+        for i in range(quantidade):
+            partes.append(str(tmp_path / f'copia{i:04d}.pdf'))
+            shutil.copyfile(parte, partes[-1])
+        tracemalloc.start()
+        relatorios_pdf.juntar_pdfs(partes, str(tmp_path / 'relatorio.pdf'))
+        maximo = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return maximo
+
+    assert pico(20) < 1.5 * pico(4)
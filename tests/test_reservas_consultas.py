@@ -0,0 +1,23 @@
+# Arquivo: tests/test_reservas_consultas.py
+
+from conftest import contar_consultas, criar_usuario, criar_reservas, limpar_banco, login
+
+
+def _consultas_listagem(app, quantidade):
+    limpar_banco()
+    criar_usuario()
+    criar_reservas(quantidade, equipamentos=5)
+    cliente = app.test_client()
+    login(cliente)
+    cliente.get('/reservas')  # Aquece o cache do usuário logado
+
+    with contar_consultas() as comandos:
+        resposta = cliente.get('/reservas')
+    assert resposta.status_code == 200
+    assert resposta.data.count(b'Equipamento ') >= quantidade
+    return len(comandos)
+
+
+def test_listagem_de_reservas_tem_numero_constante_de_consultas(app):
+    # O equipamento de cada reserva vem no joinedload: 50 linhas custam as mesmas consultas que 1
+    assert _consultas_listagem(app, 1) == _consultas_listagem(app, 50)
@@ -0,0 +1,61 @@
+# Arquivo: tests/test_resumos.py
+
+from datetime import date, datetime
+
+from app import db
+from app.models import Reserva, ResumoDiario
+from app.utils import resumos
+from app.utils.reservas_lote import finalizar_lote
+from conftest import criar_reservas
+
+
+def _contar_recalculos(monkeypatch):
+    chamadas = []
+    original = resumos.recalcular
+
+    def recalcular(conexao, equipamento_id, inicio, fim):
+        chamadas.append((equipamento_id, inicio, fim))
+        return original(conexao, equipamento_id, inicio, fim)
+
+    monkeypatch.setattr(resumos, 'recalcular', recalcular)
+    return chamadas
+
+
+def test_finalizar_reserva_nao_recalcula_resumo(monkeypatch):
+    criar_reservas(2)
+    chamadas = _contar_recalculos(monkeypatch)
+
+    reserva = Reserva.query.order_by(Reserva.id).first()
+    reserva.finalizada = True
+    db.session.commit()
+    finalizar_lote([reserva.id + 1])
+    assert chamadas == []
+
+    # Alterar uma coluna do resumo continua recalculando
+    reserva.cliente_nome = 'Outro'
+    db.session.commit()
+    assert chamadas == [(reserva.equipamento_id, date(2025, 1, 1), date(2025, 1, 1))]
+
+
+def test_periodo_com_falha_e_refeito_no_proximo_commit(monkeypatch, capsys):
+    equipamento = criar_reservas(1)[0]
+    original = resumos.recalcular
+
+    def falhar(conexao, equipamento_id, inicio, fim):
+        raise RuntimeError('banco indisponível')
+
+    monkeypatch.setattr(resumos, 'recalcular', falhar)
+    db.session.add(Reserva(equipamento_id=equipamento.id, cliente_nome='Novo', cliente_contato='novo@teste.com',
+                           data_inicio=datetime(2025, 2, 1), data_fim=datetime(2025, 2, 3)))
+    db.session.commit()
+    assert 'ERRO ao atualizar resumo_diario' in capsys.readouterr().out
+    assert db.session.get(ResumoDiario, (equipamento.id, date(2025, 2, 2))) is None
+
+    # O próximo commit de reservas (mesmo de outro período) refaz o que ficou pendente
+    monkeypatch.setattr(resumos, 'recalcular', original)
+    reserva = Reserva.query.filter_by(cliente_nome='Cliente 0').one()
+    reserva.cliente_nome = 'Cliente 0b'
+    db.session.commit()
+    dias = {resumo.dia for resumo in ResumoDiario.query.filter_by(equipamento_id=equipamento.id)}
+    assert dias == {date(2025, 1, 1), date(2025, 2, 1), date(2025, 2, 2), date(2025, 2, 3)}
+    assert resumos._pendentes == {}
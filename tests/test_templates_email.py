@@ -0,0 +1,22 @@
+# Arquivo: tests/test_templates_email.py
+
+from app.utils.templates_email import _templates, renderizar
+
+CONTEXTO = {
+    'cliente_nome': 'Ana & "Bia" <b>O\'Neil</b>',
+    'equipamento_nome': 'Pula-pula {grande}',
+    'data_inicio': '01/01/2025',
+    'data_fim': '03/01/2025',
+    'dias': 3,
+}
+
+
+def test_templates_carregados_uma_vez_por_app(app):
+    assert _templates('confirmacao') is _templates('confirmacao')
+
+
+def test_html_escapado_e_texto_sem_escape(app):
+    email = renderizar('confirmacao', CONTEXTO)
+    assert 'Ana &amp; &#34;Bia&#34; &lt;b&gt;O&#39;Neil&lt;/b&gt;' in email.html
+    assert CONTEXTO['cliente_nome'] in email.texto
+    assert email.assunto == 'Confirmação de Reserva: Pula-pula {grande}'
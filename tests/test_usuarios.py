@@ -0,0 +1,58 @@
+# Arquivo: tests/test_usuarios.py
+
+import pytest
+from flask import g
+
+from app.utils.usuarios import cache_usuarios
+from conftest import criar_usuario, login
+
+
+class Navegador:
+    """
+    Cliente de teste que carrega o usuário da sessão a cada requisição.
+
+    O fixture `banco` mantém um app_context aberto e o Flask o reaproveita nas requisições
+    do test_client, então o `current_user` (g._login_user) da requisição anterior ficaria
+    valendo; aqui ele é descartado e o Flask-Login passa pelo user_loader (e pelo cache).
+    """
+
+    def __init__(self, cliente):
+        self.cliente = cliente
+
+    def __getattr__(self, metodo):
+        def requisitar(*args, **kwargs):
+            g.pop('_login_user', None)
+            return getattr(self.cliente, metodo)(*args, **kwargs)
+        return requisitar
+
+
+@pytest.fixture
+def dois_admins(app, monkeypatch):
+    """(navegador do admin, da 'bia', id da 'bia'), ambos logados e já no cache de usuários."""
+    monkeypatch.setitem(app.config, 'USUARIO_CACHE_TTL', 3600)  # só a invalidação pode atualizar
+    criar_usuario()
+    bia_id = criar_usuario('bia').id
+    admin, bia = Navegador(app.test_client()), Navegador(app.test_client())
+    login(admin)
+    login(bia, 'bia')
+    assert bia.get('/api/users/').status_code == 200
+    assert bia_id in cache_usuarios._itens
+    return admin, bia, bia_id
+
+
+def test_usuario_rebaixado_perde_acesso_na_proxima_requisicao(dois_admins):
+    admin, bia, bia_id = dois_admins
+    assert admin.patch(f'/api/users/{bia_id}', json={'is_admin': False}).status_code == 200
+    assert bia.get('/api/users/').status_code == 403
+    assert bia.get('/dashboard').status_code == 200  # continua logada, só sem permissão de admin
+
+
+def test_usuario_excluido_deixa_de_estar_autenticado(dois_admins):
+    admin, bia, bia_id = dois_admins
+    assert admin.delete(f'/api/users/{bia_id}').status_code == 204
+    assert bia_id not in cache_usuarios._itens
+
+    resposta = bia.get('/dashboard')
+    assert resposta.status_code == 302
+    assert '/auth/login' in resposta.location
+    assert bia.get('/api/reservas').status_code == 401
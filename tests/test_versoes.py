@@ -0,0 +1,24 @@
+# Arquivo: tests/test_versoes.py
+
+from app import db
+from app.models import Equipamento
+from app.utils.versoes import incrementar, versao_atual
+
+
+def test_incrementar_cria_e_depois_incrementa_a_linha():
+    assert versao_atual('equipamento') == (0, None)
+
+    for i in range(3):
+        db.session.add(Equipamento(nome=f'Equipamento {i}', status='disponivel'))
+        db.session.commit()
+    assert versao_atual('equipamento')[0] == 3
+
+
+def test_incrementar_uma_vez_por_transacao():
+    db.session.add(Equipamento(nome='Pula-pula', status='disponivel'))
+    db.session.flush()
+    db.session.add(Equipamento(nome='Piscina de bolinhas', status='disponivel'))
+    db.session.flush()
+    incrementar(db.session, 'equipamento')
+    db.session.commit()
+    assert versao_atual('equipamento')[0] == 1